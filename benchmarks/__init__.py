@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Offline benchmarks. Run from the repository root, e.g.
+
+    python -m benchmarks.bench_async_workflow
+"""
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Shared setup for the offline benchmarks.
+"""
+
+import statistics
+import tempfile
+from pathlib import Path
+
+
+def use_scratch_store() -> Path:
+    """Point the memory store at a throwaway directory so runs never touch src/memory."""
+    from src.memory import store
+
+    scratch = Path(tempfile.mkdtemp(prefix="emailgen-bench-"))
+    store.DB_PATH = scratch / "store.sqlite3"
+    # Nothing to migrate from
+    store.PROFILE_PATH = scratch / "user_profiles.json"
+    store.EVAL_PATH = scratch / "eval_history.json"
+    return scratch
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(latencies_s) -> str:
+    if not latencies_s:
+        return "n/a"
+    ms = [v * 1000 for v in latencies_s]
+    return (
+        f"mean {statistics.fmean(ms):8.1f} ms | "
+        f"p50 {percentile(ms, 50):8.1f} ms | "
+        f"p95 {percentile(ms, 95):8.1f} ms"
+    )
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+bench_async_workflow.py
+
+Requests per second for the sync entry point (run_email_workflow on a thread
+pool) versus the async one (arun_email_workflow on a single event loop), using
+the local fake LLM so the numbers reflect orchestration, not OpenAI.
+
+    python -m benchmarks.bench_async_workflow --latency 0.05 --requests 200
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import use_scratch_store
+
+from src.integrations.fake_llm import FakeEmailLLM
+from src.workflow.langgraph_flow import run_email_workflow, arun_email_workflow
+
+PROMPT = "Follow up with Emma about the demo last week. tone: formal"
+
+
+def bench_sync(llm, concurrency: int, requests: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: run_email_workflow(PROMPT, llm=llm), range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def _bench_async(llm, concurrency: int, requests: int) -> float:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            await arun_email_workflow(PROMPT, llm=llm)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+def bench_async(llm, concurrency: int, requests: int) -> float:
+    return asyncio.run(_bench_async(llm, concurrency, requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    use_scratch_store()
+    llm = FakeEmailLLM(latency=args.latency)
+
+    print(f"fake LLM latency {args.latency * 1000:.0f} ms, {args.requests} requests per level")
+    print(f"{'concurrency':>11} | {'sync req/s':>10} | {'async req/s':>11}")
+    for level in args.concurrency:
+        sync_rps = bench_sync(llm, level, args.requests)
+        async_rps = bench_async(llm, level, args.requests)
+        print(f"{level:>11} | {sync_rps:>10.1f} | {async_rps:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
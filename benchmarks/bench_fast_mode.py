@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+bench_fast_mode.py
+
+Runs the eval set through the full workflow and the single-call fast mode
+and compares generation latency, tokens, LLM calls and judge scores.
+
+    python -m benchmarks.bench_fast_mode                  # fake LLM, offline
+    python -m benchmarks.bench_fast_mode --live --limit 10  # OpenAI + gpt-4o judge
+
+Offline, latency and call counts are meaningful but the judge returns canned
+scores; use --live (needs OPENAI_API_KEY) to compare quality.
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from benchmarks._common import use_scratch_store
+from src.eval.eval_runner import DATASET_PATH, arun_eval
+
+MODES = ("full", "fast")
+COLUMNS = ("generation p50 s", "generation p95 s", "tokens/req", "LLM calls/req", "overall score")
+
+
+def _row(summary) -> list:
+    generation = summary["generation_s"]
+    return [
+        generation.get("p50"),
+        generation.get("p95"),
+        summary["total_tokens"].get("mean"),
+        summary["llm_calls"].get("mean"),
+        summary["metrics"]["overall_score"].get("mean"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="use OpenAI for the workflow and the judge")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency per call (s)")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N examples")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    use_scratch_store()
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        dataset = json.load(f)[:args.limit]
+
+    workflow_llm = judge_llm = None
+    if not args.live:
+        from src.integrations.fake_llm import FakeEmailLLM
+
+        workflow_llm = judge_llm = FakeEmailLLM(latency=args.latency)
+
+    out_dir = Path(tempfile.mkdtemp(prefix="emailgen-fast-mode-"))
+    summaries = {}
+    for mode in MODES:
+        summaries[mode] = asyncio.run(arun_eval(
+            dataset, out_dir / f"{mode}.jsonl", args.concurrency, workflow_llm, judge_llm, mode=mode
+        ))
+
+    print(f"{len(dataset)} examples, {'live OpenAI' if args.live else f'fake LLM {args.latency}s/call'}")
+    print(f"{'':<18}" + "".join(f"{mode:>10}" for mode in MODES))
+    rows = {mode: _row(summaries[mode]) for mode in MODES}
+    for i, column in enumerate(COLUMNS):
+        cells = "".join(
+            f"{rows[mode][i]:>10.2f}" if rows[mode][i] is not None else f"{'n/a':>10}" for mode in MODES
+        )
+        print(f"{column:<18}{cells}")
+    print(f"per-example results: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+bench_github_sync.py
+
+Drives rapid profile writes through the store with GitHub sync enabled
+against the in-memory FakeGithub, and reports how many writes were folded
+into each commit, the write latency seen by callers, and queue depth / lag.
+
+    python -m benchmarks.bench_github_sync --writes 500 --debounce 0.5
+"""
+
+import argparse
+import time
+
+from benchmarks._common import summarize, use_scratch_store
+
+from tests.fakes import FakeGithub
+from src.memory import github_sync, store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--debounce", type=float, default=0.5, help="worker debounce window (s)")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="fake GitHub latency per call (s)")
+    args = parser.parse_args()
+
+    use_scratch_store()
+    FakeGithub.reset()
+
+    token, repo_name = "fake-token", "bench/email-generator"
+    worker = github_sync.get_sync_worker(
+        token,
+        repo_name,
+        client_factory=lambda t: FakeGithub(t, latency=args.api_latency),
+        debounce_seconds=args.debounce,
+    )
+    store.configure_github_sync(token, repo_name)
+
+    latencies = []
+    peak_depth = 0
+    for i in range(args.writes):
+        start = time.perf_counter()
+        store.upsert_profile("default", {"name": "SP", "company": f"Bench {i}"})
+        latencies.append(time.perf_counter() - start)
+        peak_depth = max(peak_depth, worker.metrics()["queue_depth"])
+
+    flush_start = time.perf_counter()
+    worker.flush()
+    flush_s = time.perf_counter() - flush_start
+
+    repo = FakeGithub.repos[repo_name]
+    metrics = worker.metrics()
+    print(f"writes:           {args.writes}")
+    print(f"commits:          {len(repo.commits)} ({args.writes / max(1, len(repo.commits)):.0f} writes/commit)")
+    print(f"GitHub API calls: {repo.api_calls}, clients created: {FakeGithub.clients_created}")
+    print(f"upsert latency:   {summarize(latencies)}")
+    print(f"peak queue depth: {peak_depth}, final flush {flush_s * 1000:.0f} ms")
+    print(f"worker metrics:   {metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+bench_import_time.py
+
+Imports each module in a fresh interpreter with `-X importtime` and no
+OPENAI_API_KEY, and checks the cumulative import time against a budget.
+Also fails if a module drags in Streamlit. Exits non-zero on any violation,
+so it can gate CI or a container build.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --scale 2   # slower machine
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# Cumulative import budget per module, in milliseconds
+BUDGETS_MS = {
+    "src.memory.store": 60,
+    "src.integrations.llm_client": 150,
+    "src.agents.tone_stylist_agent": 600,
+    "src.workflow.langgraph_flow": 1500,
+    "src.workflow.batch": 1600,
+    "src.eval.eval_runner": 200,
+}
+
+PROBE = "import sys, {module}; print('streamlit' in sys.modules)"
+
+
+def measure(module: str) -> tuple:
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1].strip())
+    return cumulative_us / 1000, proc.stdout.strip() == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget")
+    parser.add_argument("--repeat", type=int, default=3, help="take the best of N runs")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<32}{'import ms':>10}{'budget':>9}  status")
+    for module, budget in BUDGETS_MS.items():
+        budget *= args.scale
+        runs = [measure(module) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        loads_streamlit = any(flag for _, flag in runs)
+
+        status = "ok"
+        if best_ms > budget:
+            status = "OVER BUDGET"
+        if loads_streamlit:
+            status = "IMPORTS STREAMLIT"
+        if status != "ok":
+            failures.append(module)
+        print(f"{module:<32}{best_ms:>10.1f}{budget:>9.0f}  {status}")
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
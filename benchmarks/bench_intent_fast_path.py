@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+bench_intent_fast_path.py
+
+Runs the eval-set prompts through the local intent classifier and reports
+how many it answers without the LLM and how long a local answer takes,
+next to one IntentDetectionAgent LLM round trip (fake LLM, --latency).
+
+    python -m benchmarks.bench_intent_fast_path
+    python -m benchmarks.bench_intent_fast_path --latency 0.4 --repeat 200
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks._common import summarize, use_scratch_store
+from src.eval.eval_runner import DATASET_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency per call (s)")
+    parser.add_argument("--repeat", type=int, default=100, help="timed passes over the prompts")
+    args = parser.parse_args()
+
+    use_scratch_store()
+    from src.agents.intent_classifier import classify_fast, get_model
+    from src.agents.intent_detection_agent import IntentDetectionAgent
+    from src.integrations.fake_llm import FakeEmailLLM
+
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        prompts = [example["input"] for example in json.load(f)]
+
+    decisions = [classify_fast(p) for p in prompts]
+    fast = [d for d in decisions if d is not None]
+    by_source = {}
+    for d in fast:
+        by_source[d.source] = by_source.get(d.source, 0) + 1
+
+    local_s = []
+    for _ in range(args.repeat):
+        for p in prompts:
+            start = time.perf_counter()
+            classify_fast(p)
+            local_s.append(time.perf_counter() - start)
+
+    llm = FakeEmailLLM(latency=args.latency)
+    llm_s = []
+    for p in prompts[:5]:
+        start = time.perf_counter()
+        IntentDetectionAgent._chain(llm).invoke({"text": p})
+        llm_s.append(time.perf_counter() - start)
+
+    print(f"prompts: {len(prompts)}  model loaded: {get_model() is not None}")
+    print(f"fast path share: {len(fast) / len(prompts):.1%}  by source: {by_source}")
+    print(f"local classify : mean {sum(local_s) / len(local_s) * 1e6:8.1f} us")
+    print(f"LLM round trip : {summarize(llm_s)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+bench_nbest.py
+
+Runs the eval set through the full workflow with 1, 3 and 5 draft
+candidates per rewrite (DRAFT_CANDIDATES; first drafts always ask for one)
+and compares latency, tokens, LLM calls, rewrite loops, how often local
+selection picked a candidate other than the first, and judge scores.
+
+    python -m benchmarks.bench_nbest                   # fake LLM, offline
+    python -m benchmarks.bench_nbest --live --limit 10 # OpenAI + gpt-4o judge
+
+Offline, the fake reviewer approves every draft, so there are no rewrites
+and the columns match; use --live to see the effect on the review loop.
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+from benchmarks._common import use_scratch_store
+from src.agents import draft_writer_agent
+from src.eval.eval_runner import DATASET_PATH, arun_eval
+
+CANDIDATES = (1, 3, 5)
+COLUMNS = ("generation p50 s", "tokens/req", "LLM calls/req", "rewrites/req", "non-first pick", "overall score")
+
+
+def _row(summary) -> list:
+    selection = summary.get("draft_selection") or {}
+    return [
+        summary["generation_s"].get("p50"),
+        summary["total_tokens"].get("mean"),
+        summary["llm_calls"].get("mean"),
+        summary["rewrites"].get("mean"),
+        selection.get("picked_other_share"),
+        summary["metrics"]["overall_score"].get("mean"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="use OpenAI for the workflow and the judge")
+    parser.add_argument("--latency", type=float, default=0.3, help="fake LLM latency per call (s)")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N examples")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    use_scratch_store()
+    with open(DATASET_PATH, "r", encoding="utf-8") as f:
+        dataset = json.load(f)[:args.limit]
+
+    workflow_llm = judge_llm = None
+    if not args.live:
+        from src.integrations.fake_llm import FakeEmailLLM
+
+        workflow_llm = judge_llm = FakeEmailLLM(latency=args.latency)
+
+    out_dir = Path(tempfile.mkdtemp(prefix="emailgen-nbest-"))
+    summaries = {}
+    original = draft_writer_agent.DRAFT_CANDIDATES
+    try:
+        for n in CANDIDATES:
+            draft_writer_agent.DRAFT_CANDIDATES = n
+            summaries[n] = asyncio.run(arun_eval(
+                dataset, out_dir / f"n{n}.jsonl", args.concurrency, workflow_llm, judge_llm, mode="full"
+            ))
+    finally:
+        draft_writer_agent.DRAFT_CANDIDATES = original
+
+    print(f"{len(dataset)} examples, {'live OpenAI' if args.live else f'fake LLM {args.latency}s/call'}")
+    print(f"{'candidates':<18}" + "".join(f"{n:>10}" for n in CANDIDATES))
+    rows = {n: _row(summaries[n]) for n in CANDIDATES}
+    for i, column in enumerate(COLUMNS):
+        cells = "".join(
+            f"{rows[n][i]:>10.2f}" if rows[n][i] is not None else f"{'n/a':>10}" for n in CANDIDATES
+        )
+        print(f"{column:<18}{cells}")
+    print(f"per-example results: {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+bench_prompt_cache.py
+
+Checks that each LLM agent's prompt starts with a byte-identical prefix
+across different requests (what OpenAI's automatic prompt caching keys on),
+then runs the workflow repeatedly and reports input vs cached tokens.
+
+    python -m benchmarks.bench_prompt_cache                 # fake LLM
+    python -m benchmarks.bench_prompt_cache --live -n 10    # OpenAI usage numbers
+
+OpenAI only caches prefixes of 1024+ tokens; the fake LLM applies the same
+rule, so the estimated prefix sizes below show which agents can benefit.
+"""
+
+import argparse
+import time
+
+from benchmarks._common import summarize, use_scratch_store
+
+PROMPTS = [
+    "Follow up with Emma about the demo last week. tone: formal",
+    "Apologize to the team for the delayed release. tone: casual",
+    "Ask Raj for a meeting to discuss the Q3 budget. to: Raj tone: assertive",
+    "Introduce our new analytics product to a prospective client. length: short",
+]
+
+
+def _states():
+    from src.agents.tone_stylist_agent import tone_instructions
+
+    for prompt in PROMPTS:
+        tone = prompt.rsplit("tone: ", 1)[-1] if "tone: " in prompt else "formal"
+        yield {
+            "parsed": {"prompt_text": prompt, "recipient_name": "Emma", "constraints": {}},
+            "intent": "follow-up",
+            "tone": tone,
+            "tone_instructions": tone_instructions(tone),
+            "user_profile": {"name": "SP", "company": "Acme"},
+            "personalized_draft": {"subject": "Hello", "body": "Hi Emma,\n\nThanks.\n\nBest regards,\nSP"},
+        }
+
+
+def check_prefixes() -> bool:
+    from src.agents.draft_writer_agent import DraftWriterAgent
+    from src.agents.fast_draft_agent import FastDraftAgent
+    from src.agents.intent_detection_agent import IntentDetectionAgent
+    from src.agents.review_agent import ReviewAgent
+
+    agents = {
+        "intent_detection": (IntentDetectionAgent._prompt(), lambda s: {"text": s["parsed"]["prompt_text"]}),
+        "draft_writer": (DraftWriterAgent._prompt(), DraftWriterAgent._payload),
+        "fast_draft": (FastDraftAgent._prompt(), FastDraftAgent._payload),
+        "review": (ReviewAgent._prompt(), ReviewAgent._payload),
+    }
+    stable = True
+    print(f"{'agent':<18}{'prefix tokens (est)':>20}  identical")
+    for name, (prompt, payload) in agents.items():
+        prefixes = {prompt.format_messages(**payload(state))[0].content for state in _states()}
+        same = len(prefixes) == 1
+        stable &= same
+        print(f"{name:<18}{len(next(iter(prefixes))) // 4:>20}  {'yes' if same else 'NO'}")
+    return stable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="use OpenAI (needs OPENAI_API_KEY)")
+    parser.add_argument("-n", type=int, default=20, help="workflow runs")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    args = parser.parse_args()
+
+    use_scratch_store()
+    from src.agents.chain_cache import chain_cache_stats
+    from src.workflow.langgraph_flow import run_email_workflow
+
+    stable = check_prefixes()
+
+    llm = None
+    if not args.live:
+        from src.integrations.fake_llm import FakeEmailLLM
+
+        llm = FakeEmailLLM(latency=args.latency)
+
+    totals = {"input_tokens": 0, "cached_tokens": 0, "llm_calls": 0}
+    latencies = []
+    for i in range(args.n):
+        start = time.perf_counter()
+        state = run_email_workflow(PROMPTS[i % len(PROMPTS)], llm=llm)
+        latencies.append(time.perf_counter() - start)
+        usage = state.get("usage") or {}
+        for key in totals:
+            totals[key] += usage.get(key, 0)
+
+    share = totals["cached_tokens"] / totals["input_tokens"] if totals["input_tokens"] else 0.0
+    print(f"\n{args.n} runs, {totals['llm_calls']} LLM calls")
+    print(f"input tokens {totals['input_tokens']}, cached {totals['cached_tokens']} ({share:.1%})")
+    print(f"latency: {summarize(latencies)}")
+    print(f"chain cache: {chain_cache_stats()}")
+    if not stable:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+bench_transcription.py
+
+Wall time to transcribe a long voice note as one request vs in parallel
+chunks, and of a repeat of the same upload (cache hit). Uses a fake backend
+whose latency grows with audio length (like a real API), on a tone
+generated by ffmpeg, so no API key is needed; ffmpeg must be installed.
+
+    python -m benchmarks.bench_transcription --minutes 10 --seconds-per-audio-minute 3
+"""
+
+import argparse
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from src.integrations import transcription
+from src.integrations.transcription import TranscriptCache, TranscriptionBackend, probe_duration
+
+
+class FakeTranscriber(TranscriptionBackend):
+    name = "fake"
+
+    def __init__(self, seconds_per_audio_minute: float):
+        super().__init__("fake")
+        self.rate = seconds_per_audio_minute / 60
+
+    def transcribe(self, path: Path, language) -> str:
+        duration = probe_duration(path) or 0.0
+        time.sleep(duration * self.rate)
+        return f"[{duration:.0f}s of audio]"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--seconds-per-audio-minute", type=float, default=3.0, help="fake backend latency")
+    parser.add_argument("--chunk-s", type=float, default=120)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if not transcription.ffmpeg_available():
+        raise SystemExit("ffmpeg/ffprobe not found on PATH")
+
+    scratch = Path(tempfile.mkdtemp(prefix="emailgen-transcribe-"))
+    audio = scratch / "note.mp3"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency=440:duration={args.minutes * 60}",
+         "-ac", "1", "-ar", "16000", str(audio)],
+        check=True,
+    )
+    backend = FakeTranscriber(args.seconds_per_audio_minute)
+    data = audio.read_bytes()
+
+    print(f"{args.minutes:g} min of audio, fake backend {args.seconds_per_audio_minute}s per audio minute")
+    runs = [
+        ("single request", {"chunk_s": args.minutes * 60 + 1, "workers": 1}),
+        (f"{args.chunk_s:g}s chunks x{args.workers}", {"chunk_s": args.chunk_s, "workers": args.workers}),
+    ]
+    for label, options in runs:
+        # Fresh memory-only cache so each run really transcribes
+        transcription._cache = TranscriptCache(directory="off")
+        result = transcription.transcribe_audio(data, "note.mp3", backend=backend, **options)
+        print(f"{label:<24}{result.seconds:>8.2f} s  ({result.chunks} chunk(s))")
+
+    repeat = transcription.transcribe_audio(data, "note.mp3", backend=backend, chunk_s=args.chunk_s)
+    print(f"{'repeat (cache hit)':<24}{repeat.seconds * 1000:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+fake_openai_server.py
+
+Local OpenAI-compatible /v1/chat/completions endpoint (plain and streamed)
+answering with the same canned replies as FakeEmailLLM (including `n`
+choices for n-best calls), after a fixed latency. Point a process at it
+with OPENAI_BASE_URL so the real ChatOpenAI client, HTTP pool and retry
+paths are exercised without a network.
+
+    python -m benchmarks.fake_openai_server --port 8199 --latency 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8199/v1 OPENAI_API_KEY=sk-fake python -m src.api.server
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.messages import convert_to_messages
+
+from src.integrations.fake_llm import fake_reply, fake_usage
+
+CHUNK_CHARS = 8
+
+
+def _openai_usage(usage: dict) -> dict:
+    return {
+        "prompt_tokens": usage["input_tokens"],
+        "completion_tokens": usage["output_tokens"],
+        "total_tokens": usage["total_tokens"],
+        "prompt_tokens_details": {"cached_tokens": usage.get("input_token_details", {}).get("cache_read", 0)},
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.2
+    token_interval = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]})
+        else:
+            self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = convert_to_messages([(m["role"], m.get("content") or "") for m in request.get("messages", [])])
+        n = int(request.get("n") or 1)
+        contents = [fake_reply(messages, i) for i in range(n)] if n > 1 else [fake_reply(messages)]
+        content = contents[0]
+        usage = _openai_usage(fake_usage(messages, "".join(contents)))
+        model = request.get("model", "gpt-4o-mini")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+        if self.latency:
+            time.sleep(self.latency)
+        if request.get("stream"):
+            self._stream(completion_id, model, content, usage, request.get("stream_options") or {})
+            return
+        self._json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {"index": i, "message": {"role": "assistant", "content": choice}, "finish_reason": "stop"}
+                for i, choice in enumerate(contents)
+            ],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id: str, model: str, content: str, usage: dict, options: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(payload) -> None:
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta: dict, finish_reason=None) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        send(chunk({"role": "assistant", "content": ""}))
+        for i in range(0, len(content), CHUNK_CHARS):
+            if self.token_interval:
+                time.sleep(self.token_interval)
+            send(chunk({"content": content[i:i + CHUNK_CHARS]}))
+        send(chunk({}, finish_reason="stop"))
+        if options.get("include_usage"):
+            send({**chunk({}), "choices": [], "usage": usage})
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(port: int, latency: float, token_interval: float = 0.0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeOpenAIHandler,), {"latency": latency, "token_interval": token_interval})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8199)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each completion")
+    parser.add_argument("--token-interval", type=float, default=0.0, help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.token_interval, args.host)
+    print(f"fake OpenAI API on http://{args.host}:{args.port}/v1 (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
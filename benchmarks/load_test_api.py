@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+load_test_api.py
+
+Load test for the HTTP API (src/api/server.py). Starts the fake OpenAI
+server and the API as subprocesses, with the API's ChatOpenAI clients
+pointed at the fake server, then drives POST /v1/emails at several client
+concurrency levels and reports throughput, latency and 429 responses.
+
+    python -m benchmarks.load_test_api --requests 200 --concurrency 1 16 64 256
+    python -m benchmarks.load_test_api --api-max-concurrency 16 --api-max-queue 16   # force backpressure
+
+Use --url to load an API that is already running instead.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+from benchmarks._common import percentile, summarize
+
+PROMPTS = [
+    "Follow up with Emma about the proposal we sent last week",
+    "Thank the team for shipping the release on time",
+    "Ask Raj for a meeting next Tuesday to review the budget",
+    "Apologize to a customer for the delayed shipment",
+]
+
+
+def _wait_ready(url: str, timeout_s: float = 60) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready in {timeout_s}s")
+
+
+def _start_servers(args):
+    fake = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_openai_server",
+        "--port", str(args.fake_port), "--latency", str(args.llm_latency),
+    ])
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.fake_port}/v1",
+        "OPENAI_API_KEY": "sk-fake",
+        "LLM_CACHE": "off",
+        "INTENT_FAST_PATH": "off",
+        "API_MAX_CONCURRENCY": str(args.api_max_concurrency),
+        "API_MAX_QUEUE": str(args.api_max_queue),
+        "API_QUEUE_TIMEOUT_S": str(args.api_queue_timeout),
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "src.api.server", "--host", "127.0.0.1", "--port", str(args.api_port)],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{args.api_port}"
+    _wait_ready(f"http://127.0.0.1:{args.fake_port}/v1/models")
+    _wait_ready(f"{url}/healthz")
+    return url, [api, fake]
+
+
+async def _run_level(url: str, total: int, concurrency: int, mode: str):
+    latencies, statuses = [], Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        async def one(i: int):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(
+                        "/v1/emails", json={"prompt": PROMPTS[i % len(PROMPTS)], "mode": mode}
+                    )
+                    statuses[response.status_code] += 1
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--mode", choices=("full", "fast"), default="full")
+    parser.add_argument("--url", help="use a running API instead of starting one")
+    parser.add_argument("--api-port", type=int, default=8198)
+    parser.add_argument("--fake-port", type=int, default=8199)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake OpenAI seconds per completion")
+    parser.add_argument("--api-max-concurrency", type=int, default=64)
+    parser.add_argument("--api-max-queue", type=int, default=128)
+    parser.add_argument("--api-queue-timeout", type=float, default=10)
+    args = parser.parse_args()
+
+    processes = []
+    url = args.url
+    if not url:
+        url, processes = _start_servers(args)
+    try:
+        print(f"{'clients':>8}{'ok':>6}{'429':>6}{'other':>7}{'req/s':>9}   latency (200s)")
+        for level in args.concurrency:
+            latencies, statuses, elapsed = asyncio.run(_run_level(url, args.requests, level, args.mode))
+            ok, rejected = statuses.get(200, 0), statuses.get(429, 0)
+            other = sum(statuses.values()) - ok - rejected
+            print(f"{level:>8}{ok:>6}{rejected:>6}{other:>7}{ok / elapsed:>9.1f}   {summarize(latencies)}"
+                  f" | p99 {percentile([v * 1000 for v in latencies], 99):8.1f} ms")
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+soak_checkpointer.py
+
+Memory soak test: runs many workflow requests against the fake LLM in a
+fresh process per checkpointer setting and samples resident memory (RSS)
+as it goes. "unbounded" is the previous behaviour (an InMemorySaver that
+never forgets a thread); "memory" is the bounded saver; "none" disables
+checkpoints.
+
+    python -m benchmarks.soak_checkpointer --requests 100000
+    python -m benchmarks.soak_checkpointer --requests 20000 --checkpointers memory sqlite
+
+RSS should level off for "memory" and "none" once caches are warm, and grow
+linearly with requests for "unbounded".
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks._common import use_scratch_store
+
+CHECKPOINTERS = {
+    "unbounded": {"CHECKPOINTER": "memory", "CHECKPOINT_MAX_THREADS": str(10 ** 9), "CHECKPOINT_TTL_S": "0"},
+    "memory": {"CHECKPOINTER": "memory"},
+    "none": {"CHECKPOINTER": "none"},
+    "sqlite": {"CHECKPOINTER": "sqlite"},
+}
+PROMPTS = [
+    "Follow up with Emma about the proposal we sent last week",
+    "Thank the team for shipping the release on time",
+    "Ask Raj for a meeting next Tuesday to review the budget",
+    "Apologize to a customer for the delayed shipment",
+]
+SAMPLES = 20
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+
+        # Peak rather than current RSS (kB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+async def _soak(requests: int, concurrency: int) -> None:
+    from src.integrations.fake_llm import FakeEmailLLM
+    from src.workflow.checkpointing import checkpoint_stats
+    from src.workflow.langgraph_flow import arun_email_workflow
+
+    llm = FakeEmailLLM(latency=0)
+    every = max(1, requests // SAMPLES)
+    counter = iter(range(requests))
+    done = 0
+    start = time.perf_counter()
+
+    async def worker():
+        nonlocal done
+        for i in counter:
+            await arun_email_workflow(PROMPTS[i % len(PROMPTS)], llm=llm)
+            done += 1
+            if done % every == 0:
+                gc.collect()
+                print(json.dumps({
+                    "requests": done,
+                    "rss_mb": round(rss_mb(), 1),
+                    "elapsed_s": round(time.perf_counter() - start, 1),
+                    "checkpoints": checkpoint_stats(),
+                }), flush=True)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def _child(args) -> None:
+    scratch = use_scratch_store()
+    os.environ.setdefault("CHECKPOINT_SQLITE_PATH", str(scratch / "checkpoints.sqlite"))
+    asyncio.run(_soak(args.requests, args.concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--checkpointers", nargs="+", choices=sorted(CHECKPOINTERS),
+                        default=["unbounded", "memory", "none"])
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    print(f"{args.requests} requests per run, concurrency {args.concurrency}, fake LLM (no latency)")
+    print(f"{'checkpointer':<14}{'first MB':>10}{'last MB':>10}{'growth MB':>11}{'MB / 10k req':>14}{'req/s':>8}")
+    for name in args.checkpointers:
+        env = {**os.environ, **CHECKPOINTERS[name], "INTENT_SHADOW_RATE": "0", "TRACE_EXPORTERS": ""}
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.soak_checkpointer", "--child",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency)],
+            env=env, capture_output=True, text=True,
+        )
+        samples = [json.loads(line) for line in process.stdout.splitlines() if line.startswith("{")]
+        if process.returncode != 0 or len(samples) < 2:
+            print(f"{name:<14}failed: {process.stderr.strip().splitlines()[-1:] or process.returncode}")
+            continue
+        # Skip the first sample as warm-up (caches, imports, first allocations)
+        first, last = samples[1], samples[-1]
+        growth = last["rss_mb"] - first["rss_mb"]
+        per_10k = growth / max(1, last["requests"] - first["requests"]) * 10_000
+        rate = last["requests"] / max(last["elapsed_s"], 1e-9)
+        print(f"{name:<14}{first['rss_mb']:>10.1f}{last['rss_mb']:>10.1f}{growth:>11.1f}{per_10k:>14.2f}{rate:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
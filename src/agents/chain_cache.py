@@ -0,0 +1,45 @@
+"""
+chain_cache.py
+
+Agents build each prompt | model chain once per (agent, model instance) and
+reuse it, instead of rebuilding the template and structured-output wrapper
+on every call.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+# Distinct (agent, model) pairs kept; models come from the shared registry,
+# so this only fills up when callers pass many ad-hoc models.
+MAX_CHAINS = 128
+
+_lock = threading.Lock()
+_chains: "OrderedDict[tuple, tuple]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0}
+
+
+def cached_chain(name: str, llm, build: Callable[[Any], Any]):
+    """The chain `build(llm)` for agent `name`, built on first use for this model."""
+    key = (name, id(llm))
+    with _lock:
+        entry = _chains.get(key)
+        # The model is kept in the entry, so its id cannot be reused while cached
+        if entry is not None and entry[0] is llm:
+            _chains.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+        _stats["misses"] += 1
+
+    chain = build(llm)
+    with _lock:
+        _chains[key] = (llm, chain)
+        _chains.move_to_end(key)
+        while len(_chains) > MAX_CHAINS:
+            _chains.popitem(last=False)
+    return chain
+
+
+def chain_cache_stats() -> Dict[str, int]:
+    with _lock:
+        return {"size": len(_chains), **_stats}
@@ -0,0 +1,159 @@
+"""
+Local scoring and selection of draft candidates.
+
+DraftWriterAgent asks the model for several candidates in one call; the
+cheap checks here (length constraint, tone markers, signature, leftover
+placeholders, recipient) pick the one sent to review, with no LLM call.
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.agents.personalization_agent import DEFAULT_SENDER_NAME
+from src.observability.metrics import DRAFT_SELECTIONS
+
+# Word ranges for the InputParserAgent length constraint
+LENGTH_RANGES = {
+    "short": (20, 120),
+    "medium": (80, 250),
+    "long": (200, 600),
+}
+DEFAULT_LENGTH_RANGE = (40, 300)
+
+# Phrases that suggest (+) or contradict (-) each tone
+TONE_MARKERS = {
+    "formal": {
+        "+": ("regards", "sincerely", "i hope this message finds you well", "please", "thank you"),
+        "-": ("hey", "cheers", "gonna", "wanna", "!!", "lol"),
+    },
+    "casual": {
+        "+": ("hey", "hi ", "cheers", "thanks", "!", "let me know"),
+        "-": ("dear sir", "dear madam", "sincerely", "hereby", "pursuant"),
+    },
+    "assertive": {
+        "+": ("please confirm", "by ", "need", "must", "expect", "will"),
+        "-": ("just wanted", "maybe", "if possible", "sorry to bother", "no worries if not"),
+    },
+}
+
+PLACEHOLDER_RE = re.compile(
+    r"\[[^\]\n]{1,40}\]|\{[^}\n]{1,40}\}|<[A-Za-z][^>\n]{0,40}>|\bX{3,}\b|lorem ipsum",
+    re.I,
+)
+
+WEIGHTS = {
+    "non_empty": 3.0,
+    "length": 2.0,
+    "tone": 1.5,
+    "signature": 1.0,
+    "no_placeholders": 2.0,
+    "recipient": 0.5,
+    "subject": 0.5,
+}
+
+
+def _length_range(constraints: Dict[str, Any]) -> Tuple[int, int]:
+    length = str((constraints or {}).get("length") or "").lower().strip()
+    if length in LENGTH_RANGES:
+        return LENGTH_RANGES[length]
+    words = re.match(r"(\d+)\s*words", length)
+    if words:
+        target = int(words.group(1))
+        return int(target * 0.75), int(target * 1.25)
+    return DEFAULT_LENGTH_RANGE
+
+
+def _tone_score(text: str, tone: str) -> float:
+    markers = TONE_MARKERS.get(tone) or TONE_MARKERS["formal"]
+    hits = sum(1 for m in markers["+"] if m in text)
+    misses = sum(1 for m in markers["-"] if m in text)
+    return max(0.0, min(1.0, 0.5 + 0.25 * hits - 0.5 * misses))
+
+
+def _mentions(text: str, name: str) -> bool:
+    return bool(name) and re.search(rf"\b{re.escape(name)}\b", text) is not None
+
+
+def score_draft(draft: Dict[str, str], state: Dict[str, Any]) -> Tuple[float, Dict[str, float]]:
+    """Weighted score of one candidate and its per-check results (each 0..1)."""
+    parsed = state.get("parsed") or {}
+    subject = (draft.get("subject") or "").strip()
+    body = (draft.get("body") or "").strip()
+    lowered = body.lower()
+    words = len(body.split())
+
+    low, high = _length_range(parsed.get("constraints"))
+    if low <= words <= high:
+        length = 1.0
+    else:
+        # Linear falloff: half the range away scores 0
+        distance = (low - words) if words < low else (words - high)
+        length = max(0.0, 1.0 - distance / max(1, (high - low) / 2))
+
+    # PersonalizationAgent signs every draft with this name, whatever the profile says
+    sender = DEFAULT_SENDER_NAME.lower()
+    tail = "\n".join(body.splitlines()[-3:]).lower()
+    recipient = (parsed.get("recipient_name") or "").strip().split(" ")[0].lower()
+
+    checks = {
+        "non_empty": 1.0 if subject and words >= 5 else 0.0,
+        "length": length,
+        "tone": _tone_score(lowered, state.get("tone") or "formal"),
+        "signature": 1.0 if _mentions(tail, sender) else 0.0,
+        "no_placeholders": 0.0 if PLACEHOLDER_RE.search(subject + "\n" + body) else 1.0,
+        "recipient": 1.0 if not recipient or _mentions(lowered, recipient) else 0.0,
+        "subject": 1.0 if 0 < len(subject) <= 80 and "\n" not in subject else 0.0,
+    }
+    return sum(WEIGHTS[k] * v for k, v in checks.items()), checks
+
+
+def select_best(
+    candidates: List[Dict[str, str]], state: Dict[str, Any], eligible: Optional[List[int]] = None
+) -> Tuple[int, Dict[str, Any]]:
+    """
+    Index of the best candidate among `eligible` (default: all; first wins
+    ties) and a summary for traces.
+    """
+    scored = [score_draft(c, state) for c in candidates]
+    pool = eligible or list(range(len(scored)))
+    best = max(pool, key=lambda i: (scored[i][0], -i)) if scored else 0
+    summary = {
+        "candidates": len(candidates),
+        "chosen": best,
+        "scores": [round(s, 2) for s, _ in scored],
+        "chosen_checks": scored[best][1] if scored else {},
+    }
+    record_selection(summary)
+    return best, summary
+
+
+# ===========================
+# Stats
+# ===========================
+_stats = {"selections": 0, "candidates": 0, "picked_other_than_first": 0, "score_gain": 0.0}
+_stats_lock = threading.Lock()
+
+
+def record_selection(summary: Dict[str, Any]) -> None:
+    scores = summary["scores"]
+    changed = summary["chosen"] != 0
+    with _stats_lock:
+        _stats["selections"] += 1
+        _stats["candidates"] += summary["candidates"]
+        _stats["picked_other_than_first"] += int(changed)
+        if scores:
+            _stats["score_gain"] += scores[summary["chosen"]] - scores[0]
+    DRAFT_SELECTIONS.inc(pick="other" if changed else "first")
+
+
+def selection_stats() -> Dict[str, Optional[float]]:
+    """How often local selection changed the pick, and the mean score gain over the first candidate."""
+    with _stats_lock:
+        selections = _stats["selections"]
+        return {
+            "selections": selections,
+            "mean_candidates": round(_stats["candidates"] / selections, 2) if selections else None,
+            "picked_other_than_first": _stats["picked_other_than_first"],
+            "mean_score_gain": round(_stats["score_gain"] / selections, 3) if selections else None,
+        }
@@ -1,22 +1,44 @@
-import json
-from typing import Dict, Any
+import functools
+import os
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langsmith import traceable
 
+from src.agents.chain_cache import cached_chain
+from src.agents.draft_selection import select_best
+from src.agents.personalization_agent import DEFAULT_SENDER_NAME
+from src.agents.schemas import EmailDraft
+from src.agents.structured_output import (
+    IncrementalJSONParser,
+    parse_json_tolerant,
+    parsed_dict,
+    record_parse,
+    structured_chain,
+)
+from src.agents.tone_stylist_agent import tone_instructions
+from src.workflow.budget import usage_from_message
 
-DEFAULT_SENDER_NAME = "SP"
+
+# Candidates requested per rewrite (n-best); 1 disables local selection.
+# First drafts ask for one: most pass review, and every extra choice is paid
+# for in output tokens. Streaming, and models without generate() (plain
+# Runnables), always draft a single candidate: n separate requests would cost
+# n times as much.
+DRAFT_CANDIDATES = int(os.environ.get("DRAFT_CANDIDATES", 3))
+
+JSON_MODE = {"type": "json_object"}
 
 
 class DraftWriterAgent:
     @staticmethod
-    @traceable(run_type="llm")
-    def run(state: Dict[str, Any], llm, max_output_tokens: int = 512) -> Dict[str, Any]:
-        parsed = state.get("parsed", {})
-        user_profile = state.get("user_profile", {})
+    @functools.lru_cache(maxsize=1)
+    def _prompt():
+        # Static instructions in the system message, per-request fields
+        # (including the one tone guide this request needs) in the user message
         system = (
             "You are an expert email writer. Given the user's intent, tone instructions, and recipient details, "
-            "produce a concise, well-structured email draft. Output JSON with keys: subject, body."
+            "produce a concise, well-structured email draft. Output JSON with keys: subject, body.\n"
+            "Return a JSON object exactly with fields: subject, body. Always ensure sender name is 'SP'."
         )
         template = (
             "User Prompt: {prompt}\n\n"
@@ -24,29 +46,171 @@ class DraftWriterAgent:
             "Tone Instructions: {tone_instructions}\n"
             "Sender Profile: name: {sender_name}, company: {profile_company}\n"
             "Recipient: {recipient}\n"
-            "Constraints: {constraints}\n\n"
-            "Return a JSON object exactly with fields: subject, body. Always ensure sender name is 'SP'."
+            "Constraints: {constraints}"
+            "{revision_notes}"
         )
-        chat_prompt = ChatPromptTemplate.from_messages([
+        return ChatPromptTemplate.from_messages([
             ("system", system),
             ("user", template)
         ])
-        chain = chat_prompt | llm | StrOutputParser()
-        payload = {
+
+    @staticmethod
+    def _chain(llm):
+        return cached_chain(
+            "draft_writer", llm, lambda model: structured_chain(DraftWriterAgent._prompt(), model, EmailDraft)
+        )
+
+    @staticmethod
+    def _stream_chain(llm):
+        # Streaming needs raw text; JSON mode keeps it a bare object
+        return cached_chain(
+            "draft_writer.stream",
+            llm,
+            lambda model: DraftWriterAgent._prompt()
+            | model.bind(response_format=JSON_MODE, stream_usage=True),
+        )
+
+    @staticmethod
+    def _revision_notes(state: Dict[str, Any]) -> str:
+        """On a rewrite, show the model its previous draft and the reviewer's issues."""
+        if state.get("route") != "rewrite":
+            return ""
+        previous = state.get("personalized_draft") or state.get("draft") or {}
+        issues = state.get("issues") or (state.get("review") or {}).get("issues") or []
+        if not issues:
+            return ""
+        issue_lines = "\n".join(f"- {issue}" for issue in issues)
+        return (
+            "\n\nThis is a revision. Previous draft:\n"
+            f"Subject: {previous.get('subject', '')}\n{previous.get('body', '')}\n\n"
+            f"Reviewer issues to fix:\n{issue_lines}"
+        )
+
+    @staticmethod
+    def _payload(state: Dict[str, Any]) -> Dict[str, Any]:
+        parsed = state.get("parsed", {})
+        user_profile = state.get("user_profile", {})
+        return {
             "prompt": parsed.get("prompt_text", ""),
             "intent": state.get("intent", "other"),
-            "tone_instructions": state.get("tone_instructions", ""),
+            "tone_instructions": state.get("tone_instructions") or tone_instructions(state.get("tone", "formal")),
             "sender_name": user_profile.get("name") or DEFAULT_SENDER_NAME,
             "profile_company": user_profile.get("company", ""),
             "recipient": parsed.get("recipient_name", ""),
-            "constraints": str(parsed.get("constraints", {}))
+            "constraints": str(parsed.get("constraints", {})),
+            "revision_notes": DraftWriterAgent._revision_notes(state),
+        }
+
+    @staticmethod
+    def _draft(state: Dict[str, Any], fields, raw_text: str, message=None) -> Dict[str, Any]:
+        parsed = state.get("parsed", {})
+        if fields:
+            subject = fields.get("subject", "") or ""
+            body = fields.get("body", "") or ""
+        else:
+            subject = (parsed.get("prompt_text", "")[:60] + "...") if parsed.get("prompt_text") else "New Email"
+            body = raw_text
+        return {
+            "draft": {"subject": subject.strip(), "body": body.strip()},
+            "usage": usage_from_message(message),
         }
-        raw = chain.invoke(payload)
+
+    @staticmethod
+    def _result(state: Dict[str, Any], output: Dict[str, Any]) -> Dict[str, Any]:
+        fields = parsed_dict("draft_writer", output)
+        raw = output.get("raw")
+        return DraftWriterAgent._draft(state, fields, getattr(raw, "content", "") or "", raw)
+
+    @staticmethod
+    def _fields(raw: str) -> Optional[Dict[str, Any]]:
         try:
-            parsed_json = json.loads(raw)
-            subject = parsed_json.get("subject", "")
-            body = parsed_json.get("body", "")
+            fields = EmailDraft.model_validate(parse_json_tolerant(raw)).model_dump()
+            record_parse("draft_writer", True)
+            return fields
         except Exception:
-            subject = (parsed.get("prompt_text", "")[:60] + "...") if parsed.get("prompt_text") else "New Email"
-            body = raw
-        return {"draft": {"subject": subject.strip(), "body": body.strip()}}
+            record_parse("draft_writer", False)
+            return None
+
+    @staticmethod
+    def _candidate_messages(state: Dict[str, Any]):
+        return DraftWriterAgent._prompt().format_messages(**DraftWriterAgent._payload(state))
+
+    @staticmethod
+    def _select(state: Dict[str, Any], messages: List[Any]) -> Dict[str, Any]:
+        """
+        Parse every candidate, keep the best by local score. All candidates
+        came from one call (`n`), whose usage each one repeats.
+        """
+        drafts, parsed_ok = [], []
+        for message in messages:
+            raw = str(getattr(message, "content", "") or "")
+            fields = DraftWriterAgent._fields(raw)
+            drafts.append(DraftWriterAgent._draft(state, fields, raw)["draft"])
+            parsed_ok.append(fields is not None)
+
+        # Unparseable candidates only win when nothing parsed
+        best, summary = select_best(drafts, state, eligible=[i for i, ok in enumerate(parsed_ok) if ok])
+        summary["unparsed"] = parsed_ok.count(False)
+        return {"draft": drafts[best], "usage": usage_from_message(messages[0]), "selection": summary}
+
+    @staticmethod
+    def rewrite_candidates(llm) -> int:
+        """Choices a rewrite asks for with this model; the budget reserves a call for each."""
+        return max(1, DRAFT_CANDIDATES) if hasattr(llm, "generate") else 1
+
+    @staticmethod
+    def _candidates(state: Dict[str, Any], llm, n: Optional[int]) -> int:
+        if n is not None:
+            return n
+        return DraftWriterAgent.rewrite_candidates(llm) if state.get("retry_count", 0) else 1
+
+    @staticmethod
+    @traceable(run_type="llm")
+    def run(state: Dict[str, Any], llm, max_output_tokens: int = 512, n: Optional[int] = None) -> Dict[str, Any]:
+        n = DraftWriterAgent._candidates(state, llm, n)
+        if n <= 1 or not hasattr(llm, "generate"):
+            output = DraftWriterAgent._chain(llm).invoke(DraftWriterAgent._payload(state))
+            return DraftWriterAgent._result(state, output)
+
+        # One request, n choices. The response cache keys on n too, so a hit
+        # replays the same n candidates rather than n copies of one.
+        messages = DraftWriterAgent._candidate_messages(state)
+        result = llm.generate([messages], n=n, response_format=JSON_MODE)
+        return DraftWriterAgent._select(state, [g.message for g in result.generations[0]])
+
+    @staticmethod
+    @traceable(run_type="llm")
+    async def arun(state: Dict[str, Any], llm, max_output_tokens: int = 512, n: Optional[int] = None) -> Dict[str, Any]:
+        n = DraftWriterAgent._candidates(state, llm, n)
+        if n <= 1 or not hasattr(llm, "agenerate"):
+            output = await DraftWriterAgent._chain(llm).ainvoke(DraftWriterAgent._payload(state))
+            return DraftWriterAgent._result(state, output)
+
+        messages = DraftWriterAgent._candidate_messages(state)
+        result = await llm.agenerate([messages], n=n, response_format=JSON_MODE)
+        return DraftWriterAgent._select(state, [g.message for g in result.generations[0]])
+
+    @staticmethod
+    def stream(state: Dict[str, Any], llm) -> Iterator[Any]:
+        """
+        Yield message chunks as they arrive (text in `.content`).
+        Add them up and pass the result to finish().
+        """
+        yield from DraftWriterAgent._stream_chain(llm).stream(DraftWriterAgent._payload(state))
+
+    @staticmethod
+    async def astream(state: Dict[str, Any], llm) -> AsyncIterator[Any]:
+        async for chunk in DraftWriterAgent._stream_chain(llm).astream(DraftWriterAgent._payload(state)):
+            yield chunk
+
+    @staticmethod
+    def finish(state: Dict[str, Any], message) -> Dict[str, Any]:
+        raw = str(getattr(message, "content", "") or "")
+        return DraftWriterAgent._draft(state, DraftWriterAgent._fields(raw), raw, message)
+
+    @staticmethod
+    def partial(raw: str) -> Dict[str, str]:
+        """Best-effort subject/body from an incomplete JSON completion, for live display."""
+        parser = IncrementalJSONParser()
+        value = parser.feed(raw)
+        return {"subject": value.get("subject") or "", "body": value.get("body") or ""}
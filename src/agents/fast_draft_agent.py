@@ -0,0 +1,152 @@
+import functools
+from typing import Dict, Any, AsyncIterator, Iterator
+from langchain_core.prompts import ChatPromptTemplate
+from langsmith import traceable
+
+from src.agents.chain_cache import cached_chain
+from src.agents.draft_writer_agent import DEFAULT_SENDER_NAME
+from src.agents.intent_detection_agent import INTENT_LABELS
+from src.agents.schemas import FastEmailResult
+from src.agents.structured_output import (
+    parse_json_tolerant,
+    parsed_dict,
+    record_parse,
+    structured_chain,
+)
+from src.agents.tone_stylist_agent import tone_instructions
+from src.workflow.budget import usage_from_message
+
+
+class FastDraftAgent:
+    """
+    Fast mode: intent detection, drafting and a self-review in one LLM call.
+    Replaces IntentDetectionAgent, DraftWriterAgent and ReviewAgent; the
+    local parser, tone and personalization steps run as usual.
+    """
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _prompt():
+        # Static instructions in the system message, request fields (and tone guide) last
+        system = (
+            "You are an email assistant that works in a single pass: classify the user's intent, write the email, "
+            "then check your own draft.\n"
+            "intent: one of outreach, follow-up, apology, internal_update, ask_for_meeting, introduction, "
+            "promotion, other.\n"
+            "subject, body: a concise, well-structured email following the tone instructions.\n"
+            "self_check_ok, issues: whether the draft matches the request and tone; list any problems.\n"
+            "Return a JSON object exactly with fields: intent, subject, body, self_check_ok, issues. "
+            "Always ensure sender name is 'SP'."
+        )
+        template = (
+            "User Prompt: {prompt}\n\n"
+            "Tone Instructions: {tone_instructions}\n"
+            "Sender Profile: name: {sender_name}, company: {profile_company}\n"
+            "Recipient: {recipient}\n"
+            "Constraints: {constraints}"
+        )
+        return ChatPromptTemplate.from_messages([
+            ("system", system),
+            ("user", template)
+        ])
+
+    @staticmethod
+    def _chain(llm):
+        return cached_chain(
+            "fast_draft", llm, lambda model: structured_chain(FastDraftAgent._prompt(), model, FastEmailResult)
+        )
+
+    @staticmethod
+    def _stream_chain(llm):
+        return cached_chain(
+            "fast_draft.stream",
+            llm,
+            lambda model: FastDraftAgent._prompt()
+            | model.bind(response_format={"type": "json_object"}, stream_usage=True),
+        )
+
+    @staticmethod
+    def _payload(state: Dict[str, Any]) -> Dict[str, Any]:
+        parsed = state.get("parsed", {})
+        user_profile = state.get("user_profile", {})
+        return {
+            "prompt": parsed.get("prompt_text", ""),
+            "tone_instructions": state.get("tone_instructions") or tone_instructions(state.get("tone", "formal")),
+            "sender_name": user_profile.get("name") or DEFAULT_SENDER_NAME,
+            "profile_company": user_profile.get("company", ""),
+            "recipient": parsed.get("recipient_name", ""),
+            "constraints": str(parsed.get("constraints", {})),
+        }
+
+    @staticmethod
+    def _state_update(state: Dict[str, Any], fields, raw_text: str, message) -> Dict[str, Any]:
+        if not fields:
+            # Unreadable output: keep the text as the body, like DraftWriterAgent
+            prompt_text = state.get("parsed", {}).get("prompt_text", "")
+            fields = {
+                "intent": "other",
+                "subject": (prompt_text[:60] + "...") if prompt_text else "New Email",
+                "body": raw_text,
+                # Not checked, so not approved
+                "self_check_ok": False,
+                "issues": ["The model output could not be read as JSON."],
+                "parse_failed": True,
+            }
+        intent = str(fields.get("intent", "")).strip().lower()
+        review = {
+            "ok": bool(fields.get("self_check_ok", True)),
+            "issues": list(fields.get("issues") or []),
+            "suggested_edits": "",
+            "self_check": True,
+        }
+        if fields.get("parse_failed"):
+            review["parse_failed"] = True
+        return {
+            "intent": intent if intent in INTENT_LABELS else "other",
+            "intent_source": "llm",
+            "draft": {
+                "subject": (fields.get("subject") or "").strip(),
+                "body": (fields.get("body") or "").strip(),
+            },
+            "review": review,
+            "usage": usage_from_message(message),
+        }
+
+    @staticmethod
+    def _result(state: Dict[str, Any], output: Dict[str, Any]) -> Dict[str, Any]:
+        fields = parsed_dict("fast_draft", output)
+        raw = output.get("raw")
+        return FastDraftAgent._state_update(state, fields, getattr(raw, "content", "") or "", raw)
+
+    @staticmethod
+    @traceable(run_type="llm")
+    def run(state: Dict[str, Any], llm) -> Dict[str, Any]:
+        output = FastDraftAgent._chain(llm).invoke(FastDraftAgent._payload(state))
+        return FastDraftAgent._result(state, output)
+
+    @staticmethod
+    @traceable(run_type="llm")
+    async def arun(state: Dict[str, Any], llm) -> Dict[str, Any]:
+        output = await FastDraftAgent._chain(llm).ainvoke(FastDraftAgent._payload(state))
+        return FastDraftAgent._result(state, output)
+
+    @staticmethod
+    def stream(state: Dict[str, Any], llm) -> Iterator[Any]:
+        """Message chunks as they arrive; same contract as DraftWriterAgent.stream()."""
+        yield from FastDraftAgent._stream_chain(llm).stream(FastDraftAgent._payload(state))
+
+    @staticmethod
+    async def astream(state: Dict[str, Any], llm) -> AsyncIterator[Any]:
+        async for chunk in FastDraftAgent._stream_chain(llm).astream(FastDraftAgent._payload(state)):
+            yield chunk
+
+    @staticmethod
+    def finish(state: Dict[str, Any], message) -> Dict[str, Any]:
+        raw = str(getattr(message, "content", "") or "")
+        try:
+            fields = FastEmailResult.model_validate(parse_json_tolerant(raw)).model_dump()
+            record_parse("fast_draft", True)
+        except Exception:
+            fields = None
+            record_parse("fast_draft", False)
+        return FastDraftAgent._state_update(state, fields, raw, message)
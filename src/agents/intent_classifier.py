@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+intent_classifier.py
+
+Local intent classifier that runs in front of the LLM intent agent.
+
+Two stages, cheapest first:
+1. Rules: regexes for prompts that name their intent outright
+   ("follow up on", "apologize for", "schedule a meeting").
+   A rule answers only when exactly one label matches, with that rule's
+   confidence; broad rules sit below INTENT_FAST_THRESHOLD and defer.
+2. Model: hashed word / character n-grams with a softmax linear model in
+   NumPy, trained from intents the LLM produced (the store's intent_log).
+   It answers only above INTENT_FAST_THRESHOLD.
+
+Anything else goes to the LLM. A sample of fast answers (INTENT_SHADOW_RATE)
+is re-checked by the LLM in the background to measure agreement. Those
+checks run after the request has returned, so they are not in its `usage`
+or RequestBudget; metrics count them under node="intent_shadow".
+
+    python -m src.agents.intent_classifier train    # fit on logged LLM labels
+    python -m src.agents.intent_classifier report   # fast-path share and agreement
+"""
+
+import argparse
+import functools
+import logging
+import os
+import random
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.observability.metrics import INTENT_DECISIONS
+
+logger = logging.getLogger(__name__)
+
+# NumPy is imported when the model is trained or loaded; the rules need nothing.
+
+FAST_PATH_ENABLED = os.environ.get("INTENT_FAST_PATH", "1").lower() not in ("0", "false", "off")
+FAST_THRESHOLD = float(os.environ.get("INTENT_FAST_THRESHOLD", 0.9))
+SHADOW_RATE = float(os.environ.get("INTENT_SHADOW_RATE", 0.05))
+MODEL_PATH = Path(os.environ.get(
+    "INTENT_MODEL_PATH", Path(__file__).resolve().parent.parent / "memory" / "intent_model.npz"
+))
+
+# Hashed feature space; 8 labels x 2**16 float32 weights is ~2 MB
+N_FEATURES = 2 ** 16
+
+# Labels the model was not trained on enough to trust
+MIN_EXAMPLES_PER_LABEL = 5
+
+
+# =============================
+# Rules
+# =============================
+# (label, pattern, confidence). Broad patterns get a confidence below
+# FAST_THRESHOLD: they still make a prompt ambiguous when another label
+# matches, but leave the answer to the model or the LLM.
+RULES = [
+    ("follow-up", r"\bfollow(?:ing|ed)?[\s-]?up\b|\bchecking in\b|\bgentle reminder\b", 1.0),
+    ("follow-up", r"\bremind(?:er)?\b", 0.8),
+    ("apology", r"\bapologi[sz](?:e|ing|ed)\b|\bapology\b", 1.0),
+    ("apology", r"\bsorry\b", 0.8),
+    ("ask_for_meeting", r"\b(?:schedule|set up|book|arrange|request(?:ing)?)\b.{0,40}\bmeeting\b"
+                        r"|\bmeeting (?:request|invite)\b", 1.0),
+    ("ask_for_meeting", r"\b(?:schedule|set up|book|arrange|request(?:ing)?)\b.{0,40}\b(?:call|sync|chat)\b", 0.7),
+    ("introduction", r"\bintroduc(?:e|ing|tion)\b", 1.0),
+    ("promotion", r"\bpromotional\b|\bdiscount\b|\b\d+% off\b|\blimited[\s-]time offer\b|\bproduct launch\b", 1.0),
+    ("internal_update", r"\b(?:status|project|weekly|monthly|team|quarterly) update\b|\bupdate (?:the|my) team\b", 1.0),
+    ("outreach", r"\bcold (?:email|outreach)\b|\bprospect(?:ing)?\b", 1.0),
+]
+
+_COMPILED_RULES = [
+    (label, re.compile(pattern, re.IGNORECASE), confidence) for label, pattern, confidence in RULES
+]
+
+
+def rule_match(text: str) -> Optional[Tuple[str, float]]:
+    """(label, confidence) when exactly one label's rules match, else None."""
+    matched: Dict[str, float] = {}
+    for label, pattern, confidence in _COMPILED_RULES:
+        if pattern.search(text):
+            matched[label] = max(confidence, matched.get(label, 0.0))
+    return next(iter(matched.items())) if len(matched) == 1 else None
+
+
+def rule_label(text: str) -> Optional[str]:
+    """The one label whose rules match, or None when none (or several) do."""
+    match = rule_match(text)
+    return match[0] if match else None
+
+
+# =============================
+# Hashed n-gram linear model
+# =============================
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def _hash(feature: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+
+
+def features(text: str) -> List[int]:
+    """Hashed word unigrams, word bigrams and in-word character trigrams."""
+    words = _TOKEN.findall(text.lower())
+    feats = [f"w:{w}" for w in words]
+    feats += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"^{w}$"
+        feats += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return [_hash(f) for f in feats]
+
+
+class HashedNgramModel:
+    """Multinomial logistic regression over hashed n-gram counts."""
+
+    def __init__(self, labels: Sequence[str], weights=None, bias=None):
+        import numpy as np
+
+        self.labels = list(labels)
+        n = len(self.labels)
+        self.weights = weights if weights is not None else np.zeros((n, N_FEATURES), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(n, dtype=np.float32)
+
+    def _probs(self, idx):
+        import numpy as np
+
+        logits = self.weights[:, idx].sum(axis=1) + self.bias
+        logits -= logits.max()
+        exp = np.exp(logits)
+        return exp / exp.sum()
+
+    def predict(self, text: str):
+        """(label, probability) of the most likely label."""
+        import numpy as np
+
+        probs = self._probs(np.asarray(features(text), dtype=np.int64))
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], labels: Sequence[str], epochs: int = 8, lr: float = 0.5,
+            l2: float = 1e-5, seed: int = 0) -> "HashedNgramModel":
+        import numpy as np
+
+        model = cls(sorted(set(labels)))
+        index = {label: i for i, label in enumerate(model.labels)}
+        samples = [
+            (np.asarray(features(t), dtype=np.int64), index[y]) for t, y in zip(texts, labels)
+        ]
+        rng = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            step = lr / (1 + epoch)
+            for i in rng.permutation(len(samples)):
+                idx, target = samples[i]
+                if not len(idx):
+                    continue
+                grad = model._probs(idx)
+                grad[target] -= 1.0
+                # Repeated n-grams in one prompt must each contribute
+                cols, counts = np.unique(idx, return_counts=True)
+                model.weights[:, cols] *= (1 - step * l2)
+                model.weights[:, cols] -= step * np.outer(grad, counts).astype(np.float32)
+                model.bias -= step * grad.astype(np.float32)
+        return model
+
+    def save(self, path: Path) -> None:
+        import numpy as np
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, labels=np.array(self.labels), weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path: Path) -> "HashedNgramModel":
+        import numpy as np
+
+        data = np.load(path)
+        return cls([str(label) for label in data["labels"]], data["weights"], data["bias"])
+
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> Optional[HashedNgramModel]:
+    """The trained model at MODEL_PATH, or None if there is none (rules only)."""
+    if not MODEL_PATH.exists():
+        return None
+    try:
+        return HashedNgramModel.load(MODEL_PATH)
+    except Exception as e:
+        logger.warning("Intent model not loaded (%s: %s); using rules only", type(e).__name__, e)
+        return None
+
+
+# =============================
+# Fast path
+# =============================
+class FastIntent(NamedTuple):
+    label: str
+    confidence: float
+    source: str  # "rules" or "model"
+
+
+_stats_lock = threading.Lock()
+_stats = {"total": 0, "rules": 0, "model": 0, "llm": 0, "shadow_checked": 0, "shadow_agree": 0}
+
+
+def _count(key: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += n
+
+
+def classify_fast(text: str) -> Optional[FastIntent]:
+    """Confident local answer for `text`, or None to defer to the LLM."""
+    if not FAST_PATH_ENABLED or not text.strip():
+        return None
+    match = rule_match(text)
+    if match is not None and match[1] >= FAST_THRESHOLD:
+        return FastIntent(match[0], match[1], "rules")
+    model = get_model()
+    if model is not None:
+        label, confidence = model.predict(text)
+        if confidence >= FAST_THRESHOLD:
+            return FastIntent(label, confidence, "model")
+    return None
+
+
+def record_decision(source: str) -> None:
+    """Count one classified request by where its answer came from."""
+    _count("total")
+    _count(source)
+    INTENT_DECISIONS.inc(source=source)
+
+
+def intent_stats() -> Dict[str, Any]:
+    """In-process fast-path share and shadow agreement with the LLM."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["total"]
+    fast = stats["rules"] + stats["model"]
+    stats["fast_path_share"] = round(fast / total, 4) if total else None
+    checked = stats["shadow_checked"]
+    stats["shadow_agreement"] = round(stats["shadow_agree"] / checked, 4) if checked else None
+    return stats
+
+
+# =============================
+# Logging and shadow checks (off the request path)
+# =============================
+_background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="intent-log")
+
+
+def _log(prompt: str, label: str, source: str, llm_label: Optional[str]) -> None:
+    from src.memory.store import log_intent
+
+    try:
+        log_intent(prompt, label, source, llm_label)
+    except Exception as e:
+        logger.warning("Intent log write failed: %s: %s", type(e).__name__, e)
+
+
+def log_llm_decision(prompt: str, label: str) -> None:
+    """Log an LLM answer; these rows are the model's training data."""
+    _background.submit(_log, prompt, label, "llm", label)
+
+
+def log_fast_decision(prompt: str, fast: FastIntent, shadow_fn=None) -> None:
+    """
+    Log a fast-path answer. With probability SHADOW_RATE (and a `shadow_fn`
+    returning the LLM's label) the LLM is asked too, in the background.
+    """
+    if shadow_fn is None or random.random() >= SHADOW_RATE:
+        _background.submit(_log, prompt, fast.label, fast.source, None)
+        return
+
+    def shadow():
+        try:
+            llm_label = shadow_fn()
+        except Exception as e:
+            logger.warning("Intent shadow check failed: %s: %s", type(e).__name__, e)
+            llm_label = None
+        if llm_label is not None:
+            _count("shadow_checked")
+            if llm_label == fast.label:
+                _count("shadow_agree")
+        _log(prompt, fast.label, fast.source, llm_label)
+
+    _background.submit(shadow)
+
+
+# =============================
+# CLI: train / report
+# =============================
+def _labelled_rows(limit: int) -> List[Dict[str, Any]]:
+    from src.memory.store import get_intent_log
+
+    return [r for r in get_intent_log(limit=limit) if r.get("llm_label")]
+
+
+def train(limit: int = 50000, holdout: float = 0.2, seed: int = 0) -> Dict[str, Any]:
+    """Fit on LLM-labelled prompts, report held-out agreement, save to MODEL_PATH."""
+    rows = _labelled_rows(limit)
+    counts: Dict[str, int] = {}
+    for r in rows:
+        counts[r["llm_label"]] = counts.get(r["llm_label"], 0) + 1
+    rows = [r for r in rows if counts[r["llm_label"]] >= MIN_EXAMPLES_PER_LABEL]
+    if len({r["llm_label"] for r in rows}) < 2:
+        raise SystemExit(f"Not enough labelled prompts to train ({len(rows)} usable rows).")
+
+    # The log is newest first; shuffle (reproducibly) so the holdout is not just the oldest rows
+    random.Random(seed).shuffle(rows)
+    split = int(len(rows) * (1 - holdout))
+    train_rows, test_rows = rows[:split], rows[split:]
+    model = HashedNgramModel.fit([r["prompt"] for r in train_rows], [r["llm_label"] for r in train_rows])
+
+    confident = agree = 0
+    for r in test_rows:
+        label, confidence = model.predict(r["prompt"])
+        if confidence >= FAST_THRESHOLD:
+            confident += 1
+            agree += label == r["llm_label"]
+
+    model.save(MODEL_PATH)
+    get_model.cache_clear()
+    return {
+        "train": len(train_rows),
+        "holdout": len(test_rows),
+        "holdout_fast_share": round(confident / len(test_rows), 4) if test_rows else None,
+        "holdout_agreement": round(agree / confident, 4) if confident else None,
+        "labels": counts,
+        "model_path": str(MODEL_PATH),
+    }
+
+
+def report(limit: int = 50000) -> Dict[str, Any]:
+    """Fast-path share and LLM agreement over the logged requests."""
+    from src.memory.store import get_intent_log
+
+    rows = get_intent_log(limit=limit)
+    by_source: Dict[str, int] = {}
+    for r in rows:
+        by_source[r["source"]] = by_source.get(r["source"], 0) + 1
+    fast = [r for r in rows if r["source"] != "llm"]
+    checked = [r for r in fast if r.get("llm_label")]
+    agree = sum(r["label"] == r["llm_label"] for r in checked)
+    return {
+        "requests": len(rows),
+        "by_source": by_source,
+        "fast_path_share": round(len(fast) / len(rows), 4) if rows else None,
+        "shadow_checked": len(checked),
+        "shadow_agreement": round(agree / len(checked), 4) if checked else None,
+    }
+
+
+def main(argv=None):
+    import json
+
+    parser = argparse.ArgumentParser(description="Local intent classifier: train or report.")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--limit", type=int, default=50000, help="most recent log rows to use")
+    args = parser.parse_args(argv)
+
+    result = train(args.limit) if args.command == "train" else report(args.limit)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,93 @@
 
+import functools
 from typing import Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langsmith import traceable
 
+from src.agents.chain_cache import cached_chain
+from src.agents.intent_classifier import (
+    classify_fast,
+    log_fast_decision,
+    log_llm_decision,
+    record_decision,
+)
+from src.observability.metrics import record_llm_usage
+from src.workflow.budget import usage_from_message
+
+
+INTENT_LABELS = {
+    "outreach", "follow-up", "apology", "internal_update", "ask_for_meeting", "introduction", "promotion", "other"
+}
+
 
 class IntentDetectionAgent:
     @staticmethod
-    @traceable(run_type="llm")
-    def run(state: Dict[str, Any], llm) -> Dict[str, Any]:
-        prompt = state.get("parsed", {}).get("prompt_text", "")
+    @functools.lru_cache(maxsize=1)
+    def _prompt():
         system = (
             "You are an email intent classifier. Classify the user's intent into one of: "
             "outreach, follow-up, apology, internal_update, ask_for_meeting, introduction, promotion, other. "
             "Respond with only the single label."
         )
-        chat_prompt = ChatPromptTemplate.from_messages([
+        return ChatPromptTemplate.from_messages([
             ("system", system),
             ("user", "{text}")
         ])
-        decision = (chat_prompt | llm | StrOutputParser()).invoke({"text": prompt}).strip().lower()
-        if decision not in {
-            "outreach", "follow-up", "apology", "internal_update", "ask_for_meeting", "introduction", "promotion", "other"
-        }:
-            decision = "other"
-        return {"intent": decision}
+
+    @staticmethod
+    def _chain(llm):
+        return cached_chain("intent_detection", llm, lambda model: IntentDetectionAgent._prompt() | model)
+
+    @staticmethod
+    def _label(message) -> str:
+        decision = str(message.content).strip().lower()
+        return decision if decision in INTENT_LABELS else "other"
+
+    @staticmethod
+    def _result(prompt: str, message) -> Dict[str, Any]:
+        decision = IntentDetectionAgent._label(message)
+        record_decision("llm")
+        log_llm_decision(prompt, decision)
+        return {"intent": decision, "intent_source": "llm", "usage": usage_from_message(message)}
+
+    @staticmethod
+    def _shadow_label(prompt: str, llm) -> str:
+        # Runs after the request returned, so it is outside the request's usage
+        # and budget; metrics still count its calls and tokens
+        message = IntentDetectionAgent._chain(llm).invoke({"text": prompt})
+        record_llm_usage("intent_shadow", usage_from_message(message))
+        return IntentDetectionAgent._label(message)
+
+    @staticmethod
+    def _fast(prompt: str, llm):
+        """Local answer when the classifier is confident; sampled ones get an LLM shadow check."""
+        fast = classify_fast(prompt)
+        if fast is None:
+            return None
+        record_decision(fast.source)
+        log_fast_decision(
+            prompt,
+            fast,
+            shadow_fn=lambda: IntentDetectionAgent._shadow_label(prompt, llm),
+        )
+        return {"intent": fast.label, "intent_source": fast.source}
+
+    @staticmethod
+    @traceable(run_type="llm")
+    def run(state: Dict[str, Any], llm) -> Dict[str, Any]:
+        prompt = state.get("parsed", {}).get("prompt_text", "")
+        fast = IntentDetectionAgent._fast(prompt, llm)
+        if fast is not None:
+            return fast
+        message = IntentDetectionAgent._chain(llm).invoke({"text": prompt})
+        return IntentDetectionAgent._result(prompt, message)
+
+    @staticmethod
+    @traceable(run_type="llm")
+    async def arun(state: Dict[str, Any], llm) -> Dict[str, Any]:
+        prompt = state.get("parsed", {}).get("prompt_text", "")
+        fast = IntentDetectionAgent._fast(prompt, llm)
+        if fast is not None:
+            return fast
+        message = await IntentDetectionAgent._chain(llm).ainvoke({"text": prompt})
+        return IntentDetectionAgent._result(prompt, message)
@@ -1,33 +1,65 @@
-import json
+import functools
 from typing import Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langsmith import traceable
 
+from src.agents.chain_cache import cached_chain
+from src.agents.schemas import ReviewResult
+from src.agents.structured_output import parsed_dict, structured_chain
+from src.workflow.budget import usage_from_message
+
+UNREADABLE_REVIEW_ISSUE = "The review could not be read; re-check grammar, clarity and tone."
 
 
 class ReviewAgent:
     @staticmethod
-    @traceable(run_type="llm")
-    def run(state: Dict[str, Any], llm) -> Dict[str, Any]:
-        draft = state.get("personalized_draft", {})
-        tone = state.get("tone", "formal")
+    @functools.lru_cache(maxsize=1)
+    def _prompt():
         system = (
             "You are an email reviewer. Check the email for grammar, clarity, and adherence to the requested tone. "
             "Return JSON with fields: ok (true/false), issues (list of strings), suggested_edits (full-body suggestion)."
         )
         template = "Tone: {tone}\n\nEmail Subject: {subject}\n\nEmail Body:\n{body}\n\nReturn the JSON."
-        chain = ChatPromptTemplate.from_messages([
+        return ChatPromptTemplate.from_messages([
             ("system", system),
             ("user", template)
-        ]) | llm | StrOutputParser()
-        raw = chain.invoke({
-            "tone": tone,
+        ])
+
+    @staticmethod
+    def _chain(llm):
+        return cached_chain("review", llm, lambda model: structured_chain(ReviewAgent._prompt(), model, ReviewResult))
+
+    @staticmethod
+    def _payload(state: Dict[str, Any]) -> Dict[str, Any]:
+        draft = state.get("personalized_draft", {})
+        return {
+            "tone": state.get("tone", "formal"),
             "subject": draft.get("subject", ""),
             "body": draft.get("body", "")
-        })
-        try:
-            parsed = json.loads(raw)
-        except Exception:
-            parsed = {"ok": True, "issues": [], "suggested_edits": draft.get("body", "")}
-        return {"review": parsed}
+        }
+
+    @staticmethod
+    def _result(state: Dict[str, Any], output: Dict[str, Any]) -> Dict[str, Any]:
+        parsed = parsed_dict("review", output)
+        if parsed is None:
+            # Unreadable verdict is not an approval: the router rewrites while
+            # the request budget allows, then keeps the best draft
+            parsed = {
+                "ok": False,
+                "issues": [UNREADABLE_REVIEW_ISSUE],
+                "suggested_edits": "",
+                "parse_failed": True,
+            }
+        return {"review": parsed, "usage": usage_from_message(output.get("raw"))}
+
+    @staticmethod
+    @traceable(run_type="llm")
+    def run(state: Dict[str, Any], llm) -> Dict[str, Any]:
+        output = ReviewAgent._chain(llm).invoke(ReviewAgent._payload(state))
+        return ReviewAgent._result(state, output)
+
+    @staticmethod
+    @traceable(run_type="llm")
+    async def arun(state: Dict[str, Any], llm) -> Dict[str, Any]:
+        output = await ReviewAgent._chain(llm).ainvoke(ReviewAgent._payload(state))
+        return ReviewAgent._result(state, output)
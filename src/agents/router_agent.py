@@ -1,24 +1,47 @@
-from langsmith import traceable
+from src.observability.metrics import BUDGET_STOPS, REWRITES
+from src.workflow.budget import exhausted_reason
 
 
 
 class RouterAgent:
+    @staticmethod
+    def _score(review):
+        # Approved drafts beat any rejected one; otherwise fewer issues is better
+        if review.get("ok", True):
+            return float("inf")
+        return -len(review.get("issues", []))
+
     @staticmethod
     def run(state):
         review = state.get("review", {})
         retry_count = state.get("retry_count", 0)
-        max_retries = 3
+        update = {}
+
+        # Keep the best reviewed draft seen so far
+        draft = state.get("personalized_draft")
+        score = RouterAgent._score(review)
+        if draft and (state.get("best_draft") is None or score > state.get("best_score", float("-inf"))):
+            update["best_draft"] = draft
+            update["best_score"] = score
 
         if not review or review.get("ok", True):
-            return {"route": "done"}
-        if retry_count >= max_retries:
+            return {**update, "route": "done"}
+
+        reason = exhausted_reason(state)
+        if reason:
+            BUDGET_STOPS.inc(reason=reason)
+            best = update.get("best_draft") or state.get("best_draft") or draft
             return {
+                **update,
                 "route": "done",
-                "reason": "max_retries_exceeded",
+                "reason": reason,
                 "issues": review.get("issues", []),
                 "retry_count": retry_count,
+                "personalized_draft": best,
             }
+        REWRITES.inc()
         return {
+            **update,
             "route": "rewrite",
             "issues": review.get("issues", []),
             "retry_count": retry_count + 1,
@@ -0,0 +1,28 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class EmailDraft(BaseModel):
+    """Draft produced by DraftWriterAgent."""
+
+    subject: str = Field(description="Email subject line")
+    body: str = Field(description="Full email body, including greeting and sign-off")
+
+
+class ReviewResult(BaseModel):
+    """Verdict produced by ReviewAgent."""
+
+    ok: bool = Field(description="True if the email needs no changes")
+    issues: List[str] = Field(description="Problems found; empty when ok is true")
+    suggested_edits: str = Field(description="Full corrected body, or empty when ok is true")
+
+
+class FastEmailResult(BaseModel):
+    """Intent, draft and self-check produced in one call by FastDraftAgent."""
+
+    intent: str = Field(description="One of: outreach, follow-up, apology, internal_update, "
+                                    "ask_for_meeting, introduction, promotion, other")
+    subject: str = Field(description="Email subject line")
+    body: str = Field(description="Full email body, including greeting and sign-off")
+    self_check_ok: bool = Field(description="True if the draft matches the request, tone and facts given")
+    issues: List[str] = Field(description="Problems the self-check found; empty when self_check_ok is true")
@@ -0,0 +1,200 @@
+"""
+structured_output.py
+
+Helpers for agents that expect JSON back from the model:
+- structured_chain(): schema-constrained output via the provider's JSON
+  schema support, with a tolerant text parser for models without it
+- parse_json_tolerant(): parses JSON wrapped in markdown fences or prose
+- IncrementalJSONParser: partial object snapshots from a streamed completion
+- per-agent parse attempt / failure counters
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Any, Dict, Optional, Type
+
+from src.observability.metrics import PARSE_RESULTS
+
+# LangChain and pydantic are imported where the chains are built, so the
+# pure-Python parsing helpers load without them
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+_FENCE_RE = re.compile(r"```(?:json)?", re.IGNORECASE)
+
+
+# ===========================
+# Counters
+# ===========================
+_lock = threading.Lock()
+_attempts: Counter = Counter()
+_failures: Counter = Counter()
+
+
+def record_parse(agent: str, ok: bool) -> None:
+    with _lock:
+        _attempts[agent] += 1
+        if not ok:
+            _failures[agent] += 1
+    PARSE_RESULTS.inc(agent=agent, result="ok" if ok else "failure")
+
+
+def parse_stats() -> Dict[str, Dict[str, int]]:
+    """{agent: {"attempts": n, "failures": n}}"""
+    with _lock:
+        return {
+            agent: {"attempts": _attempts[agent], "failures": _failures[agent]}
+            for agent in _attempts
+        }
+
+
+# ===========================
+# Tolerant parsing
+# ===========================
+def strip_fences(text: str) -> str:
+    return _FENCE_RE.sub("", text or "").strip()
+
+
+def parse_json_tolerant(text: str) -> Any:
+    """
+    Parse a JSON object from model output that may be fenced or surrounded by
+    prose. Raises ValueError if no object can be recovered.
+    """
+    cleaned = strip_fences(text)
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start != -1 and end > start:
+        try:
+            return json.loads(cleaned[start:end + 1])
+        except json.JSONDecodeError:
+            pass
+    raise ValueError("no JSON object found in model output")
+
+
+class IncrementalJSONParser:
+    """
+    Feed streamed completion text; get the best partial object so far.
+
+    Tracks string/escape state and open brackets as chunks arrive, so each
+    feed() only scans the new text. Snapshots close any open string and
+    brackets and parse the result; if that fails the previous snapshot is kept.
+    Leading prose or a ```json fence before the first "{" is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._stack = []
+        self._snapshot: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        if not self._started:
+            idx = chunk.find("{")
+            if idx == -1:
+                return self._snapshot
+            chunk = chunk[idx:]
+            self._started = True
+
+        for ch in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._stack.append("}" if ch == "{" else "]")
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+        self.buffer += chunk
+
+        snapshot = self._try_close()
+        if isinstance(snapshot, dict):
+            self._snapshot = snapshot
+        return self._snapshot
+
+    def _try_close(self) -> Optional[Any]:
+        candidate = self.buffer
+        if self._in_string:
+            # Drop a dangling escape so the closing quote is not swallowed
+            if self._escape:
+                candidate = candidate[:-1]
+            candidate += '"'
+        stripped = candidate.rstrip()
+        if stripped.endswith(","):
+            stripped = stripped[:-1]
+        elif stripped.endswith(":"):
+            stripped += " null"
+        try:
+            return json.loads(stripped + "".join(reversed(self._stack)))
+        except json.JSONDecodeError:
+            return None
+
+    @property
+    def value(self) -> Dict[str, Any]:
+        return self._snapshot
+
+
+# ===========================
+# Schema-constrained chains
+# ===========================
+def _fallback_parser(schema: Type["BaseModel"]):
+    from langchain_core.runnables import RunnableLambda
+
+    def parse(message) -> Dict[str, Any]:
+        try:
+            return {"raw": message, "parsed": schema.model_validate(parse_json_tolerant(message.content)), "parsing_error": None}
+        except Exception as e:
+            return {"raw": message, "parsed": None, "parsing_error": e}
+    return RunnableLambda(parse)
+
+
+def structured_chain(chat_prompt, llm, schema: Type["BaseModel"]):
+    """
+    `chat_prompt | model` returning {"raw": AIMessage, "parsed": schema | None,
+    "parsing_error": Exception | None}.
+
+    Uses the provider's JSON-schema output when the model supports it;
+    otherwise the raw reply goes through parse_json_tolerant.
+    """
+    try:
+        structured = llm.with_structured_output(schema, method="json_schema", include_raw=True)
+    except (AttributeError, NotImplementedError, TypeError, ValueError):
+        structured = None
+
+    if structured is not None:
+        return chat_prompt | structured
+    return chat_prompt | llm | _fallback_parser(schema)
+
+
+def parsed_dict(agent: str, output: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Dict from a structured_chain output, retrying a tolerant parse of the raw text; counts failures."""
+    parsed = output.get("parsed")
+    if hasattr(parsed, "model_dump"):  # the schema's pydantic model
+        record_parse(agent, True)
+        return parsed.model_dump()
+    if isinstance(parsed, dict):
+        record_parse(agent, True)
+        return parsed
+
+    raw = output.get("raw")
+    try:
+        value = parse_json_tolerant(getattr(raw, "content", raw) or "")
+        if isinstance(value, dict):
+            record_parse(agent, True)
+            return value
+    except ValueError:
+        pass
+    record_parse(agent, False)
+    return None
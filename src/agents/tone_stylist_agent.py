@@ -1,29 +1,49 @@
 
+import functools
 import json
 from typing import Dict, Any
 from pathlib import Path
 from langsmith import traceable
 
-# Load tone samples
 TONE_SAMPLES_PATH = Path(__file__).parent.parent.parent / "data" / "tone_samples.json"
-with open(TONE_SAMPLES_PATH, "r", encoding="utf-8") as f:
-    TONE_SAMPLES = json.load(f)
+
+
+@functools.lru_cache(maxsize=1)
+def load_tone_samples() -> Dict[str, str]:
+    """Tone samples, read on first use and cached."""
+    with open(TONE_SAMPLES_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+TONE_EXAMPLES = {
+    "formal": "Example: Hi Emma,\nI hope this message finds you well. I am writing to invite you to our upcoming meeting. Please confirm your availability. Best regards, SP.",
+    "casual": "Example: Hey Emma!\nHope you're doing well! I wanted to invite you to our Secret Santa party at my place on Friday. Let me know if you can make it! Cheers, SP.",
+    "assertive": "Example: Emma,\nYou are invited to the Secret Santa party on Friday at 7 PM. Please confirm your attendance by Wednesday. Best regards, SP."
+}
+
+
+def tone_instructions(tone: str) -> str:
+    """Guide plus example for one tone (formal if unknown)."""
+    samples = load_tone_samples()
+    tone = tone if tone in samples else "formal"
+    return f"{samples[tone]}\n\n{TONE_EXAMPLES.get(tone, TONE_EXAMPLES['formal'])}"
+
+
+def __getattr__(name: str):
+    if name == "TONE_SAMPLES":
+        return load_tone_samples()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class ToneStylistAgent:
     @staticmethod
     @traceable(run_type="llm")
     def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        TONE_SAMPLES = load_tone_samples()
         parsed = state.get("parsed") or {}
         prefer = parsed.get("preferred_tone") or state.get("user_profile", {}).get("preferred_tone", "formal")
         tone = prefer if prefer in TONE_SAMPLES else "formal"
-        tone_instructions = TONE_SAMPLES.get(tone, TONE_SAMPLES["formal"])
-        examples = {
-            "formal": "Example: Hi Emma,\nI hope this message finds you well. I am writing to invite you to our upcoming meeting. Please confirm your availability. Best regards, SP.",
-            "casual": "Example: Hey Emma!\nHope you're doing well! I wanted to invite you to our Secret Santa party at my place on Friday. Let me know if you can make it! Cheers, SP.",
-            "assertive": "Example: Emma,\nYou are invited to the Secret Santa party on Friday at 7 PM. Please confirm your attendance by Wednesday. Best regards, SP."
-        }
         return {
             "tone": tone,
-            "tone_instructions": f"{tone_instructions}\n\n{examples.get(tone, examples['formal'])}"
+            "tone_instructions": tone_instructions(tone)
         }
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+server.py
+
+Headless HTTP API over the async email workflow.
+
+    python -m src.api.server --port 8000            # OpenAI
+    python -m src.api.server --port 8000 --fake-llm # offline
+    uvicorn src.api.server:app_from_env --factory --port 8000
+
+Endpoints:
+- POST /v1/emails          one draft
+- POST /v1/emails:batch    many drafts in one request
+- POST /v1/emails:stream   one draft as server-sent events (token / node / final)
+- POST /v1/evaluate        LLM-judge scores for a draft
+- GET  /healthz, GET /metrics
+
+Admission control: at most API_MAX_CONCURRENCY workflow slots run at once
+and up to API_MAX_QUEUE requests wait for one (a batch takes one slot per
+item it runs in parallel). When the queue is full, or a request waits longer
+than API_QUEUE_TIMEOUT_S, the server answers 429 with Retry-After. On
+shutdown it stops admitting (503) and lets in-flight requests finish for up
+to API_SHUTDOWN_GRACE_S.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from src.eval.eval_runner import ajudge_email
+from src.memory.store import save_eval
+from src.observability.metrics import REGISTRY
+from src.observability.tracing import get_tracer
+from src.workflow.batch import agenerate_batch
+from src.workflow.budget import DeadlineExceeded, RequestBudget
+from src.workflow.langgraph_flow import WORKFLOW_MODES, arun_email_workflow, astream_email_workflow
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.environ.get("API_MAX_CONCURRENCY", 64))
+MAX_QUEUE = int(os.environ.get("API_MAX_QUEUE", 128))
+QUEUE_TIMEOUT_S = float(os.environ.get("API_QUEUE_TIMEOUT_S", 10))
+SHUTDOWN_GRACE_S = float(os.environ.get("API_SHUTDOWN_GRACE_S", 30))
+BATCH_MAX_ITEMS = int(os.environ.get("API_BATCH_MAX_ITEMS", 100))
+BATCH_CONCURRENCY = int(os.environ.get("API_BATCH_CONCURRENCY", 8))
+
+
+# ===========================
+# Request / response models
+# ===========================
+class BudgetIn(BaseModel):
+    deadline_s: Optional[float] = None
+    max_llm_calls: Optional[int] = None
+    max_tokens: Optional[int] = None
+    max_rewrites: Optional[int] = None
+
+    def to_budget(self) -> RequestBudget:
+        overrides = {k: v for k, v in self.model_dump().items() if v is not None}
+        return RequestBudget(**{**RequestBudget.from_env().__dict__, **overrides})
+
+
+class EmailRequest(BaseModel):
+    prompt: str = Field(min_length=1)
+    mode: Optional[str] = Field(default=None, description='"full" or "fast"')
+    budget: Optional[BudgetIn] = None
+    include_traces: bool = False
+
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    prompt: str = Field(min_length=1)
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem] = Field(min_length=1)
+    mode: Optional[str] = None
+
+
+class EvaluateRequest(BaseModel):
+    prompt: str
+    subject: str
+    body: str
+    tone: str = ""
+    save: bool = False
+
+
+def invalid_request(mode: Optional[str]) -> Optional[JSONResponse]:
+    """400 for request fields the schema cannot check, else None."""
+    if mode is not None and mode not in WORKFLOW_MODES:
+        return JSONResponse(
+            {"error": f"unknown mode {mode!r}; expected one of {list(WORKFLOW_MODES)}"}, status_code=400
+        )
+    return None
+
+
+def email_response(state: Dict[str, Any], include_traces: bool = False) -> Dict[str, Any]:
+    draft = state.get("personalized_draft") or state.get("draft") or {}
+    response = {
+        "subject": draft.get("subject", ""),
+        "body": draft.get("body", ""),
+        "intent": state.get("intent"),
+        "tone": state.get("tone"),
+        "review": state.get("review"),
+        "usage": state.get("usage") or {},
+        "retry_count": state.get("retry_count", 0),
+        "stopped_reason": state.get("reason"),
+    }
+    if include_traces:
+        response["traces"] = state.get("traces", [])
+    return response
+
+
+# ===========================
+# Admission control
+# ===========================
+class Saturated(Exception):
+    pass
+
+
+class Draining(Exception):
+    pass
+
+
+class AdmissionController:
+    """Counting limiter over workflow slots with a bounded wait queue."""
+
+    def __init__(self, capacity: int, max_queue: int, queue_timeout_s: float):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.in_use = 0
+        self.waiting = 0
+        self.draining = False
+        self.rejected = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self, slots: int = 1) -> int:
+        slots = max(1, min(slots, self.capacity))
+        async with self._cond:
+            if self.draining:
+                raise Draining()
+            if self.in_use + slots > self.capacity and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Saturated()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self.draining or self.in_use + slots <= self.capacity),
+                    self.queue_timeout_s,
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise Saturated() from None
+            finally:
+                self.waiting -= 1
+            if self.draining:
+                raise Draining()
+            self.in_use += slots
+            return slots
+
+    async def release(self, slots: int) -> None:
+        async with self._cond:
+            self.in_use -= slots
+            self._cond.notify_all()
+
+    async def drain(self, timeout_s: float) -> bool:
+        """Stop admitting and wait for in-flight work; True if everything finished."""
+        async with self._cond:
+            self.draining = True
+            self._cond.notify_all()
+            try:
+                await asyncio.wait_for(self._cond.wait_for(lambda: self.in_use == 0), timeout_s)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "draining": self.draining,
+        }
+
+
+def _rejection(e: Exception) -> JSONResponse:
+    if isinstance(e, Draining):
+        return JSONResponse({"error": "server is shutting down"}, status_code=503, headers={"Retry-After": "5"})
+    return JSONResponse({"error": "server is at capacity, retry later"}, status_code=429, headers={"Retry-After": "1"})
+
+
+# ===========================
+# App
+# ===========================
+def create_app(
+    llm=None,
+    judge_llm=None,
+    max_concurrency: int = MAX_CONCURRENCY,
+    max_queue: int = MAX_QUEUE,
+    queue_timeout_s: float = QUEUE_TIMEOUT_S,
+    shutdown_grace_s: float = SHUTDOWN_GRACE_S,
+) -> FastAPI:
+    """
+    Build the API. `llm` / `judge_llm` override the workflow and judge models
+    (None: the shared OpenAI clients).
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.admission = AdmissionController(max_concurrency, max_queue, queue_timeout_s)
+        yield
+        finished = await app.state.admission.drain(shutdown_grace_s)
+        if not finished:
+            logger.warning("shutdown grace of %ss expired with requests still running", shutdown_grace_s)
+        get_tracer().flush()
+
+    app = FastAPI(title="Email Generator API", version="1.0", lifespan=lifespan)
+
+    async def run_admitted(slots: int, coro_fn):
+        admission: AdmissionController = app.state.admission
+        try:
+            taken = await admission.acquire(slots)
+        except (Saturated, Draining) as e:
+            return _rejection(e)
+        try:
+            return await coro_fn()
+        finally:
+            await admission.release(taken)
+
+    @app.get("/healthz")
+    async def healthz():
+        admission: AdmissionController = app.state.admission
+        status = 503 if admission.draining else 200
+        return JSONResponse({"status": "draining" if admission.draining else "ok", **admission.stats()},
+                            status_code=status)
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    @app.post("/v1/emails")
+    async def create_email(req: EmailRequest):
+        invalid = invalid_request(req.mode)
+        if invalid is not None:
+            return invalid
+
+        async def run():
+            start = time.perf_counter()
+            try:
+                state = await arun_email_workflow(
+                    req.prompt,
+                    llm=llm,
+                    budget=req.budget.to_budget() if req.budget else None,
+                    mode=req.mode,
+                )
+            except DeadlineExceeded as e:
+                return JSONResponse({"error": str(e)}, status_code=504)
+            response = email_response(state, req.include_traces)
+            response["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            return response
+
+        return await run_admitted(1, run)
+
+    @app.post("/v1/emails:batch")
+    async def create_email_batch(req: BatchRequest):
+        if len(req.items) > BATCH_MAX_ITEMS:
+            return JSONResponse({"error": f"at most {BATCH_MAX_ITEMS} items per batch"}, status_code=413)
+        invalid = invalid_request(req.mode)
+        if invalid is not None:
+            return invalid
+        parallel = min(len(req.items), BATCH_CONCURRENCY)
+
+        async def run():
+            items = [{"id": item.id, "prompt": item.prompt} if item.id else item.prompt for item in req.items]
+            results = [
+                record async for record in agenerate_batch(items, max_concurrency=parallel, llm=llm, mode=req.mode)
+            ]
+            results.sort(key=lambda r: r["index"])
+            return {"results": results}
+
+        return await run_admitted(parallel, run)
+
+    @app.post("/v1/emails:stream")
+    async def stream_email(req: EmailRequest, request: Request):
+        invalid = invalid_request(req.mode)
+        if invalid is not None:
+            return invalid
+        admission: AdmissionController = app.state.admission
+        try:
+            taken = await admission.acquire(1)
+        except (Saturated, Draining) as e:
+            return _rejection(e)
+
+        async def events():
+            try:
+                async for event in astream_email_workflow(
+                    req.prompt,
+                    llm=llm,
+                    budget=req.budget.to_budget() if req.budget else None,
+                    mode=req.mode,
+                ):
+                    if await request.is_disconnected():
+                        break
+                    if event["type"] == "final":
+                        data = email_response(event["state"] or {}, req.include_traces)
+                    else:
+                        data = {k: v for k, v in event.items() if k != "type"}
+                    yield f"event: {event['type']}\ndata: {json.dumps(data, default=str)}\n\n"
+            except Exception as e:
+                yield f"event: error\ndata: {json.dumps({'error': f'{type(e).__name__}: {e}'})}\n\n"
+            finally:
+                await admission.release(taken)
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    @app.post("/v1/evaluate")
+    async def evaluate(req: EvaluateRequest):
+        async def run():
+            scores = await ajudge_email(req.prompt, req.tone, req.subject, req.body, llm=judge_llm)
+            eval_id = None
+            if req.save and "error" not in scores:
+                eval_id = await run_in_threadpool(
+                    save_eval, req.prompt, {"subject": req.subject, "body": req.body}, scores
+                )
+            return {"scores": scores, "eval_id": eval_id}
+
+        return await run_admitted(1, run)
+
+    @app.exception_handler(Exception)
+    async def unhandled(request: Request, exc: Exception):
+        return JSONResponse({"error": f"{type(exc).__name__}: {exc}"}, status_code=500)
+
+    return app
+
+
+def app_from_env() -> FastAPI:
+    """
+    App factory for uvicorn (`--factory`): the OpenAI-backed API, or the
+    in-process fake LLM when API_FAKE_LLM is set. Importing this module
+    builds nothing.
+    """
+    if os.environ.get("API_FAKE_LLM"):
+        from src.integrations.fake_llm import FakeEmailLLM
+
+        fake = FakeEmailLLM(latency=float(os.environ.get("API_FAKE_LLM_LATENCY", 0.05)))
+        return create_app(llm=fake, judge_llm=fake)
+    return create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the email workflow over HTTP.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fake-llm", action="store_true", help="use the in-process fake LLM (offline)")
+    args = parser.parse_args(argv)
+
+    if args.fake_llm:
+        os.environ["API_FAKE_LLM"] = "1"
+    # uvicorn stops accepting on SIGTERM, waits for open requests, then runs the lifespan shutdown
+    uvicorn.run(app_from_env(), host=args.host, port=args.port, timeout_graceful_shutdown=int(SHUTDOWN_GRACE_S))
+
+
+if __name__ == "__main__":
+    main()
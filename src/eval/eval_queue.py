@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+eval_queue.py
+
+Background LLM-judge evaluation for interactive drafts.
+
+The UI submits a finished draft and gets an eval id back immediately; a
+small worker pool runs the judge and saves the scores to the eval history,
+and the UI polls `result(eval_id)` until they are ready.
+
+Configuration (environment):
+- EVAL_SAMPLE_RATE: 0.0-1.0, share of drafts judged (default 1.0)
+- EVAL_WORKERS: judge calls running at once (default 2)
+- EVAL_MAX_RESULTS: finished jobs kept for polling (default 256)
+"""
+
+import os
+import random
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.observability.metrics import EVAL_JOBS
+
+SAMPLE_RATE = float(os.environ.get("EVAL_SAMPLE_RATE", 1.0))
+WORKERS = int(os.environ.get("EVAL_WORKERS", 2))
+MAX_RESULTS = int(os.environ.get("EVAL_MAX_RESULTS", 256))
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+
+@dataclass
+class EvalJob:
+    eval_id: str
+    prompt: str
+    tone: str
+    draft: Dict[str, Any]
+    status: str = PENDING
+    scores: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    saved_id: Optional[str] = None
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+class EvalQueue:
+    """Thread pool running judge + save_eval off the request path, results keyed by eval id."""
+
+    def __init__(self, workers: int = WORKERS, sample_rate: float = SAMPLE_RATE,
+                 max_results: int = MAX_RESULTS, judge_llm=None, save: bool = True):
+        self.sample_rate = sample_rate
+        self.max_results = max_results
+        self.judge_llm = judge_llm
+        self.save = save
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="eval")
+        self._jobs: "OrderedDict[str, EvalJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sampled(self, sample_rate: Optional[float] = None) -> bool:
+        rate = self.sample_rate if sample_rate is None else sample_rate
+        if rate >= 1.0:
+            return True
+        return rate > 0.0 and random.random() < rate
+
+    def submit(self, prompt: str, tone: str, draft: Dict[str, Any],
+               force: bool = False, sample_rate: Optional[float] = None) -> Optional[str]:
+        """
+        Queue a draft for judging. Returns its eval id, or None when the draft
+        was not sampled (`force` always judges; `sample_rate` overrides the
+        queue's rate for this call).
+        """
+        if not force and not self.sampled(sample_rate):
+            EVAL_JOBS.inc(status="skipped")
+            return None
+
+        job = EvalJob(eval_id=str(uuid.uuid4()), prompt=prompt, tone=tone, draft=dict(draft))
+        with self._lock:
+            self._jobs[job.eval_id] = job
+            self._trim()
+        EVAL_JOBS.inc(status="submitted")
+        self._executor.submit(self._run, job)
+        return job.eval_id
+
+    def _trim(self) -> None:
+        # Drop the oldest finished jobs; pending ones stay until they are done
+        excess = len(self._jobs) - self.max_results
+        for eval_id in [k for k, j in self._jobs.items() if j.status != PENDING][:max(0, excess)]:
+            del self._jobs[eval_id]
+
+    def _run(self, job: EvalJob) -> None:
+        from src.eval.eval_runner import judge_email
+        from src.memory.store import save_eval
+
+        try:
+            scores = judge_email(
+                job.prompt, job.tone, job.draft.get("subject", ""), job.draft.get("body", ""), llm=self.judge_llm
+            )
+            if self.save and "error" not in scores:
+                job.saved_id = save_eval(prompt=job.prompt, draft=job.draft, scores=scores)
+            job.scores = scores
+            job.status = FAILED if "error" in scores else DONE
+            job.error = scores.get("error")
+        except Exception as e:
+            job.status, job.error = FAILED, f"{type(e).__name__}: {e}"
+        EVAL_JOBS.inc(status=job.status)
+
+    def result(self, eval_id: str) -> Optional[EvalJob]:
+        with self._lock:
+            return self._jobs.get(eval_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "pending": statuses.count(PENDING),
+            "done": statuses.count(DONE),
+            "failed": statuses.count(FAILED),
+            "sample_rate": self.sample_rate,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_queue: Optional[EvalQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_eval_queue() -> EvalQueue:
+    """Process-wide queue configured from the environment (shared by all Streamlit sessions)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = EvalQueue()
+        return _queue
+
+
+def eval_queue_stats() -> Dict[str, Any]:
+    """Stats of the process-wide queue without creating it."""
+    return _queue.stats() if _queue is not None else {"pending": 0, "done": 0, "failed": 0}
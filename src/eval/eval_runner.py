@@ -1,31 +1,67 @@
+"""
+eval_runner.py
+
+Offline evaluation: run every dataset example through the workflow, score
+the draft with the LLM judge, and report aggregate metrics.
+
+    python -m src.eval.eval_runner --out runs/nightly.jsonl --concurrency 32 \\
+        --baseline runs/baseline.summary.json
+
+- Examples run on a pool of `--concurrency` async workers.
+- Each result is appended to `--out` as soon as it is scored; re-running with
+  the same file skips examples already scored (checkpoint / resume); failed
+  ones are retried.
+- The summary (means, percentiles, regression deltas against `--baseline`)
+  is printed and written next to the results as `<out>.summary.json`.
+- `--mode fast` evaluates the single-call fast-mode graph instead of the
+  full intent -> draft -> review workflow.
+- `--offline` swaps both the workflow model and the judge for the local fake
+  LLM, so the whole pipeline runs without network access.
+"""
+
+import argparse
+import asyncio
 import json
-from src.integrations.llm_client import make_openai_llm
-from src.workflow.langgraph_flow import run_email_workflow
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.integrations.llm_client import get_llm
+
+DATASET_PATH = Path(__file__).parent / "email_eval_set.json"
+
+SCORE_KEYS = [
+    "intent_accuracy",
+    "tone_alignment",
+    "clarity",
+    "professionalism",
+    "completeness",
+    "grammar",
+    "overall_score",
+]
+
+INTENT_LABELS = {
+    "outreach", "follow_up", "apology", "internal_update", "ask_for_meeting", "introduction", "promotion", "other"
+}
+
+# A metric whose mean drops by more than this against the baseline is flagged
+REGRESSION_THRESHOLD = 0.25
 
-llm = make_openai_llm(model="gpt-4o", temperature=0)
 
 def validate_scores(scores: dict) -> bool:
-    required_keys = [
-        "intent_accuracy",
-        "tone_alignment",
-        "clarity",
-        "professionalism",
-        "completeness",
-        "grammar",
-        "overall_score",
-    ]
-
-    for key in required_keys:
+    for key in SCORE_KEYS:
         val = scores.get(key)
         if not isinstance(val, int) or not (1 <= val <= 10):
             return False
     return True
 
 
-def judge_email(user_input: str, tone: str, subject: str, body: str):
-    llm = make_openai_llm(model="gpt-4o", temperature=0)
-
-    prompt = f"""
+# ===========================
+# LLM judge
+# ===========================
+def _judge_prompt(user_input: str, tone: str, subject: str, body: str) -> str:
+    return f"""
             You are an expert email reviewer.
 
             IMPORTANT:
@@ -56,43 +92,293 @@ def judge_email(user_input: str, tone: str, subject: str, body: str):
             - explanation
             """
 
-    response = llm.invoke(prompt)
 
+def _parse_judge(content: str) -> dict:
+    cleaned = re.sub(r"```(?:json)?", "", content or "").strip()
     try:
-        scores = json.loads(response.content)
+        scores = json.loads(cleaned)
     except Exception:
         return {
             "error": "Failed to parse JSON from judge",
-            "raw_output": response.content
+            "raw_output": content
         }
 
     if not validate_scores(scores):
         return {
-            "error": "Invalid score scale (expected integers 110)",
+            "error": "Invalid score scale (expected integers 1-10)",
             "raw_output": scores
         }
 
     return scores
 
-def run_eval():
-    dataset = json.load(open("eval/email_eval_set.json"))
-    results = []
 
-    for example in dataset:
-        result = run_email_workflow(example["input"])
-        draft = result.get("personalized_draft", {})
-        email_text = f"{draft.get('subject','')}\n\n{draft.get('body','')}"
+def judge_email(user_input: str, tone: str, subject: str, body: str, llm=None):
+    llm = llm or get_llm(model="gpt-4o", temperature=0)
+    response = llm.invoke(_judge_prompt(user_input, tone, subject, body))
+    return _parse_judge(response.content)
+
+
+async def ajudge_email(user_input: str, tone: str, subject: str, body: str, llm=None):
+    llm = llm or get_llm(model="gpt-4o", temperature=0)
+    response = await llm.ainvoke(_judge_prompt(user_input, tone, subject, body))
+    return _parse_judge(response.content)
+
 
-        score = judge_email(
+# ===========================
+# Engine
+# ===========================
+def _normalize_intent(label: Optional[str]) -> str:
+    return (label or "").strip().lower().replace("-", "_")
+
+
+async def _evaluate_example(
+    example: Dict[str, Any], workflow_llm, judge_llm, mode: Optional[str] = None
+) -> Dict[str, Any]:
+    from src.workflow.langgraph_flow import arun_email_workflow
+
+    record: Dict[str, Any] = {
+        "id": example["id"],
+        "input": example["input"],
+        "tone": example.get("tone"),
+        "expected_intent": example.get("expected_intent"),
+        "error": None,
+    }
+    start = time.perf_counter()
+    try:
+        state = await arun_email_workflow(example["input"], llm=workflow_llm, mode=mode)
+        draft = state.get("personalized_draft") or state.get("draft") or {}
+        record["intent"] = state.get("intent")
+        record["subject"] = draft.get("subject", "")
+        record["body"] = draft.get("body", "")
+        record["generation_s"] = round(time.perf_counter() - start, 4)
+        record["usage"] = state.get("usage") or {}
+        record["retry_count"] = state.get("retry_count", 0)
+        record["selections"] = [t["selection"] for t in state.get("traces", []) if t.get("selection")]
+
+        record["scores"] = await ajudge_email(
             example["input"],
-            example["tone"],
-            email_text
+            example.get("tone", ""),
+            record["subject"],
+            record["body"],
+            llm=judge_llm,
         )
+        if "error" in record["scores"]:
+            record["error"] = record["scores"]["error"]
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    expected = _normalize_intent(record["expected_intent"])
+    if expected in INTENT_LABELS:
+        record["intent_match"] = _normalize_intent(record.get("intent")) == expected
+    record["latency_s"] = round(time.perf_counter() - start, 4)
+    return record
+
+
+async def arun_eval(
+    dataset: List[Dict[str, Any]],
+    out_path: Path,
+    concurrency: int = 8,
+    workflow_llm=None,
+    judge_llm=None,
+    mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Score every example not already in `out_path`; returns the summary over all results."""
+    from src.workflow.batch import read_completed_ids
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    done = read_completed_ids(out_path)
+    pending = iter([ex for ex in dataset if str(ex["id"]) not in done])
+    judge_llm = judge_llm or get_llm(model="gpt-4o", temperature=0)
+    write_lock = asyncio.Lock()
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        async def worker():
+            for example in pending:
+                record = await _evaluate_example(example, workflow_llm, judge_llm, mode)
+                async with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    return summarize(load_results(out_path))
+
+
+def load_results(path: Path) -> List[Dict[str, Any]]:
+    """One record per example; a retried example keeps its latest record."""
+    results: Dict[str, Dict[str, Any]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results.pop(str(record.get("id")), None)
+            results[str(record.get("id"))] = record
+    return list(results.values())
+
+
+# ===========================
+# Reporting
+# ===========================
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _describe(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 4),
+        "p50": round(_percentile(values, 50), 4),
+        "p90": round(_percentile(values, 90), 4),
+        "p95": round(_percentile(values, 95), 4),
+        "p99": round(_percentile(values, 99), 4),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def _cached_share(usages: List[Dict[str, int]]) -> Optional[float]:
+    """Share of input tokens served from the provider's prompt cache."""
+    input_tokens = sum(u.get("input_tokens", 0) for u in usages)
+    if not input_tokens:
+        return None
+    return round(sum(u.get("cached_tokens", 0) for u in usages) / input_tokens, 4)
+
+
+def _selection_summary(results: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """n-best draft selection: how often a candidate other than the first won, and by how much."""
+    selections = [sel for r in results for sel in r.get("selections") or []]
+    if not selections:
+        return None
+    changed = [sel for sel in selections if sel["chosen"] != 0]
+    return {
+        "selections": len(selections),
+        "mean_candidates": round(sum(sel["candidates"] for sel in selections) / len(selections), 2),
+        "picked_other_share": round(len(changed) / len(selections), 4),
+        "mean_score_gain": round(
+            sum(sel["scores"][sel["chosen"]] - sel["scores"][0] for sel in selections) / len(selections), 3
+        ),
+    }
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    scored = [r["scores"] for r in results if isinstance(r.get("scores"), dict) and "error" not in r["scores"]]
+    matches = [r["intent_match"] for r in results if "intent_match" in r]
+    return {
+        "examples": len(results),
+        "errors": sum(1 for r in results if r.get("error")),
+        "metrics": {key: _describe([s[key] for s in scored]) for key in SCORE_KEYS},
+        "latency_s": _describe([r["latency_s"] for r in results if "latency_s" in r]),
+        "generation_s": _describe([r["generation_s"] for r in results if "generation_s" in r]),
+        "llm_calls": _describe([r["usage"].get("llm_calls", 0) for r in results if r.get("usage")]),
+        "total_tokens": _describe([r["usage"].get("total_tokens", 0) for r in results if r.get("usage")]),
+        "cached_input_share": _cached_share([r["usage"] for r in results if r.get("usage")]),
+        "rewrites": _describe([r["retry_count"] for r in results if "retry_count" in r]),
+        "draft_selection": _selection_summary(results),
+        "intent_match_rate": round(sum(matches) / len(matches), 4) if matches else None,
+    }
+
+
+def compare_to_baseline(summary: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-metric mean deltas (current - baseline); negative means worse."""
+    deltas = {}
+    for key in SCORE_KEYS:
+        current = summary["metrics"].get(key, {}).get("mean")
+        previous = baseline.get("metrics", {}).get(key, {}).get("mean")
+        if current is None or previous is None:
+            continue
+        delta = round(current - previous, 4)
+        deltas[key] = {
+            "baseline": previous,
+            "current": current,
+            "delta": delta,
+            "regressed": delta < -REGRESSION_THRESHOLD,
+        }
+    return deltas
+
+
+def print_report(summary: Dict[str, Any]) -> None:
+    print(f"examples: {summary['examples']}  errors: {summary['errors']}  "
+          f"intent match: {summary['intent_match_rate']}")
+    print(f"{'metric':<18}{'mean':>8}{'p50':>8}{'p90':>8}{'p95':>8}{'delta':>9}")
+    deltas = summary.get("baseline_deltas", {})
+    for key in SCORE_KEYS:
+        stats = summary["metrics"][key]
+        if not stats.get("count"):
+            print(f"{key:<18}{'n/a':>8}")
+            continue
+        delta = deltas.get(key)
+        delta_txt = f"{delta['delta']:+.2f}{'!' if delta['regressed'] else ''}" if delta else ""
+        print(f"{key:<18}{stats['mean']:>8.2f}{stats['p50']:>8.1f}{stats['p90']:>8.1f}{stats['p95']:>8.1f}{delta_txt:>9}")
+    latency = summary["latency_s"]
+    if latency.get("count"):
+        print(f"latency (s): mean {latency['mean']:.2f}  p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}")
+    tokens = summary.get("total_tokens", {})
+    if tokens.get("count"):
+        print(f"tokens/request: mean {tokens['mean']:.0f}  p95 {tokens['p95']:.0f}  "
+              f"LLM calls/request: {summary['llm_calls']['mean']:.2f}  "
+              f"cached input: {summary.get('cached_input_share')}")
+    rewrites = summary.get("rewrites", {})
+    if rewrites.get("count"):
+        print(f"rewrites/request: mean {rewrites['mean']:.2f}  max {rewrites['max']}")
+    selection = summary.get("draft_selection")
+    if selection:
+        print(f"draft selection: {selection['mean_candidates']:.1f} candidates, "
+              f"non-first pick {selection['picked_other_share']:.0%}, "
+              f"mean local score gain {selection['mean_score_gain']:+.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the email workflow with an LLM judge.")
+    parser.add_argument("--dataset", type=Path, default=DATASET_PATH)
+    parser.add_argument("--out", type=Path, default=Path("runs") / "eval_results.jsonl",
+                        help="per-example results (JSONL); existing ids are skipped")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--baseline", type=Path, help="summary JSON of a previous run to compare against")
+    parser.add_argument("--save-baseline", type=Path, help="also write this run's summary here")
+    parser.add_argument("--mode", choices=["full", "fast"], default=None,
+                        help="workflow graph to evaluate (default: WORKFLOW_MODE env, else full)")
+    parser.add_argument("--offline", action="store_true", help="use the local fake LLM for workflow and judge")
+    parser.add_argument("--fake-latency", type=float, default=0.05, help="fake LLM latency per call (s)")
+    args = parser.parse_args(argv)
+
+    with open(args.dataset, "r", encoding="utf-8") as f:
+        dataset = json.load(f)
+
+    workflow_llm = judge_llm = None
+    if args.offline:
+        from src.integrations.fake_llm import FakeEmailLLM
+
+        workflow_llm = judge_llm = FakeEmailLLM(latency=args.fake_latency)
+
+    start = time.perf_counter()
+    summary = asyncio.run(arun_eval(dataset, args.out, args.concurrency, workflow_llm, judge_llm, args.mode))
+    summary["wall_time_s"] = round(time.perf_counter() - start, 2)
+
+    if args.baseline and args.baseline.exists():
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            summary["baseline_deltas"] = compare_to_baseline(summary, json.load(f))
+
+    summary_path = args.out.with_suffix(".summary.json")
+    for path in filter(None, [summary_path, args.save_baseline]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    print_report(summary)
+    print(f"results: {args.out}  summary: {summary_path}  ({summary['wall_time_s']} s)")
+
+    regressed = [k for k, d in summary.get("baseline_deltas", {}).items() if d["regressed"]]
+    if regressed:
+        print(f"REGRESSION: {', '.join(regressed)}")
+        raise SystemExit(1)
 
-        results.append({
-            "id": example["id"],
-            "scores": score
-        })
 
 if __name__ == "__main__":
-    run_eval()
\ No newline at end of file
+    main()
@@ -0,0 +1,223 @@
+# integrations/llm_cache.py
+
+"""
+Content-addressed response cache for the chat models.
+
+Plugs into LangChain's per-model `cache=` hook, which hands us the rendered
+messages (`prompt`) and a serialized description of the model and its
+parameters (`llm_string`, includes model name and temperature). The cache key
+is a SHA-256 over both.
+
+Tiers:
+- LRUCacheTier: in-process, bounded by entry count
+- SQLiteCacheTier: persistent, shared between processes
+Both honour an optional TTL. TieredLLMCache checks them in order and promotes
+persistent hits into memory.
+
+Configured from the environment:
+- LLM_CACHE: "memory" (default), "sqlite" (memory + sqlite) or "off"
+- LLM_CACHE_PATH: SQLite file (default: .cache/llm_cache.sqlite)
+- LLM_CACHE_MAX_ENTRIES: memory tier size (default: 1024)
+- LLM_CACHE_TTL_SECONDS: expiry, 0 disables (default: 86400)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+DEFAULT_CACHE_PATH = Path(".cache") / "llm_cache.sqlite"
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+# =============================
+# Tiers
+# =============================
+class LRUCacheTier:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Sequence[Generation]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds and time.time() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Sequence[Generation]) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheTier:
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, ttl_seconds: Optional[float] = None):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds or None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Sequence[Generation]]:
+        row = self._conn().execute(
+            "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+            with self._conn() as conn:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+        try:
+            return [loads(item) for item in loads(value)]
+        except Exception:
+            return None
+
+    def set(self, key: str, value: Sequence[Generation]) -> None:
+        payload = dumps([dumps(gen) for gen in value])
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, payload, time.time()),
+            )
+
+    def clear(self) -> None:
+        with self._conn() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def purge_expired(self) -> int:
+        if not self.ttl_seconds:
+            return 0
+        with self._conn() as conn:
+            cur = conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            return cur.rowcount
+
+
+# =============================
+# LangChain cache
+# =============================
+class TieredLLMCache(BaseCache):
+    """BaseCache that checks each tier in order and keeps hit/miss counters."""
+
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {type(t).__name__: 0 for t in tiers}
+        self._misses = 0
+        self._writes = 0
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = cache_key(prompt, llm_string)
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                # Promote into faster tiers
+                for faster in self.tiers[:i]:
+                    faster.set(key, value)
+                with self._lock:
+                    self._hits[type(tier).__name__] += 1
+                return value
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = cache_key(prompt, llm_string)
+        for tier in self.tiers:
+            tier.set(key, return_val)
+        with self._lock:
+            self._writes += 1
+
+    def clear(self, **kwargs: Any) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = sum(self._hits.values())
+            lookups = hits + self._misses
+            return {
+                "hits": hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "hits_by_tier": dict(self._hits),
+            }
+
+
+# =============================
+# Process-wide default
+# =============================
+_default_cache: Optional[TieredLLMCache] = None
+_default_lock = threading.Lock()
+
+
+def build_cache_from_env() -> Optional[TieredLLMCache]:
+    mode = os.environ.get("LLM_CACHE", "memory").lower()
+    if mode in ("off", "none", "0", "false"):
+        return None
+
+    ttl = float(os.environ.get("LLM_CACHE_TTL_SECONDS", 86400))
+    tiers: List[Any] = [
+        LRUCacheTier(int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1024)), ttl)
+    ]
+    if mode == "sqlite":
+        tiers.append(SQLiteCacheTier(Path(os.environ.get("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)), ttl))
+    return TieredLLMCache(tiers)
+
+
+def get_default_cache() -> Optional[TieredLLMCache]:
+    """Shared cache for every model built by make_openai_llm (None if disabled)."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = build_cache_from_env()
+        return _default_cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    cache = get_default_cache()
+    return cache.stats() if cache else {"enabled": False}
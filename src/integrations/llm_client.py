@@ -1,29 +1,174 @@
 # integrations/llm_client.py
 
 import os
+import threading
+from typing import Any, Dict, Tuple
+
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
+
+from src.observability.metrics import LLM_HTTP_REQUESTS
 
 load_dotenv()
 
+# httpx, langchain_openai and the cache module are imported on first use:
+# they pull in most of the OpenAI / LangChain stack.
+
+
+# =============================
+# Shared HTTP connection pools
+# =============================
+# One sync and one async httpx client per process, so every model reuses the
+# same keep-alive connections (and TLS sessions) to the provider.
+HTTP_MAX_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("LLM_HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_TIMEOUT = float(os.environ.get("LLM_HTTP_TIMEOUT", 60))
+
+_lock = threading.Lock()
+_http_client = None
+_async_http_client = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _client_options() -> Dict[str, Any]:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT),
+        "http2": _http2_available(),
+    }
+
+
+# Event hooks run on every client thread and event loop; the registry counter is locked
+def _count_sync(request) -> None:
+    LLM_HTTP_REQUESTS.inc(client="sync")
+
+
+async def _count_async(request) -> None:
+    LLM_HTTP_REQUESTS.inc(client="async")
+
+
+def get_http_clients() -> Tuple[Any, Any]:
+    """Process-wide (httpx.Client, httpx.AsyncClient) pair."""
+    global _http_client, _async_http_client
+    import httpx
+
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(event_hooks={"request": [_count_sync]}, **_client_options())
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(event_hooks={"request": [_count_async]}, **_client_options())
+        return _http_client, _async_http_client
 
+
+def _pool_connections(client) -> Dict[str, int]:
+    # httpx does not expose pool state publicly; read the httpcore pool if present
+    try:
+        connections = list(client._transport._pool.connections)
+    except AttributeError:
+        return {}
+    return {
+        "open": len(connections),
+        "idle": sum(1 for c in connections if c.is_idle()),
+    }
+
+
+# =============================
+# Model construction
+# =============================
 def make_openai_llm(
     model: str = "gpt-4o-mini",
     temperature: float = 0.2,
+    cache=None,
+    **options,
 ):
     """
     Returns a LangChain Runnable LLM compatible with:
     - LangChain pipe operator (|)
     - LangGraph
     - PromptTemplates
+
+    Responses go through the shared response cache (see llm_cache.py)
+    unless `cache=False`; pass a BaseCache to use a specific one.
+    Requests go through the process-wide pooled HTTP clients.
+    Extra `options` are passed to ChatOpenAI.
     """
 
     api_key = os.environ.get("OPENAI_API_KEY")
     if not api_key:
         raise EnvironmentError("OPENAI_API_KEY not set in environment.")
 
+    from langchain_openai import ChatOpenAI
+    from src.integrations.llm_cache import get_default_cache
+
+    if cache is None:
+        cache = get_default_cache()
+
+    http_client, async_http_client = get_http_clients()
+
     return ChatOpenAI(
         model=model,
         temperature=temperature,
         api_key=api_key,
+        cache=cache,
+        http_client=http_client,
+        http_async_client=async_http_client,
+        **options,
     )
+
+
+# =============================
+# Client registry
+# =============================
+_registry: Dict[tuple, Any] = {}
+_registry_stats = {"hits": 0, "misses": 0}
+
+
+def get_llm(model: str = "gpt-4o-mini", temperature: float = 0.2, **options):
+    """
+    Shared model instance for (model, temperature, options).
+    Prefer this over make_openai_llm on hot paths: repeated calls return the
+    same object instead of building a new client.
+    """
+    key = (model, temperature, tuple(sorted((k, repr(v)) for k, v in options.items())))
+    with _lock:
+        llm = _registry.get(key)
+        if llm is not None:
+            _registry_stats["hits"] += 1
+            return llm
+        _registry_stats["misses"] += 1
+
+    llm = make_openai_llm(model=model, temperature=temperature, **options)
+    with _lock:
+        return _registry.setdefault(key, llm)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Registry reuse and HTTP pool occupancy, to confirm connections are shared under load."""
+    with _lock:
+        stats: Dict[str, Any] = {
+            "registry_size": len(_registry),
+            "registry_hits": _registry_stats["hits"],
+            "registry_misses": _registry_stats["misses"],
+            "requests": {c: int(LLM_HTTP_REQUESTS.value(client=c)) for c in ("sync", "async")},
+            "http2": _http2_available(),
+            "max_connections": HTTP_MAX_CONNECTIONS,
+            "max_keepalive": HTTP_MAX_KEEPALIVE,
+        }
+        if _http_client is not None:
+            stats["sync_pool"] = _pool_connections(_http_client)
+        if _async_http_client is not None:
+            stats["async_pool"] = _pool_connections(_async_http_client)
+    return stats
@@ -0,0 +1,334 @@
+# integrations/transcription.py
+
+"""
+Speech-to-text for voice prompts.
+
+- Transcripts are cached by a SHA-256 of the audio bytes plus the backend,
+  model and language, in memory and as small JSON files on disk, so the same
+  upload (e.g. on every Streamlit rerun) is transcribed once.
+- Audio longer than one chunk is split with ffmpeg into mono 16 kHz pieces
+  that are transcribed in parallel and joined in order. Without ffmpeg the
+  whole file goes to the backend in one request.
+- Uploads and chunks live in a temporary directory that is always removed.
+
+Backends:
+- "openai" (default): the audio transcriptions API (gpt-4o-transcribe)
+- "whisper": local openai-whisper model; chunks run one at a time
+
+Configured from the environment:
+- TRANSCRIBE_BACKEND: "openai" or "whisper"
+- TRANSCRIBE_MODEL: backend model (default gpt-4o-transcribe / base)
+- TRANSCRIBE_CHUNK_S: chunk length in seconds (default 120)
+- TRANSCRIBE_WORKERS: chunks transcribed at once (default 4)
+- TRANSCRIBE_CACHE_DIR: transcript cache (default .cache/transcripts; "off" disables the disk tier)
+"""
+
+import abc
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+from src.observability.metrics import TRANSCRIPTIONS
+
+BACKEND = os.environ.get("TRANSCRIBE_BACKEND", "openai").lower()
+MODEL = os.environ.get("TRANSCRIBE_MODEL")
+CHUNK_S = float(os.environ.get("TRANSCRIBE_CHUNK_S", 120))
+WORKERS = int(os.environ.get("TRANSCRIBE_WORKERS", 4))
+CACHE_DIR = os.environ.get("TRANSCRIBE_CACHE_DIR", str(Path(".cache") / "transcripts"))
+MEMORY_ENTRIES = 256
+
+AudioSource = Union[bytes, bytearray, memoryview, BinaryIO, str, Path]
+
+
+class TranscriptionError(RuntimeError):
+    pass
+
+
+@dataclass
+class Transcript:
+    text: str
+    cached: bool = False
+    chunks: int = 1
+    duration_s: Optional[float] = None
+    seconds: float = 0.0
+
+
+# =============================
+# Backends
+# =============================
+class TranscriptionBackend(abc.ABC):
+    """Transcribes one audio file. `parallel` backends may be called from several threads."""
+
+    name = "base"
+    parallel = True
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @abc.abstractmethod
+    def transcribe(self, path: Path, language: Optional[str]) -> str:
+        ...
+
+
+class OpenAITranscriber(TranscriptionBackend):
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-4o-transcribe", timeout: float = 300):
+        super().__init__(model)
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import openai
+            from src.integrations.llm_client import get_http_clients
+
+            self._client = openai.OpenAI(http_client=get_http_clients()[0])
+        return self._client
+
+    def transcribe(self, path: Path, language: Optional[str]) -> str:
+        options = {"language": language} if language else {}
+        with open(path, "rb") as f:
+            result = self._get_client().audio.transcriptions.create(
+                file=f, model=self.model, timeout=self.timeout, **options
+            )
+        return result.text
+
+
+class LocalWhisperTranscriber(TranscriptionBackend):
+    name = "whisper"
+    parallel = False  # one model instance, CPU/GPU bound
+
+    def __init__(self, model: str = "base"):
+        super().__init__(model)
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            try:
+                import whisper
+            except ImportError:
+                whisper = None
+            # The `whisper` name on PyPI is an unrelated package; the model lives in openai-whisper
+            if whisper is None or not hasattr(whisper, "load_model"):
+                raise TranscriptionError(
+                    "TRANSCRIBE_BACKEND=whisper needs openai-whisper (pip install openai-whisper)"
+                )
+            self._model = whisper.load_model(self.model)
+        return self._model
+
+    def transcribe(self, path: Path, language: Optional[str]) -> str:
+        with self._lock:
+            result = self._get_model().transcribe(str(path), language=language)
+        return result["text"].strip()
+
+
+BACKENDS = {"openai": OpenAITranscriber, "whisper": LocalWhisperTranscriber}
+
+_backends: Dict[str, TranscriptionBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: Optional[str] = None) -> TranscriptionBackend:
+    """Shared backend instance (clients and models are loaded once)."""
+    name = (name or BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown TRANSCRIBE_BACKEND {name!r}; expected one of {tuple(BACKENDS)}")
+    with _backends_lock:
+        if name not in _backends:
+            # TRANSCRIBE_MODEL applies to the configured backend only
+            _backends[name] = BACKENDS[name](MODEL) if MODEL and name == BACKEND else BACKENDS[name]()
+        return _backends[name]
+
+
+# =============================
+# Cache
+# =============================
+class TranscriptCache:
+    """In-memory LRU in front of one JSON file per transcript."""
+
+    def __init__(self, directory: Optional[str] = CACHE_DIR, max_entries: int = MEMORY_ENTRIES):
+        self.directory = Path(directory) if directory and directory.lower() != "off" else None
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if self.directory is None:
+            return None
+        try:
+            entry = json.loads((self.directory / f"{key}.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        self._remember(key, entry)
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{key}.json.tmp"
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.directory / f"{key}.json")
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache: Optional[TranscriptCache] = None
+
+
+def get_cache() -> TranscriptCache:
+    global _cache
+    if _cache is None:
+        _cache = TranscriptCache()
+    return _cache
+
+
+# =============================
+# Audio handling
+# =============================
+def audio_digest(source: AudioSource) -> str:
+    """SHA-256 of the audio bytes; in-memory uploads are hashed without copying."""
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        digest.update(source)
+    elif hasattr(source, "getbuffer"):
+        digest.update(source.getbuffer())
+    elif isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        position = source.tell()
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+def _spool(source: AudioSource, directory: Path, suffix: str) -> Path:
+    if isinstance(source, (str, Path)):
+        return Path(source)
+    path = directory / f"input{suffix}"
+    with open(path, "wb") as out:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            out.write(source)
+        elif hasattr(source, "getbuffer"):
+            out.write(source.getbuffer())
+        else:
+            position = source.tell()
+            shutil.copyfileobj(source, out)
+            source.seek(position)
+    return path
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def probe_duration(path: Path) -> Optional[float]:
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+            capture_output=True, text=True, check=True, timeout=30,
+        ).stdout.strip()
+        return float(output)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def split_audio(path: Path, directory: Path, chunk_s: float) -> List[Path]:
+    """Mono 16 kHz MP3 chunks of `chunk_s` seconds, in order."""
+    pattern = directory / "chunk_%04d.mp3"
+    subprocess.run(
+        ["ffmpeg", "-v", "error", "-y", "-i", str(path), "-vn", "-ac", "1", "-ar", "16000",
+         "-f", "segment", "-segment_time", str(chunk_s), "-reset_timestamps", "1", str(pattern)],
+        capture_output=True, check=True, timeout=600,
+    )
+    return sorted(directory.glob("chunk_*.mp3"))
+
+
+# =============================
+# Public API
+# =============================
+def transcribe_audio(
+    source: AudioSource,
+    filename: str = "audio",
+    language: Optional[str] = "en",
+    backend: Optional[TranscriptionBackend] = None,
+    chunk_s: float = CHUNK_S,
+    workers: int = WORKERS,
+) -> Transcript:
+    """
+    Transcript of `source` (bytes, a file-like object such as a Streamlit
+    upload, or a path). Raises TranscriptionError when the backend fails.
+    """
+    backend = backend or get_backend()
+    start = time.perf_counter()
+    key = hashlib.sha256(
+        f"{audio_digest(source)}|{backend.name}|{backend.model}|{language}".encode("utf-8")
+    ).hexdigest()
+
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        TRANSCRIPTIONS.inc(result="cache_hit")
+        return Transcript(
+            text=entry["text"], cached=True, chunks=entry.get("chunks", 1),
+            duration_s=entry.get("duration_s"), seconds=time.perf_counter() - start,
+        )
+
+    suffix = Path(filename).suffix or ".audio"
+    with tempfile.TemporaryDirectory(prefix="emailgen-audio-") as tmp:
+        directory = Path(tmp)
+        path = _spool(source, directory, suffix)
+
+        duration = probe_duration(path) if ffmpeg_available() else None
+        pieces = [path]
+        if duration is not None and duration > chunk_s * 1.1:
+            try:
+                pieces = split_audio(path, directory, chunk_s) or [path]
+            except (OSError, subprocess.SubprocessError):
+                pieces = [path]
+
+        try:
+            if len(pieces) == 1:
+                texts = [backend.transcribe(pieces[0], language)]
+            else:
+                pool = max(1, min(workers, len(pieces))) if backend.parallel else 1
+                with ThreadPoolExecutor(max_workers=pool, thread_name_prefix="transcribe") as executor:
+                    texts = list(executor.map(lambda p: backend.transcribe(p, language), pieces))
+        except TranscriptionError:
+            TRANSCRIPTIONS.inc(result="error")
+            raise
+        except Exception as e:
+            TRANSCRIPTIONS.inc(result="error")
+            raise TranscriptionError(f"{type(e).__name__}: {e}") from e
+
+    text = " ".join(t.strip() for t in texts if t and t.strip())
+    cache.put(key, {"text": text, "chunks": len(pieces), "duration_s": duration, "backend": backend.name})
+    TRANSCRIPTIONS.inc(result="transcribed")
+    return Transcript(
+        text=text, cached=False, chunks=len(pieces), duration_s=duration, seconds=time.perf_counter() - start
+    )
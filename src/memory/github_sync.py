@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+github_sync.py
+
+Background worker that mirrors store snapshots to a GitHub repository.
+
+Writers call enqueue() and return immediately. Pending writes are keyed by
+repo path, so several writes to the same file inside one debounce window
+collapse into a single commit of the latest snapshot. The worker keeps one
+GitHub client, remembers file SHAs between commits, retries with exponential
+backoff, and drains the queue on shutdown.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubSyncWorker:
+    def __init__(
+        self,
+        token: str,
+        repo_name: str,
+        client_factory: Optional[Callable[[str], Any]] = None,
+        debounce_seconds: float = 5.0,
+        max_retries: int = 4,
+        backoff_seconds: float = 1.0,
+    ):
+        if client_factory is None:
+            from github import Github
+            client_factory = Github
+
+        self.token = token
+        self.repo_name = repo_name
+        self.client_factory = client_factory
+        self.debounce_seconds = debounce_seconds
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+        self._cond = threading.Condition()
+        # repo_path -> (snapshot_fn, commit_message, first_enqueued_at)
+        self._pending: Dict[str, tuple] = {}
+        self._in_flight = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._client = None
+        self._repo = None
+        self._shas: Dict[str, str] = {}
+
+        self._stats = {
+            "enqueued": 0,
+            "merged": 0,
+            "commits": 0,
+            "retries": 0,
+            "failures": 0,
+            "last_sync_at": None,
+            "last_error": None,
+        }
+
+    # =============================
+    # Producer side
+    # =============================
+    def enqueue(self, repo_path: str, snapshot_fn: Callable[[], Any], message: str) -> None:
+        """Schedule `repo_path` to be committed with whatever snapshot_fn() returns at flush time."""
+        with self._cond:
+            self._stats["enqueued"] += 1
+            if repo_path in self._pending:
+                self._stats["merged"] += 1
+                first_at = self._pending[repo_path][2]
+            else:
+                first_at = time.monotonic()
+            self._pending[repo_path] = (snapshot_fn, message, first_at)
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Commit everything pending now; returns False if it did not finish within timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                if self._thread is None or not self._thread.is_alive():
+                    return not self._pending
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._flush_requested = False
+            return True
+
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            oldest = min((entry[2] for entry in self._pending.values()), default=None)
+            return {
+                **self._stats,
+                "queue_depth": len(self._pending),
+                "in_flight": self._in_flight,
+                "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            }
+
+    # =============================
+    # Worker side
+    # =============================
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="github-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._pending:
+                    return
+
+                # Debounce: wait until the oldest pending write has aged one window
+                while self._pending and not self._flush_requested and not self._stopping:
+                    oldest = min(entry[2] for entry in self._pending.values())
+                    remaining = oldest + self.debounce_seconds - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._pending
+                self._pending = {}
+                self._in_flight = len(batch)
+                self._flush_requested = False
+
+            for repo_path, (snapshot_fn, message, _) in batch.items():
+                self._commit_with_retry(repo_path, snapshot_fn, message)
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _commit_with_retry(self, repo_path: str, snapshot_fn: Callable[[], Any], message: str) -> None:
+        try:
+            content = json.dumps(snapshot_fn(), indent=2, ensure_ascii=False)
+        except Exception as e:
+            self._record_failure(repo_path, e)
+            return
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._commit(repo_path, content, message)
+                with self._cond:
+                    self._stats["commits"] += 1
+                    self._stats["last_sync_at"] = time.time()
+                return
+            except Exception as e:
+                # Stale SHA or dropped connection: refetch on the next attempt
+                self._shas.pop(repo_path, None)
+                self._repo = None
+                if attempt == self.max_retries:
+                    self._record_failure(repo_path, e)
+                    return
+                with self._cond:
+                    self._stats["retries"] += 1
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+
+    def _record_failure(self, repo_path: str, error: Exception) -> None:
+        with self._cond:
+            self._stats["failures"] += 1
+            self._stats["last_error"] = f"{repo_path}: {error}"
+        # Never crash the app because of GitHub
+        logger.error("GitHub sync of %s failed: %s", repo_path, error)
+
+    def _get_repo(self):
+        if self._client is None:
+            self._client = self.client_factory(self.token)
+        if self._repo is None:
+            self._repo = self._client.get_repo(self.repo_name)
+        return self._repo
+
+    def _commit(self, repo_path: str, content: str, message: str) -> None:
+        repo = self._get_repo()
+        sha = self._shas.get(repo_path)
+        if sha is None:
+            try:
+                sha = repo.get_contents(repo_path).sha
+            except Exception as e:
+                # Only "not found" means create; anything else is retried
+                if not _is_not_found(e):
+                    raise
+                sha = None
+
+        if sha is None:
+            result = repo.create_file(path=repo_path, message=f"Create {repo_path}", content=content)
+        else:
+            result = repo.update_file(path=repo_path, message=message, content=content, sha=sha)
+
+        new_content = result.get("content") if isinstance(result, dict) else None
+        if new_content is not None:
+            self._shas[repo_path] = new_content.sha
+
+
+def _is_not_found(error: Exception) -> bool:
+    # PyGithub raises UnknownObjectException (status 404); FakeGithub raises FileNotFoundError
+    return isinstance(error, FileNotFoundError) or getattr(error, "status", None) == 404
+
+
+# =============================
+# Process-wide worker
+# =============================
+_worker: Optional[GitHubSyncWorker] = None
+_worker_lock = threading.Lock()
+
+
+def get_sync_worker(token: str, repo_name: str, **kwargs) -> GitHubSyncWorker:
+    """Shared worker for (token, repo); flushed automatically at interpreter exit."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or (_worker.token, _worker.repo_name) != (token, repo_name):
+            if _worker is not None:
+                _worker.stop()
+            _worker = GitHubSyncWorker(token, repo_name, **kwargs)
+            atexit.register(_worker.stop)
+        return _worker
+
+
+def sync_metrics() -> Dict[str, Any]:
+    return _worker.metrics() if _worker is not None else {"enabled": False}
@@ -2,50 +2,156 @@
 """
 store.py
 
-Unified JSON-backed persistence for:
+Unified SQLite-backed persistence for:
 - User profiles
+- Sent-email history (append-only, capped per user)
 - Evaluation history
+- Intent classification log (training data for the local intent classifier)
 
 Features:
-- Safe JSON loading
-- Atomic writes
-- Optional GitHub sync (profiles + evals)
+- One row per user / per evaluation (no whole-file rewrites)
+- WAL mode so readers never block the writer
+- Transactional upserts, safe across threads and processes
+- Indexed eval timestamps for newest-first history
+- One-time migration from the legacy JSON files
+- Optional GitHub sync (profiles + evals, one file per day), batched on a background worker
+- Version stamps (data_version) so UI caches can tell when to reload
 """
 
 import json
+import logging
 import os
+import sqlite3
+import threading
+import time
 import uuid
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
-import streamlit as st
+from src.observability.metrics import timed_store_operation
+
+logger = logging.getLogger(__name__)
 
 # =============================
 # Paths
 # =============================
 BASE_DIR = Path(__file__).parent
 
+DB_PATH = Path(os.environ.get("MEMORY_DB_PATH", BASE_DIR / "store.sqlite3"))
+
+# Sent-example retention per user; compaction runs every SENT_COMPACT_EVERY appends
+# by that user
+SENT_EXAMPLES_MAX = int(os.environ.get("SENT_EXAMPLES_MAX", 200))
+SENT_EXAMPLES_MAX_AGE_DAYS = int(os.environ.get("SENT_EXAMPLES_MAX_AGE_DAYS", 90))
+SENT_COMPACT_EVERY = 50
+
+# Legacy JSON files, read once by migrate_from_json()
 PROFILE_PATH = BASE_DIR / "user_profiles.json"
 EVAL_PATH = BASE_DIR / "eval_history.json"
 
 # =============================
 # GitHub Sync Config
 # =============================
-try:
-    from github import Github
-except ImportError:
-    Github = None
+# Read from the environment; the Streamlit app passes its secrets in through
+# configure_github_sync(), so this module never imports Streamlit.
+from src.memory.github_sync import get_sync_worker
 
-GITHUB_TOKEN = st.secrets.get("GITHUB_TOKEN")
-REPO_NAME = st.secrets.get("GITHUB_REPO")
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
+REPO_NAME = os.environ.get("GITHUB_REPO") or os.environ.get("REPO_NAME")
 
 PROFILE_REPO_PATH = "src/memory/user_profiles.json"
-EVAL_REPO_PATH = "src/memory/eval_history.json"
+# Evals sync as one file per UTC day, so a commit carries that day's records
+# rather than the whole history
+EVAL_REPO_DIR = "src/memory/evals"
 
 # =============================
-# Generic JSON helpers
+# SQLite helpers
 # =============================
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id    TEXT PRIMARY KEY,
+    data       TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS evals (
+    eval_id   TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    prompt    TEXT NOT NULL,
+    subject   TEXT NOT NULL,
+    body      TEXT NOT NULL,
+    scores    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evals_timestamp ON evals (timestamp);
+CREATE TABLE IF NOT EXISTS sent_examples (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    subject    TEXT NOT NULL,
+    body       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sent_examples_user ON sent_examples (user_id, id);
+CREATE TABLE IF NOT EXISTS intent_log (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    prompt     TEXT NOT NULL,
+    label      TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    llm_label  TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_local = threading.local()
+_init_lock = threading.Lock()
+_initialized = set()
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection to DB_PATH; creates the schema and migrates on first use."""
+    path = Path(DB_PATH)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+
+    conn = conns.get(path)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[path] = conn
+
+    if path not in _initialized:
+        with _init_lock:
+            if path not in _initialized:
+                conn.executescript(_SCHEMA)
+                migrate_from_json(conn)
+                _split_sent_examples(conn)
+                _initialized.add(path)
+
+    return conn
+
+
+class _transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
 def _safe_load(path: Path, default):
     if not path.exists():
         return default
@@ -59,113 +165,376 @@ def _safe_load(path: Path, default):
         return default
 
 
-def _atomic_save(path: Path, data: Any):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+# =============================
+# Migration
+# =============================
+def migrate_from_json(conn: sqlite3.Connection = None) -> bool:
+    """
+    Import user_profiles.json and eval_history.json into SQLite.
+    Runs once per database; returns True if it did the import.
+    """
+    conn = conn or _connect()
+    with _transaction(conn):
+        done = conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone()
+        if done:
+            return False
+
+        for user_id, profile in _safe_load(PROFILE_PATH, {}).items():
+            conn.execute(
+                "INSERT OR IGNORE INTO profiles (user_id, data, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(profile, ensure_ascii=False), _now()),
+            )
+            # _split_sent_examples moves any embedded sent_examples out afterwards
+
+        for record in _safe_load(EVAL_PATH, []):
+            conn.execute(
+                "INSERT OR IGNORE INTO evals (eval_id, timestamp, prompt, subject, body, scores)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record.get("eval_id") or str(uuid.uuid4()),
+                    record.get("timestamp") or _now(),
+                    record.get("prompt", ""),
+                    record.get("subject", ""),
+                    record.get("body", ""),
+                    json.dumps(record.get("scores", {}), ensure_ascii=False),
+                ),
+            )
+
+        conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (_now(),))
+    return True
+
+
+def _split_sent_examples(conn: sqlite3.Connection) -> None:
+    """Move sent_examples lists embedded in profile rows into the sent_examples table."""
+    with _transaction(conn):
+        done = conn.execute("SELECT 1 FROM meta WHERE key = 'sent_examples_split'").fetchone()
+        if done:
+            return
+
+        rows = conn.execute("SELECT user_id, data FROM profiles").fetchall()
+        for row in rows:
+            profile = json.loads(row["data"])
+            examples = profile.pop("sent_examples", None)
+            if examples is None:
+                continue
+            # The counter covers every example ever sent, including those past the cap
+            if examples:
+                profile["sent_examples_total"] = profile.get("sent_examples_total", 0) + len(examples)
+                profile["last_sent_at"] = _now()
+            for example in examples[-SENT_EXAMPLES_MAX:]:
+                _insert_sent_example(conn, row["user_id"], example)
+            _upsert_row(conn, row["user_id"], profile, keep_counters=False)
+
+        conn.execute("INSERT INTO meta (key, value) VALUES ('sent_examples_split', ?)", (_now(),))
+
+
+# =============================
+# Version stamps
+# =============================
+# One empty file per data kind next to the database; every committed write
+# bumps its mtime. Reading a version is a stat() call, so callers such as the
+# Streamlit app can key their caches on it and see writes made by other
+# sessions and processes without querying the database.
+DATA_KINDS = ("profiles", "evals")
+
+
+def _stamp_path(kind: str) -> Path:
+    return Path(f"{DB_PATH}.{kind}.stamp")
 
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
 
-    os.replace(tmp, path)
+def _bump_version(kind: str) -> None:
+    path = _stamp_path(kind)
+    try:
+        path.touch()
+        now = time.time_ns()
+        # Never go backwards, and differ from the previous stamp even on coarse clocks
+        now = max(now, path.stat().st_mtime_ns + 1)
+        os.utime(path, ns=(now, now))
+    except OSError:
+        pass
+
+
+def data_version(kind: str) -> int:
+    """Version of `kind` ("profiles" or "evals"); changes after every write, 0 before the first."""
+    if kind not in DATA_KINDS:
+        raise ValueError(f"Unknown data kind {kind!r}; expected one of {DATA_KINDS}")
+    try:
+        return _stamp_path(kind).stat().st_mtime_ns
+    except OSError:
+        return 0
 
 
 # =============================
 # GitHub Sync Helpers
 # =============================
-def _push_to_github(repo_path: str, data: Any, commit_message: str):
-    if not Github or not GITHUB_TOKEN or not REPO_NAME:
-        return
+def configure_github_sync(token: str = None, repo_name: str = None) -> None:
+    global GITHUB_TOKEN, REPO_NAME
+    GITHUB_TOKEN = token or GITHUB_TOKEN
+    REPO_NAME = repo_name or REPO_NAME
+
 
+def _github_enabled() -> bool:
+    return bool(GITHUB_TOKEN and REPO_NAME)
+
+
+def _schedule_github_sync(repo_path: str, snapshot_fn, commit_message: str) -> None:
+    """Hand the write to the background sync worker; snapshots are taken at commit time."""
+    global GITHUB_TOKEN
+    if not _github_enabled():
+        return
     try:
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAME)
-        content = json.dumps(data, indent=2, ensure_ascii=False)
-
-        try:
-            existing = repo.get_contents(repo_path)
-            repo.update_file(
-                path=repo_path,
-                message=commit_message,
-                content=content,
-                sha=existing.sha,
-            )
-        except Exception:
-            repo.create_file(
-                path=repo_path,
-                message=f"Create {repo_path}",
-                content=content,
-            )
-    except Exception as e:
-        # Never crash the app because of GitHub
-        print(f"[GitHub Sync Error] {repo_path}: {e}")
+        worker = get_sync_worker(GITHUB_TOKEN, REPO_NAME)
+    except ImportError:
+        logger.error("PyGithub is not installed; GitHub sync disabled")
+        GITHUB_TOKEN = None
+        return
+    worker.enqueue(repo_path, snapshot_fn, commit_message)
 
 
 # =============================
 # Profile Store
 # =============================
+@timed_store_operation("load_profiles")
 def load_profiles() -> Dict[str, Any]:
-    return _safe_load(PROFILE_PATH, {})
+    """All profiles keyed by user id (export / sync only; use get_profile on hot paths)."""
+    rows = _connect().execute("SELECT user_id, data FROM profiles").fetchall()
+    return {row["user_id"]: json.loads(row["data"]) for row in rows}
 
 
+@timed_store_operation("save_profiles")
 def save_profiles(data: Dict[str, Any]) -> None:
-    _atomic_save(PROFILE_PATH, data)
-    _push_to_github(
+    _write_profiles(data)
+
+
+def _write_profiles(data: Dict[str, Any]) -> None:
+    # Untimed body shared by save_profiles and upsert_profile, so each write is timed once
+    conn = _connect()
+    with _transaction(conn):
+        for user_id, profile in data.items():
+            _upsert_row(conn, user_id, profile)
+    _bump_version("profiles")
+    _schedule_github_sync(
         PROFILE_REPO_PATH,
-        data,
+        load_profiles,
         "Update user_profiles.json",
     )
 
 
+# Maintained by append_sent_example; profile writes never overwrite them
+COUNTER_KEYS = ("sent_examples_total", "last_sent_at")
+
+
+def _upsert_row(
+    conn: sqlite3.Connection, user_id: str, profile: Dict[str, Any], keep_counters: bool = True
+) -> None:
+    """
+    Insert or replace a profile row. With `keep_counters`, an existing row's
+    COUNTER_KEYS survive, so a save based on an older read (e.g. the UI's
+    cached profile) cannot roll back sends recorded since.
+    """
+    # Sent history lives in its own table; never embed it in the profile row
+    if "sent_examples" in profile:
+        profile = {k: v for k, v in profile.items() if k != "sent_examples"}
+    if keep_counters:
+        # json_patch drops keys whose value is null, i.e. counters the row never had
+        merged = "json_patch(excluded.data, json_object({}))".format(
+            ", ".join(f"'{key}', json_extract(profiles.data, '$.{key}')" for key in COUNTER_KEYS)
+        )
+    else:
+        merged = "excluded.data"
+    conn.execute(
+        "INSERT INTO profiles (user_id, data, updated_at) VALUES (?, ?, ?)"
+        f" ON CONFLICT(user_id) DO UPDATE SET data = {merged}, updated_at = excluded.updated_at",
+        (user_id, json.dumps(profile, ensure_ascii=False), _now()),
+    )
+
+
+@timed_store_operation("get_profile")
 def get_profile(user_id: str = "default") -> Dict[str, Any]:
-    return load_profiles().get(user_id, {})
+    row = _connect().execute(
+        "SELECT data FROM profiles WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return json.loads(row["data"]) if row else {}
 
 
+@timed_store_operation("upsert_profile")
 def upsert_profile(user_id: str, profile: Dict[str, Any]) -> None:
-    data = load_profiles()
-    data[user_id] = profile
-    save_profiles(data)
+    _write_profiles({user_id: profile})
+
+
+# =============================
+# Sent Examples
+# =============================
+def _insert_sent_example(conn: sqlite3.Connection, user_id: str, draft: Dict[str, Any]) -> int:
+    cur = conn.execute(
+        "INSERT INTO sent_examples (user_id, created_at, subject, body) VALUES (?, ?, ?, ?)",
+        (user_id, _now(), draft.get("subject", "") or "", draft.get("body", "") or ""),
+    )
+    return cur.lastrowid
+
+
+@timed_store_operation("append_sent_example")
+def append_sent_example(user_id: str, draft: Dict[str, Any]) -> None:
+    """
+    Append one sent draft to the user's history.
+    The profile row only gets a counter and timestamp, so it stays small.
+    The user's history is compacted every SENT_COMPACT_EVERY of their appends.
+    """
+    conn = _connect()
+    with _transaction(conn):
+        _insert_sent_example(conn, user_id, draft)
+        now = _now()
+        conn.execute(
+            "INSERT INTO profiles (user_id, data, updated_at) VALUES (?, '{}', ?)"
+            " ON CONFLICT(user_id) DO NOTHING",
+            (user_id, now),
+        )
+        conn.execute(
+            "UPDATE profiles SET data = json_set(data,"
+            " '$.sent_examples_total', COALESCE(json_extract(data, '$.sent_examples_total'), 0) + 1,"
+            " '$.last_sent_at', ?), updated_at = ? WHERE user_id = ?",
+            (now, now, user_id),
+        )
+        total = conn.execute(
+            "SELECT json_extract(data, '$.sent_examples_total') FROM profiles WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+        if total % SENT_COMPACT_EVERY == 0:
+            _compact(conn, user_id)
+    _bump_version("profiles")
+
+
+@timed_store_operation("get_sent_examples")
+def get_sent_examples(user_id: str = "default", limit: int = 20) -> List[Dict[str, Any]]:
+    """Most recent sent drafts, newest first."""
+    rows = _connect().execute(
+        "SELECT subject, body, created_at FROM sent_examples WHERE user_id = ?"
+        " ORDER BY id DESC LIMIT ?",
+        (user_id, limit),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _compact(conn: sqlite3.Connection, user_id: str) -> int:
+    cutoff = (datetime.utcnow() - timedelta(days=SENT_EXAMPLES_MAX_AGE_DAYS)).isoformat()
+    removed = conn.execute(
+        "DELETE FROM sent_examples WHERE user_id = ? AND created_at < ?", (user_id, cutoff)
+    ).rowcount
+    removed += conn.execute(
+        "DELETE FROM sent_examples WHERE user_id = ? AND id <= ("
+        " SELECT id FROM sent_examples WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+        (user_id, user_id, SENT_EXAMPLES_MAX),
+    ).rowcount
+    return removed
+
+
+@timed_store_operation("compact_sent_examples")
+def compact_sent_examples(user_id: str = None) -> int:
+    """Apply the count and age caps now, for one user or all; returns rows removed."""
+    conn = _connect()
+    with _transaction(conn):
+        if user_id is not None:
+            return _compact(conn, user_id)
+        users = [r["user_id"] for r in conn.execute("SELECT DISTINCT user_id FROM sent_examples")]
+        return sum(_compact(conn, u) for u in users)
 
 
 # =============================
 # Eval Store
 # =============================
-def _load_evals() -> List[Dict[str, Any]]:
-    return _safe_load(EVAL_PATH, [])
+def _row_to_eval(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    record["scores"] = json.loads(record["scores"])
+    return record
 
 
-def _save_evals(records: List[Dict[str, Any]]) -> None:
-    _atomic_save(EVAL_PATH, records)
-    _push_to_github(
-        EVAL_REPO_PATH,
-        records,
-        "Update eval_history.json",
-    )
+def _load_evals_for_day(day: str) -> List[Dict[str, Any]]:
+    """One UTC day's evaluations (`day` is YYYY-MM-DD), oldest first, from the timestamp index."""
+    next_day = (datetime.fromisoformat(day) + timedelta(days=1)).date().isoformat()
+    rows = _connect().execute(
+        "SELECT eval_id, timestamp, prompt, subject, body, scores FROM evals"
+        " WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp",
+        (day, next_day),
+    ).fetchall()
+    return [_row_to_eval(row) for row in rows]
 
 
+@timed_store_operation("save_eval")
 def save_eval(
     prompt: str,
     draft: Dict[str, Any],
     scores: Dict[str, Any],
 ) -> str:
-    records = _load_evals()
-
     eval_id = str(uuid.uuid4())
-
-    records.append(
-        {
-            "eval_id": eval_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "prompt": prompt,
-            "subject": draft.get("subject", ""),
-            "body": draft.get("body", ""),
-            "scores": scores,
-        }
+    timestamp = _now()
+
+    conn = _connect()
+    with _transaction(conn):
+        conn.execute(
+            "INSERT INTO evals (eval_id, timestamp, prompt, subject, body, scores)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                eval_id,
+                timestamp,
+                prompt,
+                draft.get("subject", ""),
+                draft.get("body", ""),
+                json.dumps(scores, ensure_ascii=False),
+            ),
+        )
+    _bump_version("evals")
+
+    day = timestamp[:10]
+    _schedule_github_sync(
+        f"{EVAL_REPO_DIR}/{day}.json",
+        lambda: _load_evals_for_day(day),
+        f"Update evals/{day}.json",
     )
-
-    _save_evals(records)
     return eval_id
 
 
-def get_eval_history(limit: int = 50) -> List[Dict[str, Any]]:
-    records = _load_evals()
-    return sorted(records, key=lambda r: r["timestamp"], reverse=True)[:limit]
\ No newline at end of file
+@timed_store_operation("get_eval_history")
+def get_eval_history(limit: int = 50, offset: int = 0, since: str = None) -> List[Dict[str, Any]]:
+    """
+    Newest-first page of evaluations, served from the timestamp index.
+    `since` (ISO timestamp) keeps only records at or after that time.
+    """
+    query = "SELECT eval_id, timestamp, prompt, subject, body, scores FROM evals"
+    params: list = []
+    if since:
+        query += " WHERE timestamp >= ?"
+        params.append(since)
+    query += " ORDER BY timestamp DESC LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+
+    rows = _connect().execute(query, params).fetchall()
+    return [_row_to_eval(row) for row in rows]
+
+
+# =============================
+# Intent Log
+# =============================
+@timed_store_operation("log_intent")
+def log_intent(prompt: str, label: str, source: str, llm_label: str = None) -> None:
+    """
+    Record one intent decision. `source` is "llm", "rules" or "model";
+    `llm_label` is the LLM's answer when known (always for "llm" rows).
+    """
+    _connect().execute(
+        "INSERT INTO intent_log (created_at, prompt, label, source, llm_label) VALUES (?, ?, ?, ?, ?)",
+        (_now(), prompt, label, source, llm_label),
+    )
+
+
+@timed_store_operation("get_intent_log")
+def get_intent_log(limit: int = 1000) -> List[Dict[str, Any]]:
+    """The most recent `limit` intent decisions, oldest first."""
+    rows = _connect().execute(
+        "SELECT * FROM (SELECT id, created_at, prompt, label, source, llm_label FROM intent_log"
+        " ORDER BY id DESC LIMIT ?) ORDER BY id",
+        (limit,),
+    ).fetchall()
+    return [dict(row) for row in rows]
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Dec 11 12:17:16 2025
+
+@author: Shankar P
+"""
+
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+
+In-process metrics registry with a Prometheus text endpoint.
+
+- Counter, Gauge (set or computed on scrape) and Histogram (fixed buckets,
+  p50/p95/p99 estimated from the buckets for the JSON view)
+- render() produces the Prometheus text exposition format
+- start_metrics_server() serves /metrics (Prometheus) and /metrics.json on a
+  daemon thread; set METRICS_PORT to have the app start it
+
+Standard library only, so the store and agents can record metrics without
+pulling in a client library.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; covers local nodes (~ms) up to slow LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labelnames: Sequence[str], labels: Dict[str, str]) -> Tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {list(labelnames)}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# =============================
+# Metric types
+# =============================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        # Unlabelled counters are exported as 0 before their first increment
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items
+        ]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {",".join(key) or "_": v for key, v in sorted(self._values.items())}
+
+
+class Gauge(_Metric):
+    """Set directly, or pass `callback` returning {label values tuple: value} evaluated on scrape."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), callback: Optional[Callable[[], Dict[tuple, float]]] = None):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def _current(self) -> Dict[Tuple[str, ...], float]:
+        if self._callback is None:
+            with self._lock:
+                return dict(self._values)
+        try:
+            return {tuple(str(v) for v in k): float(v) for k, v in self._callback().items()}
+        except Exception as e:
+            logger.warning("gauge %s callback failed: %s: %s", self.name, type(e).__name__, e)
+            return {}
+
+    def samples(self) -> List[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in sorted(self._current().items())
+        ]
+
+    def snapshot(self) -> Dict[str, float]:
+        return {",".join(key) or "_": v for key, v in sorted(self._current().items())}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate like Prometheus' histogram_quantile: linear within the bucket."""
+        with self._lock:
+            series = self._series.get(_label_key(self.labelnames, labels))
+            counts = list(series[0]) if series else None
+        return self._quantile(counts, q)
+
+    def _quantile(self, counts: Optional[List[int]], q: float) -> Optional[float]:
+        if not counts or not sum(counts):
+            return None
+        rank = q * sum(counts)
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # in +Inf: report the top finite bound
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + [math.inf], counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            items = sorted((k, (list(s[0]), s[1], s[2])) for k, s in self._series.items())
+        return {
+            ",".join(key) or "_": {
+                "count": count,
+                "mean": round(total / count, 6) if count else None,
+                "p50": self._quantile(counts, 0.50),
+                "p95": self._quantile(counts, 0.95),
+                "p99": self._quantile(counts, 0.99),
+            }
+            for key, (counts, total, count) in items
+        }
+
+
+# =============================
+# Registry
+# =============================
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames, callback))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+REGISTRY = Registry()
+
+
+# =============================
+# Application metrics
+# =============================
+NODE_DURATION = REGISTRY.histogram(
+    "emailgen_node_duration_seconds", "Workflow node execution time", ["node", "status"])
+LLM_CALLS = REGISTRY.counter(
+    "emailgen_llm_calls_total", "LLM calls made by workflow nodes", ["node"])
+LLM_TOKENS = REGISTRY.counter(
+    "emailgen_llm_tokens_total", "LLM tokens by node and kind (input, output, cached)", ["node", "kind"])
+PARSE_RESULTS = REGISTRY.counter(
+    "emailgen_json_parse_total", "Structured-output parse attempts by agent and result", ["agent", "result"])
+REWRITES = REGISTRY.counter(
+    "emailgen_rewrites_total", "Review -> draft_writer rewrite loops")
+BUDGET_STOPS = REGISTRY.counter(
+    "emailgen_budget_stops_total", "Runs stopped early by the request budget", ["reason"])
+INTENT_DECISIONS = REGISTRY.counter(
+    "emailgen_intent_decisions_total", "Intent decisions by source (rules, model, llm)", ["source"])
+STORE_DURATION = REGISTRY.histogram(
+    "emailgen_store_operation_seconds", "Memory store operation time", ["operation"])
+DRAFT_SELECTIONS = REGISTRY.counter(
+    "emailgen_draft_selections_total", "n-best draft selections by pick (first candidate or another)", ["pick"])
+TRANSCRIPTIONS = REGISTRY.counter(
+    "emailgen_transcriptions_total", "Voice transcriptions by result (cache_hit, transcribed, error)", ["result"])
+LLM_HTTP_REQUESTS = REGISTRY.counter(
+    "emailgen_llm_http_requests_total", "HTTP requests sent by the shared LLM clients", ["client"])
+EVAL_JOBS = REGISTRY.counter(
+    "emailgen_eval_jobs_total", "Background judge jobs by status (skipped, submitted, done, failed)", ["status"])
+
+
+def _cache_ratios() -> Dict[tuple, float]:
+    ratios = {}
+    # Only report caches that are already loaded; scraping must not import LangChain
+    llm_cache = sys.modules.get("src.integrations.llm_cache")
+    if llm_cache is not None:
+        stats = llm_cache.cache_stats()
+        if stats.get("enabled", True):
+            ratios[("llm_response",)] = stats.get("hit_ratio", 0.0)
+    chain_cache = sys.modules.get("src.agents.chain_cache")
+    if chain_cache is not None:
+        stats = chain_cache.chain_cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratios[("chain",)] = stats["hits"] / lookups if lookups else 0.0
+    return ratios
+
+
+def _sync_queue() -> Dict[tuple, float]:
+    github_sync = sys.modules.get("src.memory.github_sync")
+    stats = github_sync.sync_metrics() if github_sync is not None else {}
+    return {(): stats.get("queue_depth", 0)}
+
+
+def _eval_pending() -> Dict[tuple, float]:
+    eval_queue = sys.modules.get("src.eval.eval_queue")
+    return {(): eval_queue.eval_queue_stats()["pending"] if eval_queue is not None else 0}
+
+
+REGISTRY.gauge("emailgen_cache_hit_ratio", "Hit ratio of in-process caches", ["cache"], callback=_cache_ratios)
+REGISTRY.gauge("emailgen_github_sync_queue_depth", "Store snapshots waiting for GitHub sync", callback=_sync_queue)
+REGISTRY.gauge("emailgen_eval_queue_pending", "Background judge jobs not finished yet", callback=_eval_pending)
+
+
+def observe_node(node: str, duration_ns: int, usage: Optional[Dict[str, int]], error: bool = False) -> None:
+    """Record one workflow node execution (called by traced_node for every run, sampled or not)."""
+    NODE_DURATION.observe(duration_ns / 1e9, node=node, status="error" if error else "ok")
+    record_llm_usage(node, usage)
+
+
+def record_llm_usage(node: str, usage: Optional[Dict[str, int]]) -> None:
+    """Count LLM calls and tokens under `node`, including calls made outside a workflow node."""
+    if not usage:
+        return
+    if usage.get("llm_calls"):
+        LLM_CALLS.inc(usage["llm_calls"], node=node)
+    for kind in ("input", "output", "cached"):
+        tokens = usage.get(f"{kind}_tokens", 0)
+        if tokens:
+            LLM_TOKENS.inc(tokens, node=node, kind=kind)
+
+
+def timed_store_operation(operation: str):
+    """Decorator: time a store function into STORE_DURATION under `operation`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STORE_DURATION.observe(time.perf_counter() - start, operation=operation)
+
+        return wrapper
+    return decorator
+
+
+# =============================
+# HTTP scrape endpoint
+# =============================
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = 9464, host: str = "0.0.0.0"):
+    """Serve /metrics and /metrics.json on a daemon thread (once per process)."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body = REGISTRY.render().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body = json.dumps(REGISTRY.snapshot(), default=str).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics %s", format % args)
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info("metrics endpoint on http://%s:%d/metrics", host, port)
+        return _server
+
+
+def start_metrics_server_from_env() -> None:
+    """Start the endpoint if METRICS_PORT is set; safe to call on every app rerun."""
+    port = os.environ.get("METRICS_PORT")
+    if port:
+        try:
+            start_metrics_server(int(port))
+        except OSError as e:
+            logger.warning("metrics endpoint not started on port %s: %s", port, e)
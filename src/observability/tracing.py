@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+tracing.py
+
+Low-overhead span recording for workflow nodes.
+
+- Spans hold names, key lists, perf_counter_ns durations, token usage and
+  the size of each node's output; nothing from the state is copied.
+- Finished spans go into a bounded ring buffer (oldest dropped first) and a
+  background thread hands them to the configured exporters in batches.
+- Sampling is decided once per trace (workflow run), so a run is either
+  fully recorded or not at all; unsampled spans cost one hash.
+
+Configuration (environment):
+- TRACE_SAMPLE_RATE: 0.0-1.0, share of runs recorded (default 0.01; 1.0 to debug)
+- TRACE_BUFFER_SIZE: ring buffer capacity in spans (default 2048)
+- TRACE_EXPORTERS: comma list of "jsonl", "otlp" (default: none)
+- TRACE_JSONL_PATH: JSONL exporter file (default runs/traces.jsonl)
+- TRACE_OTLP_ENDPOINT: OTLP/HTTP JSON endpoint, e.g. http://localhost:4318/v1/traces
+- TRACE_OTLP_PATH: write OTLP JSON lines to a file instead of an endpoint
+"""
+
+import abc
+import atexit
+import json
+import logging
+import os
+import secrets
+import threading
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0.01))
+BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 2048))
+EXPORT_INTERVAL_S = float(os.environ.get("TRACE_EXPORT_INTERVAL_S", 2.0))
+EXPORT_BATCH_SIZE = 256
+
+SERVICE_NAME = "email-generator"
+
+
+# =============================
+# Spans
+# =============================
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    name: str
+    start_unix_ns: int
+    duration_ns: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "name": self.name,
+            "start_unix_ns": self.start_unix_ns,
+            "duration_ms": round(self.duration_ns / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def trace_id_for(run_id: Optional[str]) -> str:
+    """Stable 32-hex trace id for a run id (e.g. the checkpointer thread_id)."""
+    if not run_id:
+        return new_trace_id()
+    hex_id = str(run_id).replace("-", "").lower()
+    if len(hex_id) == 32 and all(c in "0123456789abcdef" for c in hex_id):
+        return hex_id
+    return f"{zlib.crc32(str(run_id).encode('utf-8')):08x}".rjust(32, "0")
+
+
+# =============================
+# Ring buffer
+# =============================
+class SpanBuffer:
+    """Bounded FIFO of finished spans; full buffers drop the oldest span."""
+
+    def __init__(self, capacity: int = BUFFER_SIZE):
+        self._spans: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._pending = 0  # spans not yet exported
+        self.dropped = 0
+
+    def append(self, span: Span) -> int:
+        with self._lock:
+            if len(self._spans) == self._spans.maxlen and self._pending == len(self._spans):
+                self.dropped += 1
+            self._spans.append(span)
+            self._pending = min(self._pending + 1, len(self._spans))
+            return self._pending
+
+    def take_pending(self) -> List[Span]:
+        """Spans added since the last call, oldest first (they stay readable via recent())."""
+        with self._lock:
+            if not self._pending:
+                return []
+            spans = list(self._spans)[-self._pending:]
+            self._pending = 0
+            return spans
+
+    def recent(self, limit: int = 100) -> List[Span]:
+        with self._lock:
+            return list(self._spans)[-limit:]
+
+
+# =============================
+# Exporters
+# =============================
+class SpanExporter(abc.ABC):
+    """Exporter interface: receives batches of finished spans on the export thread."""
+
+    @abc.abstractmethod
+    def export(self, spans: List[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        pass
+
+
+class JSONLExporter(SpanExporter):
+    """One JSON object per span, appended to `path`."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """OTLP/JSON ExportTraceServiceRequest body for `spans`."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "src.observability.tracing"},
+                "spans": [
+                    {
+                        "traceId": span.trace_id,
+                        "spanId": span.span_id,
+                        "name": span.name,
+                        "kind": 1,  # SPAN_KIND_INTERNAL
+                        "startTimeUnixNano": str(span.start_unix_ns),
+                        "endTimeUnixNano": str(span.start_unix_ns + span.duration_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)}
+                            for key, value in span.attributes.items()
+                        ],
+                        "status": {"code": 2 if span.status == "error" else 1},
+                    }
+                    for span in spans
+                ],
+            }],
+        }]
+    }
+
+
+class OTLPJSONExporter(SpanExporter):
+    """
+    OpenTelemetry-compatible export without the OpenTelemetry SDK: POSTs
+    OTLP/JSON to `endpoint` (a collector's /v1/traces), or appends one
+    request body per line to `path`.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, path=None, timeout: float = 5.0):
+        if not endpoint and not path:
+            raise ValueError("OTLPJSONExporter needs an endpoint or a path")
+        self.endpoint = endpoint
+        self.path = Path(path) if path else None
+        self.timeout = timeout
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        body = json.dumps(to_otlp(spans), default=str)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(body + "\n")
+            return
+
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.endpoint,
+            data=body.encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def exporters_from_env() -> List[SpanExporter]:
+    exporters: List[SpanExporter] = []
+    names = {n.strip().lower() for n in os.environ.get("TRACE_EXPORTERS", "").split(",") if n.strip()}
+    if "jsonl" in names:
+        exporters.append(JSONLExporter(os.environ.get("TRACE_JSONL_PATH", "runs/traces.jsonl")))
+    if "otlp" in names:
+        exporters.append(OTLPJSONExporter(
+            endpoint=os.environ.get("TRACE_OTLP_ENDPOINT"),
+            path=os.environ.get("TRACE_OTLP_PATH") or (
+                None if os.environ.get("TRACE_OTLP_ENDPOINT") else "runs/traces.otlp.jsonl"
+            ),
+        ))
+    return exporters
+
+
+# =============================
+# Tracer
+# =============================
+class Tracer:
+    def __init__(
+        self,
+        sample_rate: float = SAMPLE_RATE,
+        capacity: int = BUFFER_SIZE,
+        exporters: Optional[List[SpanExporter]] = None,
+        export_interval_s: float = EXPORT_INTERVAL_S,
+    ):
+        self.sample_rate = sample_rate
+        self.buffer = SpanBuffer(capacity)
+        self.exporters: List[SpanExporter] = list(exporters or [])
+        self.export_interval_s = export_interval_s
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {"recorded": 0, "unsampled": 0, "exported": 0, "export_errors": 0}
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def sampled(self, trace_id: str) -> bool:
+        """Deterministic per trace, so every span of a run gets the same decision."""
+        if self.sample_rate >= 1.0:
+            return True
+        if self.sample_rate <= 0.0:
+            return False
+        return zlib.crc32(trace_id.encode("ascii")) / 0xFFFFFFFF < self.sample_rate
+
+    def record(self, span: Span) -> None:
+        pending = self.buffer.append(span)
+        self._stats["recorded"] += 1
+        logger.debug("span %s %.2fms %s", span.name, span.duration_ns / 1e6, span.attributes)
+        if self.exporters:
+            self._ensure_thread()
+            if pending >= EXPORT_BATCH_SIZE:
+                with self._cond:
+                    self._cond.notify_all()
+
+    def skip(self) -> None:
+        self._stats["unsampled"] += 1
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return [span.to_dict() for span in self.buffer.recent(limit)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "dropped": self.buffer.dropped,
+            "sample_rate": self.sample_rate,
+            "exporters": [type(e).__name__ for e in self.exporters],
+        }
+
+    # -----------------------------
+    # Export
+    # -----------------------------
+    def add_exporter(self, exporter: SpanExporter) -> None:
+        self.exporters.append(exporter)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(self.export_interval_s)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> None:
+        spans = self.buffer.take_pending()
+        if not spans:
+            return
+        for exporter in self.exporters:
+            try:
+                exporter.export(spans)
+                self._stats["exported"] += len(spans)
+            except Exception as e:
+                self._stats["export_errors"] += 1
+                logger.warning("trace export via %s failed: %s: %s", type(exporter).__name__, type(e).__name__, e)
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from the environment."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(exporters=exporters_from_env())
+            atexit.register(_tracer.shutdown)
+        return _tracer
+
+
+def trace_stats() -> Dict[str, Any]:
+    return get_tracer().stats()
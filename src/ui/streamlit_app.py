@@ -6,11 +6,11 @@ Includes:
 - Audio input support (.m4a, .mp3, .wav, .mp4)
 - Immediate display of user messages
 - Per-agent execution timing and evaluation
+- Live token streaming of the draft
+- Cached graphs, clients and store reads, so widget reruns do no disk I/O
 """
 
-import json
-import re
-import tempfile
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -18,7 +18,6 @@ import sys
 import os
 
 import streamlit as st
-import openai
 
 # ----------- Path bootstrap (REQUIRED for Streamlit) -----------
 ROOT = Path(__file__).resolve().parents[2]
@@ -26,80 +25,113 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 # ---------------------------------------------------------------
 
-from src.workflow.langgraph_flow import run_email_workflow
-from src.integrations.llm_client import make_openai_llm
-from src.eval.eval_runner import validate_scores
-from src.memory.store import get_profile, upsert_profile, save_eval, get_eval_history
+from src.agents.structured_output import IncrementalJSONParser
+from src.workflow.langgraph_flow import WORKFLOW_MODES, get_default_llm, get_planner, stream_email_workflow
+from src.integrations.transcription import TranscriptionError, transcribe_audio
+from src.eval.eval_queue import DONE, PENDING, SAMPLE_RATE, get_eval_queue
+from src.observability.metrics import start_metrics_server_from_env
+from src.memory.store import (
+    configure_github_sync,
+    data_version,
+    get_profile,
+    upsert_profile,
+    get_eval_history,
+)
 
 # -----------------------------
 # Helpers
 # -----------------------------
-def safe_json_loads(text: str) -> dict:
-    """Safely parse JSON, stripping markdown fences."""
-    if not text:
-        raise ValueError("Empty response from judge")
-
-    cleaned = re.sub(r"```(?:json)?", "", text, flags=re.DOTALL)
-    cleaned = cleaned.replace("```", "").strip()
-
-    return json.loads(cleaned)
+def load_secrets() -> None:
+    """Hand Streamlit secrets to modules that read configuration from the environment."""
+    try:
+        secrets = dict(st.secrets)
+    except Exception:
+        # No secrets.toml; fall back to plain environment variables
+        return
+
+    if secrets.get("OPENAI_API_KEY"):
+        os.environ.setdefault("OPENAI_API_KEY", secrets["OPENAI_API_KEY"])
+    configure_github_sync(secrets.get("GITHUB_TOKEN"), secrets.get("GITHUB_REPO"))
+
+
+def render_scores(scores: dict) -> None:
+    if "error" in scores:
+        st.error("Evaluation failed")
+        st.json(scores)
+        return
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Intent", scores["intent_accuracy"])
+    col2.metric("Tone", scores["tone_alignment"])
+    col3.metric("Clarity", scores["clarity"])
+    col1.metric("Professionalism", scores["professionalism"])
+    col2.metric("Completeness", scores["completeness"])
+    col3.metric("Grammar", scores["grammar"])
+    st.divider()
+    st.metric("Overall Score", scores["overall_score"])
+    st.markdown("**Judge Explanation**")
+    st.write(scores.get("explanation", ""))
 
 
 # -----------------------------
-# LLM Judge
+# Caches
 # -----------------------------
-def judge_email(user_input: str, tone: str, subject: str, body: str) -> dict:
-    llm = make_openai_llm(model="gpt-4o", temperature=0)
+# Resources are built once per server process and shared by every session.
+# Store reads are keyed on data_version() stamps, which every write bumps
+# (from any session or process), so a rerun only stats two files unless the
+# data actually changed.
+@st.cache_resource(show_spinner=False)
+def load_planners() -> dict:
+    """Compiled workflow graphs."""
+    return {mode: get_planner(mode) for mode in WORKFLOW_MODES}
 
-    prompt = f"""
-You are an expert email reviewer.
 
-Evaluate the GENERATED EMAIL against the USER REQUEST.
+@st.cache_resource(show_spinner=False)
+def load_llm():
+    """Workflow model client; built on first use so the page loads without an API key."""
+    return get_default_llm()
 
-IMPORTANT:
-- Scores MUST be integers from 1 to 10 ONLY
-- Do NOT use decimals or other scales
 
-USER REQUEST:
-{user_input}
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_profile(user_id: str, version: int) -> dict:
+    return get_profile(user_id)
 
-REQUESTED TONE:
-{tone}
 
-GENERATED EMAIL:
-Subject: {subject}
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_eval_history(limit: int, version: int) -> list:
+    return get_eval_history(limit=limit)
 
-{body}
 
-Return ONLY valid JSON with:
-- intent_accuracy
-- tone_alignment
-- clarity
-- professionalism
-- completeness
-- grammar
-- overall_score
-- explanation
-"""
-
-    response = llm.invoke(prompt)
-
-    try:
-        scores = safe_json_loads(response.content)
-    except Exception as e:
-        return {
-            "error": "JSON Parse Error",
-            "raw_output": response.content,
-            "exception": str(e),
-        }
-
-    if not validate_scores(scores):
-        return {
-            "error": "Invalid score scale",
-            "raw_output": scores,
-        }
-
-    return scores
+# -----------------------------
+# Background evaluation
+# -----------------------------
+EVAL_POLL_S = 1.0
+
+
+def _eval_scores(eval_id: str, polling: bool) -> None:
+    job = get_eval_queue().result(eval_id)
+    if job is None:
+        st.caption("Evaluation result is no longer available.")
+    elif job.status == PENDING:
+        st.caption("Scoring the draft in the background...")
+    elif polling:
+        # Scores just arrived: rerun once so the panel stops polling
+        st.rerun()
+    elif job.status == DONE:
+        st.success("Email evaluated and saved.")
+        render_scores(job.scores)
+    else:
+        st.error(f"Evaluation failed: {job.error}")
+
+
+def eval_panel(eval_id) -> None:
+    """Judge scores for the last draft; polls while the background job runs."""
+    st.subheader("Evaluation")
+    if not eval_id:
+        st.caption("This draft was not sampled for evaluation.")
+        return
+    job = get_eval_queue().result(eval_id)
+    polling = job is not None and job.status == PENDING
+    st.fragment(run_every=EVAL_POLL_S if polling else None)(_eval_scores)(eval_id, polling)
 
 
 # -----------------------------
@@ -107,6 +139,9 @@ Return ONLY valid JSON with:
 # -----------------------------
 def main():
     st.set_page_config(page_title="AI Powered Email Generator", layout="wide")
+    load_secrets()
+    start_metrics_server_from_env()
+    load_planners()
     st.title("AI Powered Email Generator")
 
     tabs = st.tabs(["Profile", "Compose & Draft", "Eval History"])
@@ -116,20 +151,22 @@ def main():
     # -----------------------------
     with tabs[0]:
         st.header("User Profile")
-        profile = get_profile("default")
+        profile = cached_profile("default", data_version("profiles"))
 
         with st.form("profile_form"):
             name = st.text_input("Sender name", profile.get("name", "SP"))
             company = st.text_input("Company", profile.get("company", "True Startup"))
 
+            st.caption(f"Emails generated: {profile.get('sent_examples_total', 0)}")
+
             if st.form_submit_button("Save profile"):
                 upsert_profile(
                     "default",
                     {
+                        **profile,
                         "name": name,
                         "company": company,
                         "preferred_tone": profile.get("preferred_tone", "formal"),
-                        "sent_examples": profile.get("sent_examples", []),
                     },
                 )
                 st.success("Profile saved successfully.")
@@ -158,33 +195,33 @@ def main():
                     type=["m4a", "mp3", "wav", "mp4"]
                 )
                 if audio_file:
-                    suffix = "." + audio_file.name.split(".")[-1]
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                        tmp.write(audio_file.read())
-                        tmp.flush()
-                        tmp_path = tmp.name
-
-                    st.info(f"Saved temporary audio file: {tmp_path}")
-
+                    # Cached by content hash, so reruns with the same upload are free
                     try:
-                        client = openai.OpenAI()
-                        with open(tmp_path, "rb") as f:
-                            transcript = client.audio.transcriptions.create(
-                                file=f,
-                                model="gpt-4o-transcribe",
-                                language="en",
-                            )
-                        user_text = transcript.text
-                        st.write("Transcription:")
-                        st.write(user_text)
-                    except openai.error.OpenAIError as e:
+                        with st.spinner("Transcribing audio..."):
+                            transcript = transcribe_audio(audio_file, filename=audio_file.name, language="en")
+                    except TranscriptionError as e:
                         st.error(f"Transcription failed: {e}")
                         st.stop()
+                    user_text = transcript.text
+                    st.caption(
+                        "Transcription (cached)" if transcript.cached
+                        else f"Transcription ({transcript.chunks} chunk(s), {transcript.seconds:.1f} s)"
+                    )
+                    st.write(user_text)
 
             tone_choice = st.selectbox(
                 "Tone (optional)",
                 ["(profile)", "formal", "casual", "assertive"],
             )
+            fast_mode = st.toggle(
+                "Fast mode",
+                help="Intent, draft and self-check in one LLM call; skips the separate review and rewrites.",
+            )
+            judge_share = st.slider(
+                "Evaluate drafts (%)",
+                0, 100, int(SAMPLE_RATE * 100), step=5,
+                help="Share of drafts scored by the gpt-4o judge, in the background.",
+            )
 
             if st.button("Generate Email Draft"):
                 if not user_text:
@@ -200,8 +237,32 @@ def main():
                 # -----------------------------
                 # Run workflow
                 # -----------------------------
-                with st.spinner("Generating email draft..."):
-                    result = run_email_workflow(prompt_text)
+                # Tokens are rendered as the draft writer streams them
+                with st.status("Generating email draft...", expanded=True) as status:
+                    live_subject = st.empty()
+                    live_body = st.empty()
+                    parser = IncrementalJSONParser()
+                    result = {}
+                    first_token_ms = None
+                    started = time.perf_counter()
+
+                    for event in stream_email_workflow(
+                        prompt_text, llm=load_llm(), mode="fast" if fast_mode else "full"
+                    ):
+                        if event["type"] == "draft_reset":
+                            parser = IncrementalJSONParser()
+                        elif event["type"] == "token":
+                            if first_token_ms is None:
+                                first_token_ms = round((time.perf_counter() - started) * 1000)
+                            partial = parser.feed(event["text"])
+                            live_subject.markdown(f"**Subject:** {partial.get('subject', '')}")
+                            live_body.text(partial.get("body", ""))
+                        elif event["type"] == "node":
+                            status.update(label=f"Generating email draft... ({event['node']} done)")
+                        elif event["type"] == "final":
+                            result = event["state"] or {}
+
+                    status.update(label="Email draft generated.", state="complete", expanded=False)
 
                 st.session_state.last_result = result
                 st.success("Email draft generated.")
@@ -210,6 +271,14 @@ def main():
                 # Agent Execution Timing
                 # -----------------------------
                 st.subheader("Agent Execution Trace")
+                if first_token_ms is not None:
+                    st.caption(f"Time to first token: {first_token_ms} ms (from clicking Generate)")
+                usage = result.get("usage") or {}
+                if usage.get("llm_calls"):
+                    st.caption(
+                        f"LLM calls: {usage['llm_calls']} • input tokens: {usage.get('input_tokens', 0)} "
+                        f"({usage.get('cached_tokens', 0)} cached) • output tokens: {usage.get('output_tokens', 0)}"
+                    )
                 traces = result.get("traces", [])
                 if not traces:
                     st.info("No trace data available.")
@@ -219,6 +288,8 @@ def main():
                         with st.expander(f"{trace['agent']} • {duration_sec} s", expanded=False):
                             st.markdown(f"**Agent:** {trace['agent']}")
                             st.markdown(f"**Duration:** {duration_sec} seconds")
+                            if trace.get("ttft_ms") is not None:
+                                st.markdown(f"**Time to first token:** {trace['ttft_ms']} ms")
                             st.markdown(f"**Timestamp:** {trace['timestamp']}")
                             st.markdown("**Input Keys:**")
                             st.code(", ".join(trace.get("input_keys", [])))
@@ -228,23 +299,15 @@ def main():
                 # -----------------------------
                 # Evaluation
                 # -----------------------------
+                # The judge runs on a worker thread; scores appear under the draft when ready
                 draft = result.get("personalized_draft") or result.get("draft") or {}
-
-                with st.spinner("Evaluating email..."):
-                    scores = judge_email(
-                        user_input=prompt_text,
-                        tone=tone_choice,
-                        subject=draft.get("subject", ""),
-                        body=draft.get("body", ""),
-                    )
-
-                st.session_state.last_eval = scores
-
-                if "error" not in scores:
-                    save_eval(prompt=prompt_text, draft=draft, scores=scores)
-                    st.success("Email evaluated and saved.")
-                else:
-                    st.error("Evaluation failed.")
+                st.session_state.last_eval_id = get_eval_queue().submit(
+                    prompt=prompt_text,
+                    # The tone the workflow resolved ("(profile)" is only the selector's label)
+                    tone=result.get("tone") or profile.get("preferred_tone", "formal"),
+                    draft=draft,
+                    sample_rate=judge_share / 100,
+                )
 
         # -----------------------------
         # Draft Preview
@@ -269,12 +332,15 @@ def main():
                 file_name="email_draft.txt",
             )
 
+            if last:
+                eval_panel(st.session_state.get("last_eval_id"))
+
     # -----------------------------
     # Eval History Tab
     # -----------------------------
     with tabs[2]:
         st.header("Evaluation History")
-        history = get_eval_history(limit=25)
+        history = cached_eval_history(25, data_version("evals"))
         if not history:
             st.info("No evaluations recorded yet.")
         else:
@@ -287,21 +353,7 @@ def main():
                     st.markdown(f"**Subject:** {record['subject']}")
                     st.text_area("Body", record["body"], height=200, disabled=True)
 
-                    if "error" in scores:
-                        st.error("Evaluation failed")
-                        st.json(scores)
-                    else:
-                        col1, col2, col3 = st.columns(3)
-                        col1.metric("Intent", scores["intent_accuracy"])
-                        col2.metric("Tone", scores["tone_alignment"])
-                        col3.metric("Clarity", scores["clarity"])
-                        col1.metric("Professionalism", scores["professionalism"])
-                        col2.metric("Completeness", scores["completeness"])
-                        col3.metric("Grammar", scores["grammar"])
-                        st.divider()
-                        st.metric("Overall Score", scores["overall_score"])
-                        st.markdown("**Judge Explanation**")
-                        st.write(scores.get("explanation", ""))
+                    render_scores(scores)
 
 
 if __name__ == "__main__":
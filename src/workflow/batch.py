@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+batch.py
+
+Bulk email generation over the async workflow.
+
+    python -m src.workflow.batch in.jsonl out.jsonl --concurrency 32
+
+Each input line is a JSON object with a `prompt` (or `input`) field and an
+optional `id`; lines without an id use their line number. Results are written
+as they finish, one JSON object per line, tagged with `id` and the input
+`index` so callers can restore input order. Re-running with the same output
+file skips ids that already succeeded, so a crashed job resumes where it
+stopped and failed items are retried (their new record is appended).
+"""
+
+import argparse
+import asyncio
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, Optional, Set
+
+from src.workflow.langgraph_flow import arun_email_workflow, get_default_llm
+
+
+# ===========================
+# Input / output records
+# ===========================
+def _normalize(prompts: Iterable[Any]) -> Iterator[Dict[str, Any]]:
+    for index, item in enumerate(prompts):
+        if isinstance(item, str):
+            item_id, prompt = str(index), item
+        else:
+            item_id = str(item.get("id", index))
+            prompt = item.get("prompt") or item.get("input") or ""
+        yield {"id": item_id, "index": index, "prompt": prompt}
+
+
+def _result_record(item: Dict[str, Any], state: Optional[Dict[str, Any]], error: Optional[str]) -> Dict[str, Any]:
+    state = state or {}
+    draft = state.get("personalized_draft") or state.get("draft") or {}
+    return {
+        "id": item["id"],
+        "index": item["index"],
+        "subject": draft.get("subject", ""),
+        "body": draft.get("body", ""),
+        "intent": state.get("intent"),
+        "tone": state.get("tone"),
+        "review": state.get("review"),
+        "usage": state.get("usage"),
+        "reason": state.get("reason"),
+        "error": error,
+    }
+
+
+# ===========================
+# Batch API
+# ===========================
+async def agenerate_batch(
+    prompts: Iterable[Any],
+    max_concurrency: int = 16,
+    llm=None,
+    skip_ids: Optional[Set[str]] = None,
+    mode: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Generate drafts for `prompts` (strings or {"id", "prompt"} dicts),
+    yielding one result record per prompt in completion order.
+
+    At most `max_concurrency` workflows run at once, all sharing one model
+    client (and its pooled HTTP connections); that cap is what bounds the
+    number of LLM requests in flight.
+    """
+    skip_ids = skip_ids or set()
+    llm = llm or get_default_llm()
+
+    items = (item for item in _normalize(prompts) if item["id"] not in skip_ids)
+    results: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+    done = object()
+
+    async def worker():
+        for item in items:
+            try:
+                state = await arun_email_workflow(item["prompt"], llm=llm, mode=mode)
+                record = _result_record(item, state, None)
+            except Exception as e:
+                record = _result_record(item, None, f"{type(e).__name__}: {e}")
+            await results.put(record)
+        await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, max_concurrency))]
+    remaining = len(workers)
+    try:
+        while remaining:
+            record = await results.get()
+            if record is done:
+                remaining -= 1
+                continue
+            yield record
+    finally:
+        for task in workers:
+            task.cancel()
+
+
+def generate_batch(
+    prompts: Iterable[Any],
+    max_concurrency: int = 16,
+    llm=None,
+    skip_ids: Optional[Set[str]] = None,
+    mode: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Sync wrapper over agenerate_batch for non-async callers.
+    Runs the event loop on a helper thread and yields records as they finish.
+    """
+    out: queue.Queue = queue.Queue(maxsize=max_concurrency * 2)
+    done = object()
+    running: Dict[str, Any] = {}
+
+    async def drain():
+        running["loop"], running["task"] = asyncio.get_running_loop(), asyncio.current_task()
+        records = agenerate_batch(prompts, max_concurrency, llm, skip_ids, mode)
+        try:
+            async for record in records:
+                out.put(record)
+        finally:
+            # Cancels the in-flight workflows when the caller stops early
+            await records.aclose()
+
+    def runner():
+        try:
+            asyncio.run(drain())
+        except BaseException as e:
+            out.put(e)
+        finally:
+            out.put(done)
+
+    thread = threading.Thread(target=runner, name="generate-batch", daemon=True)
+    thread.start()
+
+    finished = False
+    try:
+        while True:
+            record = out.get()
+            if record is done:
+                finished = True
+                break
+            if isinstance(record, BaseException):
+                raise record
+            yield record
+    finally:
+        if not finished:
+            # Caller closed the generator (or we raised): cancel the batch, then
+            # keep draining so a put blocked on a full queue can return
+            if "task" in running:
+                try:
+                    running["loop"].call_soon_threadsafe(running["task"].cancel)
+                except RuntimeError:
+                    pass  # loop already closed
+            while out.get() is not done:
+                pass
+        thread.join()
+
+
+# ===========================
+# JSONL CLI
+# ===========================
+def read_completed_ids(path: Path) -> Set[str]:
+    """
+    Ids already written to `path` without an error; a torn last line from a
+    crash is ignored. Failed ids are left out so a resumed run retries them.
+    """
+    ids: Set[str] = set()
+    if not path.exists():
+        return ids
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if not record.get("error"):
+                    ids.add(str(record["id"]))
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                continue
+    return ids
+
+
+def _read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for index, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            record.setdefault("id", str(index))
+            yield record
+
+
+def _ends_with_newline(path: Path) -> bool:
+    if not path.exists() or path.stat().st_size == 0:
+        return True
+    with open(path, "rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+async def _run_cli(in_path: Path, out_path: Path, concurrency: int) -> int:
+    skip = read_completed_ids(out_path)
+    written = 0
+    with open(out_path, "a", encoding="utf-8") as out:
+        if not _ends_with_newline(out_path):
+            out.write("\n")
+        async for record in agenerate_batch(_read_jsonl(in_path), concurrency, skip_ids=skip):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            written += 1
+    if skip:
+        print(f"Skipped {len(skip)} ids already in {out_path}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate email drafts for every prompt in a JSONL file.")
+    parser.add_argument("input", type=Path, help="input JSONL with id + prompt per line")
+    parser.add_argument("output", type=Path, help="output JSONL (appended to; existing ids are skipped)")
+    parser.add_argument("--concurrency", type=int, default=16, help="workflows in flight at once")
+    args = parser.parse_args(argv)
+
+    written = asyncio.run(_run_cli(args.input, args.output, args.concurrency))
+    print(f"Wrote {written} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+budget.py
+
+Per-request cost limits for the email workflow.
+
+A budget caps wall-clock time, LLM calls and tokens for one run. It is
+stamped into the workflow state when the run starts; the router checks it
+before every rewrite and stops with the best draft so far once the next
+draft + review cycle would not fit. Within a cycle, each LLM call is bounded
+by remaining_s(), so one slow call cannot run past the deadline either.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, Optional
+
+USAGE_KEYS = ("llm_calls", "input_tokens", "output_tokens", "cached_tokens", "total_tokens")
+
+# LLM calls in one rewrite cycle with a single-candidate draft: draft + review.
+# Rewrites with an n-best draft reserve n + 1 (see _calls_per_cycle), so
+# max_llm_calls also bounds how many candidates a run generates.
+CALLS_PER_CYCLE = 2
+
+
+class DeadlineExceeded(TimeoutError):
+    """An LLM call was cut off by the request deadline."""
+
+
+@dataclass
+class RequestBudget:
+    deadline_s: float = 30.0
+    max_llm_calls: int = 8
+    max_tokens: int = 12000
+    max_rewrites: int = 2
+
+    @classmethod
+    def from_env(cls) -> "RequestBudget":
+        return cls(
+            deadline_s=float(os.environ.get("REQUEST_DEADLINE_S", cls.deadline_s)),
+            max_llm_calls=int(os.environ.get("REQUEST_MAX_LLM_CALLS", cls.max_llm_calls)),
+            max_tokens=int(os.environ.get("REQUEST_MAX_TOKENS", cls.max_tokens)),
+            max_rewrites=int(os.environ.get("REQUEST_MAX_REWRITES", cls.max_rewrites)),
+        )
+
+    def start(self) -> Dict[str, Any]:
+        """State entry for a run starting now."""
+        return {**asdict(self), "started_at": time.time(), "deadline": time.time() + self.deadline_s}
+
+
+def merge_usage(left: Optional[Dict[str, int]], right: Optional[Dict[str, int]]) -> Dict[str, int]:
+    """EmailState reducer: sum usage counters from every node (including parallel ones)."""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        merged[key] = merged.get(key, 0) + (value or 0)
+    return merged
+
+
+def usage_from_message(message: Any) -> Dict[str, int]:
+    """One LLM call's usage from an AIMessage's usage_metadata (zeros if the provider sent none)."""
+    meta = getattr(message, "usage_metadata", None) or {}
+    details = meta.get("input_token_details") or {}
+    return {
+        "llm_calls": 1,
+        "input_tokens": meta.get("input_tokens", 0),
+        "output_tokens": meta.get("output_tokens", 0),
+        "cached_tokens": details.get("cache_read", 0) or 0,
+        "total_tokens": meta.get("total_tokens", 0),
+    }
+
+
+def _last_cycle_seconds(state: Dict[str, Any]) -> float:
+    """Duration of the most recent draft -> personalization -> review pass, from traces."""
+    total_ms = 0.0
+    seen = set()
+    for trace in reversed(state.get("traces") or []):
+        agent = trace.get("agent")
+        if agent in ("draft_writer", "personalization", "review") and agent not in seen:
+            seen.add(agent)
+            total_ms += trace.get("duration_ms", 0)
+        if len(seen) == 3:
+            break
+    return total_ms / 1000
+
+
+def _calls_per_cycle(state: Dict[str, Any]) -> int:
+    """
+    Calls to reserve for the next rewrite cycle: the candidates a rewrite
+    asks for (the last draft_writer trace's "rewrite_candidates") plus one
+    review.
+    """
+    for trace in reversed(state.get("traces") or []):
+        if trace.get("agent") == "draft_writer":
+            return max(1, trace.get("rewrite_candidates", 1)) + CALLS_PER_CYCLE - 1
+    return CALLS_PER_CYCLE
+
+
+def exhausted_reason(state: Dict[str, Any]) -> Optional[str]:
+    """Why another rewrite cycle would break the budget, or None if it fits."""
+    budget = state.get("budget")
+    if not budget:
+        return None
+    usage = state.get("usage") or {}
+
+    if state.get("retry_count", 0) >= budget["max_rewrites"]:
+        return "max_rewrites"
+    if usage.get("llm_calls", 0) + _calls_per_cycle(state) > budget["max_llm_calls"]:
+        return "max_llm_calls"
+    if usage.get("total_tokens", 0) >= budget["max_tokens"]:
+        return "max_tokens"
+    if time.time() + _last_cycle_seconds(state) > budget["deadline"]:
+        return "deadline"
+    return None
+
+
+def remaining_s(state: Dict[str, Any]) -> Optional[float]:
+    """Seconds left before the run's deadline (negative once passed), or None without a budget."""
+    budget = state.get("budget")
+    if not budget:
+        return None
+    return budget["deadline"] - time.time()
+
+
+# =============================
+# Per-call deadline
+# =============================
+def _deadline_error(state: Dict[str, Any]) -> DeadlineExceeded:
+    return DeadlineExceeded(f"request deadline of {state['budget']['deadline_s']}s exceeded")
+
+
+# Sync calls run on one bounded pool. A call abandoned at the deadline ends
+# at the HTTP client's own timeout (LLM_HTTP_TIMEOUT) and holds one worker
+# until then, so abandoned calls cannot pile up.
+LLM_CALL_WORKERS = int(os.environ.get("LLM_CALL_WORKERS", 16))
+_llm_executor: Optional[ThreadPoolExecutor] = None
+_llm_executor_lock = threading.Lock()
+
+
+def _get_llm_executor() -> ThreadPoolExecutor:
+    global _llm_executor
+    with _llm_executor_lock:
+        if _llm_executor is None:
+            _llm_executor = ThreadPoolExecutor(max_workers=LLM_CALL_WORKERS, thread_name_prefix="llm-call")
+        return _llm_executor
+
+
+def call_within_deadline(state: Dict[str, Any], fn, *args, context: Optional[contextvars.Context] = None):
+    """fn(*args) for a blocking LLM call; raises DeadlineExceeded when the run's deadline passes first."""
+    remaining = remaining_s(state)
+    if remaining is None:
+        return fn(*args)
+    if remaining <= 0:
+        raise _deadline_error(state)
+
+    # Run in the caller's context so LangGraph's run config and callbacks carry over
+    context = context or contextvars.copy_context()
+    future = _get_llm_executor().submit(context.run, fn, *args)
+    done, _ = wait([future], timeout=remaining)
+    if not done:
+        future.cancel()  # still queued: never starts
+        raise _deadline_error(state)
+    return future.result()
+
+
+def iter_within_deadline(state: Dict[str, Any], chunks: Iterator) -> Iterator:
+    """A blocking stream's chunks; waiting for any chunk (the first included) counts against the deadline."""
+    context = contextvars.copy_context()
+    chunks = iter(chunks)
+    end = object()
+    while True:
+        chunk = call_within_deadline(state, next, chunks, end, context=context)
+        if chunk is end:
+            return
+        yield chunk
+
+
+async def acall_within_deadline(state: Dict[str, Any], afn, *args):
+    """await afn(*args), cancelled with DeadlineExceeded when the run's deadline passes."""
+    remaining = remaining_s(state)
+    if remaining is None:
+        return await afn(*args)
+    if remaining <= 0:
+        raise _deadline_error(state)
+    try:
+        return await asyncio.wait_for(afn(*args), remaining)
+    except asyncio.TimeoutError:
+        raise _deadline_error(state) from None
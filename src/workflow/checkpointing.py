@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+checkpointing.py
+
+Checkpointer for the compiled workflow graphs.
+
+Every run uses a fresh thread id, so an unbounded InMemorySaver keeps each
+request's state snapshots (user profile included) for the life of the
+process. Options:
+
+- "none": no checkpoints; lowest overhead, no resume
+- "memory" (default): BoundedInMemorySaver, least recently used threads are
+  dropped past CHECKPOINT_MAX_THREADS and idle ones after CHECKPOINT_TTL_S
+- "sqlite": checkpoints in a SQLite file so interrupted runs can be resumed
+  after a crash (needs the optional langgraph-checkpoint-sqlite package);
+  threads older than CHECKPOINT_TTL_S are pruned when the file is opened
+
+Configuration (environment):
+- CHECKPOINTER: "none", "memory" or "sqlite"
+- CHECKPOINT_MAX_THREADS: memory saver capacity in runs (default 1000); keep it
+  above the number of runs in flight
+- CHECKPOINT_TTL_S: idle seconds before a run's checkpoints go (default 3600, 0 = never)
+- CHECKPOINT_SQLITE_PATH: SQLite file (default .cache/checkpoints.sqlite)
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINTER = os.environ.get("CHECKPOINTER", "memory").lower()
+MAX_THREADS = int(os.environ.get("CHECKPOINT_MAX_THREADS", 1000))
+TTL_S = float(os.environ.get("CHECKPOINT_TTL_S", 3600))
+SQLITE_PATH = Path(os.environ.get("CHECKPOINT_SQLITE_PATH", Path(".cache") / "checkpoints.sqlite"))
+
+CHECKPOINTERS = ("none", "memory", "sqlite")
+
+
+# =============================
+# Bounded in-memory saver
+# =============================
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    InMemorySaver that forgets whole threads: least recently written or read
+    first once more than `max_threads` are held, and any thread idle for
+    `ttl_s` seconds. (InMemorySaver's async methods call the sync ones, so
+    both paths are covered.)
+    """
+
+    def __init__(self, max_threads: int = MAX_THREADS, ttl_s: float = TTL_S, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl_s = ttl_s
+        self._touched: "OrderedDict[str, float]" = OrderedDict()
+        self._touch_lock = threading.Lock()
+        self.evicted = 0
+
+    def _touch(self, config) -> None:
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return
+        now = time.monotonic()
+        expired = []
+        with self._touch_lock:
+            self._touched[thread_id] = now
+            self._touched.move_to_end(thread_id)
+            while len(self._touched) > self.max_threads:
+                expired.append(self._touched.popitem(last=False)[0])
+            if self.ttl_s > 0:
+                while self._touched:
+                    oldest, touched_at = next(iter(self._touched.items()))
+                    if now - touched_at < self.ttl_s:
+                        break
+                    expired.append(oldest)
+                    del self._touched[oldest]
+        for old in expired:
+            self.delete_thread(old)
+        self.evicted += len(expired)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config)
+        return result
+
+    def get_tuple(self, config):
+        checkpoint = super().get_tuple(config)
+        if checkpoint is not None:
+            self._touch(config)
+        return checkpoint
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": len(self._touched),
+            "max_threads": self.max_threads,
+            "ttl_s": self.ttl_s,
+            "evicted": self.evicted,
+        }
+
+
+# =============================
+# SQLite saver
+# =============================
+def _sqlite_saver(path: Path, ttl_s: float):
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "CHECKPOINTER=sqlite needs the langgraph-checkpoint-sqlite package "
+            "(pip install langgraph-checkpoint-sqlite)"
+        ) from e
+
+    class ThreadedSqliteSaver(SqliteSaver):
+        """SqliteSaver usable from ainvoke/astream too: async calls run the sync ones on a worker thread."""
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            items = await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+            )
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # SqliteSaver serialises access with its own lock
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    saver = ThreadedSqliteSaver(conn)
+    if ttl_s > 0:
+        prune_saver(saver, ttl_s)
+    return saver
+
+
+def prune_saver(saver, max_age_s: float) -> int:
+    """Delete threads whose latest checkpoint is older than `max_age_s`; returns how many."""
+    cutoff = datetime.now(timezone.utc).timestamp() - max_age_s
+    latest: Dict[str, float] = {}
+    for item in saver.list(None):
+        thread_id = item.config["configurable"]["thread_id"]
+        try:
+            ts = datetime.fromisoformat(item.checkpoint["ts"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        latest[thread_id] = max(ts, latest.get(thread_id, 0.0))
+    stale = [thread_id for thread_id, ts in latest.items() if ts < cutoff]
+    for thread_id in stale:
+        saver.delete_thread(thread_id)
+    if stale:
+        logger.info("pruned %d checkpoint threads older than %ss", len(stale), max_age_s)
+    return len(stale)
+
+
+# =============================
+# Factory
+# =============================
+def make_checkpointer(kind: Optional[str] = None):
+    """Checkpointer for `kind` (default: CHECKPOINTER env); None for "none"."""
+    kind = (kind or CHECKPOINTER).lower()
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return BoundedInMemorySaver()
+    if kind == "sqlite":
+        return _sqlite_saver(SQLITE_PATH, TTL_S)
+    raise ValueError(f"Unknown CHECKPOINTER {kind!r}; expected one of {CHECKPOINTERS}")
+
+
+_checkpointer = None
+_checkpointer_ready = False
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer():
+    """Process-wide checkpointer shared by every compiled graph (thread ids are unique per run)."""
+    global _checkpointer, _checkpointer_ready
+    with _checkpointer_lock:
+        if not _checkpointer_ready:
+            _checkpointer = make_checkpointer()
+            _checkpointer_ready = True
+        return _checkpointer
+
+
+def checkpoint_stats() -> Dict[str, Any]:
+    saver = _checkpointer
+    if saver is None:
+        return {"kind": CHECKPOINTER}
+    stats = saver.stats() if hasattr(saver, "stats") else {}
+    return {"kind": CHECKPOINTER, **stats}
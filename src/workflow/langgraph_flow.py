@@ -6,28 +6,45 @@ Wires agents into a LangGraph StateGraph and exposes a run_email_workflow helper
 Uses OpenAI LLM for email drafting workflow.
 """
 
-from typing import TypedDict, List, Optional
-
+import asyncio
+import functools
+import inspect
+import json
+import operator
+import os
+from typing import Annotated, TypedDict, List, Optional
+
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import InMemorySaver
 
 from langchain_core.messages import HumanMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 from src.agents.input_parser_agent import InputParserAgent
 from src.agents.intent_detection_agent import IntentDetectionAgent
 from src.agents.tone_stylist_agent import ToneStylistAgent
 from src.agents.draft_writer_agent import DraftWriterAgent
+from src.agents.fast_draft_agent import FastDraftAgent
 from src.agents.personalization_agent import PersonalizationAgent
 from src.agents.review_agent import ReviewAgent
 from src.agents.router_agent import RouterAgent
 
-from src.integrations.llm_client import make_openai_llm
-from src.memory.store import get_profile, upsert_profile
+from src.integrations.llm_client import get_llm
+from src.memory.store import get_profile, append_sent_example
+from src.observability.metrics import BUDGET_STOPS, observe_node
+from src.observability.tracing import Span, get_tracer, new_span_id, trace_id_for
+from src.workflow.budget import (
+    DeadlineExceeded,
+    RequestBudget,
+    acall_within_deadline,
+    call_within_deadline,
+    iter_within_deadline,
+    merge_usage,
+)
+from src.workflow.checkpointing import get_checkpointer
 
 import time
-from copy import deepcopy
 import uuid
-from langchain_core.messages import HumanMessage
 
 
 # ===========================
@@ -37,199 +54,664 @@ class EmailState(TypedDict, total=False):
     messages: List[BaseMessage]
     parsed: dict
     intent: str
+    # "rules" / "model" (local fast path) or "llm"
+    intent_source: str
     tone: str
     tone_instructions: str
     draft: dict
     personalized_draft: dict
     review: dict
     user_profile: dict
-    next_agent: str
-    rewrite_count: int
-    traces: List[dict]
+    # Router output: "rewrite" loops back to draft_writer, "done" ends the run
+    route: str
+    retry_count: int
+    issues: List[str]
+    reason: str
+    best_draft: dict
+    best_score: float
+    # RequestBudget.start() for this run; see budget.py
+    budget: dict
+    # Parallel branches each append their own trace / usage, so merge instead of overwrite
+    traces: Annotated[List[dict], operator.add]
+    usage: Annotated[dict, merge_usage]
 
 
 # ===========================
-# Instantiate OpenAI LLM
+# OpenAI LLM (built on first use)
 # ===========================
-LLM = make_openai_llm(
-    model="gpt-4o-mini",
-    temperature=0.15
-)
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TEMPERATURE = 0.15
+
+
+def get_default_llm():
+    """Shared workflow model; created on first call so importing this module needs no API key."""
+    return get_llm(
+        model=DEFAULT_MODEL,
+        temperature=DEFAULT_TEMPERATURE
+    )
 
 
 
 # ===========================
 # Tracing decorator( Core Piece)
 # ===========================
+# Each node adds a small summary to state["traces"] (shown in the UI) and,
+# for sampled runs, a span to the tracer (src/observability/tracing.py).
+# Latency and token metrics (src/observability/metrics.py) cover every run.
+# Only key names are read from the state; nothing is copied.
+TRACE_EXTRA_KEY = "_trace"
+
+
+def _input_keys(state: EmailState) -> List[str]:
+    return [k for k in state if k != "messages"]
+
+
+def _payload_bytes(value) -> int:
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return -1
+
+
+def _record_span(
+    name: str,
+    config: Optional[RunnableConfig],
+    state: EmailState,
+    start_unix_ns: int,
+    duration_ns: int,
+    input_keys: List[str],
+    result: Optional[dict],
+    error: Optional[BaseException] = None,
+) -> None:
+    tracer = get_tracer()
+    trace_id = trace_id_for((config or {}).get("configurable", {}).get("thread_id"))
+    if not tracer.sampled(trace_id):
+        tracer.skip()
+        return
+
+    attributes = {"node": name, "input_keys": input_keys}
+    if result is not None:
+        attributes["output_keys"] = [k for k in result if k != "traces"]
+        # Only the keys the node wrote are sized; serialising the whole input
+        # state on every sampled node cost more than the node itself
+        attributes["output_bytes"] = _payload_bytes({k: v for k, v in result.items() if k != "traces"})
+        for key, value in (result.get("usage") or {}).items():
+            attributes[f"gen_ai.usage.{key}"] = value
+        ttft_ms = result["traces"][0].get("ttft_ms")
+        if ttft_ms is not None:
+            attributes["ttft_ms"] = ttft_ms
+    if error is not None:
+        attributes["error"] = f"{type(error).__name__}: {error}"
+
+    tracer.record(Span(
+        trace_id=trace_id,
+        span_id=new_span_id(),
+        name=name,
+        start_unix_ns=start_unix_ns,
+        duration_ns=duration_ns,
+        attributes=attributes,
+        status="error" if error is not None else "ok",
+    ))
+
+
+def _finish_trace(name: str, duration_ns: int, input_keys: List[str], result: dict) -> dict:
+    result = dict(result)
+    # Nodes can attach extra trace fields (e.g. ttft_ms) under TRACE_EXTRA_KEY
+    extra = result.pop(TRACE_EXTRA_KEY, None) or {}
+
+    trace = {
+        "agent": name,
+        "duration_ms": round(duration_ns / 1e6, 2),
+        "input_keys": input_keys,
+        "output_keys": list(result.keys()),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        **extra,
+    }
+
+    result["traces"] = [trace]
+    return result
+
+
 def traced_node(name: str):
     """
-    Decorator for LangGraph nodes that logs
-    input, output, and execution time.
+    Decorator for LangGraph nodes that records
+    input / output keys, execution time and token usage.
+    Works for both sync and async node functions.
     """
     def decorator(fn):
-        def wrapper(state: EmailState) -> EmailState:
-            start = time.time()
+        if inspect.iscoroutinefunction(fn):
+            async def async_wrapper(state: EmailState, config: RunnableConfig) -> dict:
+                start_unix_ns, start_ns = time.time_ns(), time.perf_counter_ns()
+                input_keys = _input_keys(state)
+                try:
+                    result = await fn(state, config)
+                except BaseException as e:
+                    duration_ns = time.perf_counter_ns() - start_ns
+                    observe_node(name, duration_ns, None, error=True)
+                    _record_span(name, config, state, start_unix_ns, duration_ns, input_keys, None, e)
+                    raise
+                duration_ns = time.perf_counter_ns() - start_ns
+                observe_node(name, duration_ns, result.get("usage"))
+                result = _finish_trace(name, duration_ns, input_keys, result)
+                _record_span(name, config, state, start_unix_ns, duration_ns, input_keys, result)
+                return result
+
+            return async_wrapper
+
+        def wrapper(state: EmailState, config: RunnableConfig) -> dict:
+            start_unix_ns, start_ns = time.time_ns(), time.perf_counter_ns()
+            input_keys = _input_keys(state)
+            try:
+                result = fn(state, config)
+            except BaseException as e:
+                duration_ns = time.perf_counter_ns() - start_ns
+                observe_node(name, duration_ns, None, error=True)
+                _record_span(name, config, state, start_unix_ns, duration_ns, input_keys, None, e)
+                raise
+            duration_ns = time.perf_counter_ns() - start_ns
+            observe_node(name, duration_ns, result.get("usage"))
+            result = _finish_trace(name, duration_ns, input_keys, result)
+            _record_span(name, config, state, start_unix_ns, duration_ns, input_keys, result)
+            return result
+
+        return wrapper
+    return decorator
 
-            # Snapshot input (safe shallow copy)
-            input_snapshot = deepcopy(
-                {k: v for k, v in state.items() if k != "messages"}
-            )
 
-            result = fn(state)
+def _llm(config: Optional[RunnableConfig]):
+    """LLM for this run: `configurable.llm` if the caller supplied one, else the shared default."""
+    configurable = (config or {}).get("configurable", {})
+    return configurable.get("llm") or get_default_llm()
 
-            duration_ms = round((time.time() - start) * 1000, 2)
 
-            trace = {
-                "agent": name,
-                "duration_ms": duration_ms,
-                "input_keys": list(input_snapshot.keys()),
-                "output_keys": list(result.keys()),
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            }
+def _streaming(config: Optional[RunnableConfig]) -> bool:
+    return bool((config or {}).get("configurable", {}).get("stream_tokens"))
 
-            result.setdefault("traces", []).append(trace)
 
-            # Optional console logging
-            print(f"[TRACE] {name} | {duration_ms}ms")
+# ===========================
+# Request deadline
+# ===========================
+# The router only checks the budget between cycles; each LLM call below is
+# also bounded by the time the run has left (see budget.call_within_deadline).
+def _draft_past_deadline(state: EmailState, error: DeadlineExceeded) -> dict:
+    """
+    A rewrite cut off by the deadline ends the run with the best draft so far;
+    it was already personalized and recorded, so it skips personalization and
+    review (see draft_decision). A first draft has nothing to fall back on,
+    so the run fails.
+    """
+    best = state.get("best_draft") or state.get("personalized_draft")
+    if not best:
+        raise error
+    BUDGET_STOPS.inc(reason="deadline")
+    return {"personalized_draft": best, "route": "done", "reason": "deadline"}
 
-            return result
 
-        return wrapper
-    return decorator
+def _review_past_deadline() -> dict:
+    # Not a rejection: the router keeps the current draft and stops
+    BUDGET_STOPS.inc(reason="deadline")
+    return {"review": {"skipped": "deadline"}, "reason": "deadline"}
+
 
 # ===========================
 # Workflow nodes
 # ===========================
+# Nodes return only the keys they change. Nodes that run in the same
+# superstep (the pre-draft fan-out) must not write the same key unless that
+# key has a reducer on EmailState.
+# LLM-backed nodes have an async twin (anode_*) used by ainvoke/astream.
+# Nodes that touch the SQLite store do too; theirs run the store call on a
+# worker thread so it never blocks the event loop.
+def _input_parser_update(state: EmailState, profile: Optional[dict]) -> dict:
+    update = {
+        "user_profile": profile or {},
+        "retry_count": state.get("retry_count", 0),
+        "budget": state.get("budget") or RequestBudget.from_env().start(),
+    }
+    update.update(InputParserAgent.run(state))
+    return update
+
+
 @traced_node("input_parser")
-def node_input_parser(state: EmailState) -> EmailState:
-    state["user_profile"] = get_profile("default") or {}
-    state.setdefault("rewrite_count", 0)
-    state.update(InputParserAgent.run(state))
-    return state
+def node_input_parser(state: EmailState, config: RunnableConfig) -> dict:
+    return _input_parser_update(state, get_profile("default"))
+
+
+@traced_node("input_parser")
+async def anode_input_parser(state: EmailState, config: RunnableConfig) -> dict:
+    return _input_parser_update(state, await asyncio.to_thread(get_profile, "default"))
 
 
 @traced_node("intent_detection")
-def node_intent_detection(state: EmailState) -> EmailState:
-    state.update(IntentDetectionAgent.run(state, LLM))
-    return state
+def node_intent_detection(state: EmailState, config: RunnableConfig) -> dict:
+    return call_within_deadline(state, IntentDetectionAgent.run, state, _llm(config))
+
+
+@traced_node("intent_detection")
+async def anode_intent_detection(state: EmailState, config: RunnableConfig) -> dict:
+    return await acall_within_deadline(state, IntentDetectionAgent.arun, state, _llm(config))
 
 
 @traced_node("tone_stylist")
-def node_tone_stylist(state: EmailState) -> EmailState:
-    state.update(ToneStylistAgent.run(state))
-    return state
+def node_tone_stylist(state: EmailState, config: RunnableConfig) -> dict:
+    return ToneStylistAgent.run(state)
+
+
+def _stream_draft(agent, state: EmailState, config: RunnableConfig) -> dict:
+    """Token streaming: forward the agent's chunks on LangGraph's "custom" stream."""
+    writer = get_stream_writer()
+    writer({"draft_reset": True})
+    start = time.perf_counter()
+    ttft_ms = None
+    message = None
+    for chunk in iter_within_deadline(state, agent.stream(state, _llm(config))):
+        message = chunk if message is None else message + chunk
+        if not chunk.content:
+            continue  # e.g. the trailing usage-only chunk
+        if ttft_ms is None:
+            ttft_ms = round((time.perf_counter() - start) * 1000, 2)
+        writer({"draft_token": str(chunk.content)})
+
+    result = agent.finish(state, message)
+    result[TRACE_EXTRA_KEY] = {"ttft_ms": ttft_ms}
+    return result
+
+
+async def _astream_draft(agent, state: EmailState, config: RunnableConfig) -> dict:
+    writer = get_stream_writer()
+    writer({"draft_reset": True})
+    start = time.perf_counter()
+
+    async def consume():
+        ttft_ms = None
+        message = None
+        async for chunk in agent.astream(state, _llm(config)):
+            message = chunk if message is None else message + chunk
+            if not chunk.content:
+                continue  # e.g. the trailing usage-only chunk
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - start) * 1000, 2)
+            writer({"draft_token": str(chunk.content)})
+        return message, ttft_ms
+
+    message, ttft_ms = await acall_within_deadline(state, consume)
+    result = agent.finish(state, message)
+    result[TRACE_EXTRA_KEY] = {"ttft_ms": ttft_ms}
+    return result
+
+
+def _with_selection_trace(result: dict, llm) -> dict:
+    # n-best selection details go to the trace, not the state; so does the
+    # candidate count a rewrite would ask for, which the budget reserves
+    extra = {"rewrite_candidates": DraftWriterAgent.rewrite_candidates(llm)}
+    selection = result.pop("selection", None)
+    if selection is not None:
+        extra["selection"] = selection
+    result[TRACE_EXTRA_KEY] = extra
+    return result
+
 
 @traced_node("draft_writer")
-def node_draft_writer(state: EmailState) -> EmailState:
-    state.update(DraftWriterAgent.run(state, LLM))
-    return state
+def node_draft_writer(state: EmailState, config: RunnableConfig) -> dict:
+    try:
+        if _streaming(config):
+            return _stream_draft(DraftWriterAgent, state, config)
+        llm = _llm(config)
+        return _with_selection_trace(call_within_deadline(state, DraftWriterAgent.run, state, llm), llm)
+    except DeadlineExceeded as e:
+        return _draft_past_deadline(state, e)
 
-@traced_node("tone_stylist")
-def node_tone_stylist(state: EmailState) -> EmailState:
-    state.update(ToneStylistAgent.run(state))
-    return state
+
+@traced_node("draft_writer")
+async def anode_draft_writer(state: EmailState, config: RunnableConfig) -> dict:
+    try:
+        if _streaming(config):
+            return await _astream_draft(DraftWriterAgent, state, config)
+        llm = _llm(config)
+        return _with_selection_trace(await acall_within_deadline(state, DraftWriterAgent.arun, state, llm), llm)
+    except DeadlineExceeded as e:
+        return _draft_past_deadline(state, e)
+
+
+@traced_node("fast_draft")
+def node_fast_draft(state: EmailState, config: RunnableConfig) -> dict:
+    try:
+        if _streaming(config):
+            return _stream_draft(FastDraftAgent, state, config)
+        return call_within_deadline(state, FastDraftAgent.run, state, _llm(config))
+    except DeadlineExceeded as e:
+        return _draft_past_deadline(state, e)
+
+
+@traced_node("fast_draft")
+async def anode_fast_draft(state: EmailState, config: RunnableConfig) -> dict:
+    try:
+        if _streaming(config):
+            return await _astream_draft(FastDraftAgent, state, config)
+        return await acall_within_deadline(state, FastDraftAgent.arun, state, _llm(config))
+    except DeadlineExceeded as e:
+        return _draft_past_deadline(state, e)
 
 
 @traced_node("personalization")
-def node_personalization(state: EmailState) -> EmailState:
-    state.update(PersonalizationAgent.run(state))
+def node_personalization(state: EmailState, config: RunnableConfig) -> dict:
+    update = PersonalizationAgent.run(state)
 
-    profile = state.get("user_profile", {})
-    draft = state.get("personalized_draft")
+    draft = update.get("personalized_draft")
 
     if draft:
-        profile.setdefault("sent_examples", []).append(draft)
-        upsert_profile("default", profile)
+        append_sent_example("default", draft)
 
-    return state
+    return update
+
+
+@traced_node("personalization")
+async def anode_personalization(state: EmailState, config: RunnableConfig) -> dict:
+    update = PersonalizationAgent.run(state)
+
+    draft = update.get("personalized_draft")
+
+    if draft:
+        await asyncio.to_thread(append_sent_example, "default", draft)
+
+    return update
 
 
 @traced_node("review")
-def node_review(state: EmailState) -> EmailState:
-    state.update(ReviewAgent.run(state, LLM))
-    return state
+def node_review(state: EmailState, config: RunnableConfig) -> dict:
+    try:
+        return call_within_deadline(state, ReviewAgent.run, state, _llm(config))
+    except DeadlineExceeded:
+        return _review_past_deadline()
+
+
+@traced_node("review")
+async def anode_review(state: EmailState, config: RunnableConfig) -> dict:
+    try:
+        return await acall_within_deadline(state, ReviewAgent.arun, state, _llm(config))
+    except DeadlineExceeded:
+        return _review_past_deadline()
+
 
 @traced_node("router")
-def node_router(state: EmailState) -> EmailState:
-    state.update(RouterAgent.run(state))
-    return state
+def node_router(state: EmailState, config: RunnableConfig) -> dict:
+    return RouterAgent.run(state)
+
+
+def _node(fn, afn=None):
+    """Pair a sync node with its async twin so the graph serves invoke and ainvoke."""
+    if afn is None:
+        return fn
+    return RunnableLambda(fn, afunc=afn)
 
 
 # ===========================
 # Router logic
 # ===========================
+def draft_decision(state: EmailState) -> str:
+    """After drafting: a rewrite cut off by the deadline ends the run (see _draft_past_deadline)."""
+    if state.get("route") == "done" and state.get("reason") == "deadline":
+        return END
+    return "personalization"
+
+
 def router_decision(state: EmailState) -> str:
     """
     Controls graph flow.
-    Prevents infinite rewrite loops.
+    The router node already applied the rewrite limit and request budget;
+    this only follows its decision (conditional edges must not write state).
     """
-    next_agent = state.get("next_agent")
-
-    if next_agent == "rewrite":
-        state["rewrite_count"] = state.get("rewrite_count", 0) + 1
-        if state["rewrite_count"] <= 1:
-            return "draft_writer"
-
+    if state.get("route") == "rewrite":
+        return "draft_writer"
     return END
 
 
 # ===========================
 # Build workflow
 # ===========================
-workflow = StateGraph(EmailState)
-
-workflow.add_node("input_parser", node_input_parser)
-workflow.add_node("intent_detection", node_intent_detection)
-workflow.add_node("tone_stylist", node_tone_stylist)
-workflow.add_node("draft_writer", node_draft_writer)
-workflow.add_node("personalization", node_personalization)
-workflow.add_node("review", node_review)
-workflow.add_node("router", node_router)
-
-workflow.set_entry_point("input_parser")
-
-workflow.add_edge("input_parser", "intent_detection")
-workflow.add_edge("intent_detection", "tone_stylist")
-workflow.add_edge("tone_stylist", "draft_writer")
-workflow.add_edge("draft_writer", "personalization")
-workflow.add_edge("personalization", "review")
-workflow.add_edge("review", "router")
-
-workflow.add_conditional_edges(
-    "router",
-    router_decision,
-    {
-        "draft_writer": "draft_writer",
-        END: END,
-    },
-)
+# Independent stages that only need the parsed input. They run concurrently
+# after input_parser and draft_writer waits for all of them.
+PRE_DRAFT_STAGES = {
+    "intent_detection": _node(node_intent_detection, anode_intent_detection),
+    "tone_stylist": _node(node_tone_stylist),
+}
+
+
+def build_workflow() -> StateGraph:
+    workflow = StateGraph(EmailState)
+
+    workflow.add_node("input_parser", _node(node_input_parser, anode_input_parser))
+    for stage_name, stage_fn in PRE_DRAFT_STAGES.items():
+        workflow.add_node(stage_name, stage_fn)
+    workflow.add_node("draft_writer", _node(node_draft_writer, anode_draft_writer))
+    workflow.add_node("personalization", _node(node_personalization, anode_personalization))
+    workflow.add_node("review", _node(node_review, anode_review))
+    workflow.add_node("router", node_router)
+
+    workflow.set_entry_point("input_parser")
+
+    # Fan out after parsing, join before drafting
+    for stage_name in PRE_DRAFT_STAGES:
+        workflow.add_edge("input_parser", stage_name)
+    workflow.add_edge(list(PRE_DRAFT_STAGES), "draft_writer")
+    workflow.add_conditional_edges(
+        "draft_writer",
+        draft_decision,
+        {
+            "personalization": "personalization",
+            END: END,
+        },
+    )
+    workflow.add_edge("personalization", "review")
+    workflow.add_edge("review", "router")
+
+    workflow.add_conditional_edges(
+        "router",
+        router_decision,
+        {
+            "draft_writer": "draft_writer",
+            END: END,
+        },
+    )
+    return workflow
+
+
+def build_fast_workflow() -> StateGraph:
+    """
+    Fast mode: one LLM call (FastDraftAgent) does intent, draft and a
+    self-check. No review/rewrite loop; the self-check lands in `review`.
+    """
+    workflow = StateGraph(EmailState)
+
+    workflow.add_node("input_parser", _node(node_input_parser, anode_input_parser))
+    workflow.add_node("tone_stylist", node_tone_stylist)
+    workflow.add_node("fast_draft", _node(node_fast_draft, anode_fast_draft))
+    workflow.add_node("personalization", _node(node_personalization, anode_personalization))
+
+    workflow.set_entry_point("input_parser")
+    workflow.add_edge("input_parser", "tone_stylist")
+    workflow.add_edge("tone_stylist", "fast_draft")
+    workflow.add_edge("fast_draft", "personalization")
+    workflow.add_edge("personalization", END)
+    return workflow
+
 
 # ===========================
-# Compile workflow
+# Compile workflow (on first use)
 # ===========================
-checkpointer = InMemorySaver()
-email_planner = workflow.compile(checkpointer=checkpointer)
+# "full": intent -> draft -> review with rewrites; "fast": single-call graph
+WORKFLOW_MODES = ("full", "fast")
+DEFAULT_MODE = os.environ.get("WORKFLOW_MODE", "full")
+
+
+# Both graphs share the CHECKPOINTER-configured saver (src/workflow/checkpointing.py)
+@functools.lru_cache(maxsize=None)
+def get_email_planner():
+    return build_workflow().compile(checkpointer=get_checkpointer())
+
+
+@functools.lru_cache(maxsize=None)
+def get_fast_planner():
+    return build_fast_workflow().compile(checkpointer=get_checkpointer())
+
+
+def get_planner(mode: Optional[str] = None):
+    """Compiled graph for `mode` (default: WORKFLOW_MODE env, else "full")."""
+    mode = mode or DEFAULT_MODE
+    if mode == "full":
+        return get_email_planner()
+    if mode == "fast":
+        return get_fast_planner()
+    raise ValueError(f"Unknown workflow mode {mode!r}; expected one of {WORKFLOW_MODES}")
+
+
+def __getattr__(name: str):
+    # Backwards compatible module attributes, resolved lazily
+    if name == "email_planner":
+        return get_email_planner()
+    if name == "fast_email_planner":
+        return get_fast_planner()
+    if name == "LLM":
+        return get_default_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ===========================
-# Public helper
+# Public helpers
 # ===========================
-def run_email_workflow(user_text: str):
+def _run_config(llm=None, stream_tokens: bool = False, thread_id: Optional[str] = None) -> dict:
+    # Fresh thread id per run for the LangGraph checkpointer unless the caller
+    # wants to resume one later
+    configurable = {"thread_id": thread_id or str(uuid.uuid4())}
+    if llm is not None:
+        configurable["llm"] = llm
+    if stream_tokens:
+        configurable["stream_tokens"] = True
+    return {"configurable": configurable}
+
+
+def _stream_event(mode: str, chunk) -> Optional[dict]:
+    """Map one LangGraph (mode, chunk) pair to a workflow stream event."""
+    if mode == "custom":
+        if chunk.get("draft_reset"):
+            return {"type": "draft_reset"}
+        if "draft_token" in chunk:
+            return {"type": "token", "text": chunk["draft_token"]}
+        return None
+    if mode == "updates":
+        for node_name in chunk:
+            return {"type": "node", "node": node_name}
+        return None
+    if mode == "values":
+        return {"type": "state", "state": chunk}
+    return None
+
+
+def _initial_state(user_text: str, budget: Optional[RequestBudget] = None) -> dict:
+    state = {"messages": [HumanMessage(content=user_text)]}
+    if budget is not None:
+        state["budget"] = budget.start()
+    return state
+
+
+def run_email_workflow(
+    user_text: str,
+    llm=None,
+    budget: Optional[RequestBudget] = None,
+    mode: Optional[str] = None,
+    thread_id: Optional[str] = None,
+):
     """
     Entry point for UI / API usage.
     Adds required configurable keys for LangGraph checkpointer.
+    Pass `llm` to override the default model for this run, `budget`
+    to override the env-configured RequestBudget, `mode="fast"` for the
+    single-call graph, and `thread_id` to be able to resume the run with
+    resume_email_workflow (CHECKPOINTER=sqlite survives restarts).
     """
-    thread_id = str(uuid.uuid4())
+    initial_state = _initial_state(user_text, budget)
 
-    initial_state = {
-        "messages": [HumanMessage(content=user_text)]
-    }
+    return get_planner(mode).invoke(initial_state, config=_run_config(llm, thread_id=thread_id))
 
-    return email_planner.invoke(
+
+def resume_email_workflow(thread_id: str, llm=None, mode: Optional[str] = None):
+    """
+    Continue an interrupted run from its last checkpoint (same `mode` as the
+    original run). Returns None when the checkpointer has nothing for it.
+    """
+    planner = get_planner(mode)
+    config = _run_config(llm, thread_id=thread_id)
+    if planner.checkpointer is None or planner.get_state(config).created_at is None:
+        return None
+    return planner.invoke(None, config=config)
+
+
+async def arun_email_workflow(
+    user_text: str,
+    llm=None,
+    budget: Optional[RequestBudget] = None,
+    mode: Optional[str] = None,
+    thread_id: Optional[str] = None,
+):
+    """
+    Async twin of run_email_workflow.
+    LLM-backed nodes await the provider, so one event loop can keep many
+    generations in flight.
+    """
+    initial_state = _initial_state(user_text, budget)
+
+    return await get_planner(mode).ainvoke(initial_state, config=_run_config(llm, thread_id=thread_id))
+
+
+def stream_email_workflow(
+    user_text: str,
+    llm=None,
+    budget: Optional[RequestBudget] = None,
+    mode: Optional[str] = None,
+):
+    """
+    Run the workflow and yield events as it progresses:
+    - {"type": "token", "text": ...}: draft writer output chunk
+    - {"type": "draft_reset"}: a new draft started (e.g. a rewrite)
+    - {"type": "node", "node": ...}: a node finished
+    - {"type": "final", "state": ...}: the final workflow state (last event)
+    """
+    initial_state = _initial_state(user_text, budget)
+    final_state = None
+    for stream_mode, chunk in get_planner(mode).stream(
+        initial_state,
+        config=_run_config(llm, stream_tokens=True),
+        stream_mode=["custom", "updates", "values"],
+    ):
+        event = _stream_event(stream_mode, chunk)
+        if event is None:
+            continue
+        if event["type"] == "state":
+            final_state = event["state"]
+            continue
+        yield event
+    yield {"type": "final", "state": final_state}
+
+
+async def astream_email_workflow(
+    user_text: str,
+    llm=None,
+    budget: Optional[RequestBudget] = None,
+    mode: Optional[str] = None,
+):
+    """Async twin of stream_email_workflow."""
+    initial_state = _initial_state(user_text, budget)
+    final_state = None
+    async for stream_mode, chunk in get_planner(mode).astream(
         initial_state,
-        config={
-            "configurable": {
-                "thread_id": thread_id
-            }
-        }
-    )
\ No newline at end of file
+        config=_run_config(llm, stream_tokens=True),
+        stream_mode=["custom", "updates", "values"],
+    ):
+        event = _stream_event(stream_mode, chunk)
+        if event is None:
+            continue
+        if event["type"] == "state":
+            final_state = event["state"]
+            continue
+        yield event
+    yield {"type": "final", "state": final_state}
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """The memory store pointed at a fresh database with nothing to migrate."""
+    from src.memory import store as store_module
+
+    monkeypatch.setattr(store_module, "DB_PATH", tmp_path / "store.sqlite3")
+    monkeypatch.setattr(store_module, "PROFILE_PATH", tmp_path / "user_profiles.json")
+    monkeypatch.setattr(store_module, "EVAL_PATH", tmp_path / "eval_history.json")
+    monkeypatch.setattr(store_module, "GITHUB_TOKEN", None)
+    return store_module
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Test doubles.
+
+FakeGithub: in-memory stand-in for the parts of PyGithub the store sync uses
+(Github -> get_repo -> get_contents / create_file / update_file).
+
+Pass `FakeGithub` as the client_factory of GitHubSyncWorker to exercise the
+sync path offline. `latency` adds a delay per API call and `fail_next` makes
+the next N calls raise, to drive the retry logic.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, List
+
+
+class FakeContentFile:
+    def __init__(self, path: str, content: str):
+        self.path = path
+        self.decoded_content = content.encode("utf-8")
+        self.sha = hashlib.sha1(self.decoded_content).hexdigest()
+
+
+class FakeRepo:
+    def __init__(self, name: str, latency: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.files: Dict[str, FakeContentFile] = {}
+        self.commits: List[dict] = []
+        self.api_calls = 0
+        self.fail_next = 0
+        self._lock = threading.Lock()
+
+    def _call(self) -> None:
+        with self._lock:
+            self.api_calls += 1
+            if self.fail_next:
+                self.fail_next -= 1
+                raise ConnectionError("fake GitHub: injected failure")
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_contents(self, path: str) -> FakeContentFile:
+        self._call()
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return self.files[path]
+
+    def create_file(self, path: str, message: str, content: str) -> dict:
+        self._call()
+        if path in self.files:
+            raise ValueError(f"{path} already exists")
+        return self._write(path, message, content)
+
+    def update_file(self, path: str, message: str, content: str, sha: str) -> dict:
+        self._call()
+        current = self.files.get(path)
+        if current is None or current.sha != sha:
+            raise ValueError(f"sha mismatch for {path}")
+        return self._write(path, message, content)
+
+    def _write(self, path: str, message: str, content: str) -> dict:
+        file = FakeContentFile(path, content)
+        with self._lock:
+            self.files[path] = file
+            self.commits.append({"path": path, "message": message, "sha": file.sha})
+        return {"content": file, "commit": self.commits[-1]}
+
+
+class FakeGithub:
+    """Drop-in for github.Github; every instance shares the same repos."""
+
+    repos: Dict[str, FakeRepo] = {}
+    clients_created = 0
+
+    def __init__(self, token: str = "", latency: float = 0.0):
+        FakeGithub.clients_created += 1
+        self.latency = latency
+
+    def get_repo(self, name: str) -> FakeRepo:
+        if name not in FakeGithub.repos:
+            FakeGithub.repos[name] = FakeRepo(name, self.latency)
+        return FakeGithub.repos[name]
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.repos = {}
+        cls.clients_created = 0
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from src.api.server import AdmissionController, Draining, Saturated
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_admits_up_to_capacity_then_queues():
+    async def scenario():
+        admission = AdmissionController(capacity=2, max_queue=1, queue_timeout_s=1)
+        assert await admission.acquire() == 1
+        assert await admission.acquire() == 1
+
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0.01)
+        assert admission.stats()["waiting"] == 1
+        assert not waiter.done()
+
+        await admission.release(1)
+        assert await asyncio.wait_for(waiter, 1) == 1
+        assert admission.in_use == 2
+
+    run(scenario())
+
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        admission = AdmissionController(capacity=1, max_queue=1, queue_timeout_s=5)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(Saturated):
+            await admission.acquire()
+        assert admission.rejected == 1
+        waiter.cancel()
+
+    run(scenario())
+
+
+def test_queue_wait_times_out():
+    async def scenario():
+        admission = AdmissionController(capacity=1, max_queue=4, queue_timeout_s=0.05)
+        await admission.acquire()
+        with pytest.raises(Saturated):
+            await admission.acquire()
+        assert admission.waiting == 0
+        assert admission.rejected == 1
+
+    run(scenario())
+
+
+def test_multi_slot_requests_are_clamped_to_capacity():
+    async def scenario():
+        admission = AdmissionController(capacity=4, max_queue=0, queue_timeout_s=0.05)
+        assert await admission.acquire(10) == 4
+        with pytest.raises(Saturated):
+            await admission.acquire(1)
+        await admission.release(4)
+        assert await admission.acquire(3) == 3
+
+    run(scenario())
+
+
+def test_drain_rejects_new_work_and_waits_for_in_flight():
+    async def scenario():
+        admission = AdmissionController(capacity=2, max_queue=4, queue_timeout_s=1)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire(2))
+        await asyncio.sleep(0.01)
+
+        drain = asyncio.create_task(admission.drain(1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(Draining):
+            await waiter
+        with pytest.raises(Draining):
+            await admission.acquire()
+        assert not drain.done()
+
+        await admission.release(1)
+        assert await asyncio.wait_for(drain, 1) is True
+
+    run(scenario())
+
+
+def test_drain_gives_up_after_the_grace_period():
+    async def scenario():
+        admission = AdmissionController(capacity=1, max_queue=1, queue_timeout_s=1)
+        await admission.acquire()
+        assert await admission.drain(0.05) is False
+        assert admission.draining
+
+    run(scenario())
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("langgraph")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from src.api import server
+from src.integrations.fake_llm import FakeEmailLLM
+
+
+@pytest.fixture
+def client(store):
+    fake = FakeEmailLLM(latency=0)
+    with TestClient(server.create_app(llm=fake, judge_llm=fake)) as client:
+        yield client
+
+
+def test_creates_an_email(client):
+    response = client.post("/v1/emails", json={"prompt": "Follow up with Emma about the contract", "mode": "fast"})
+    assert response.status_code == 200
+    assert response.json()["subject"]
+
+
+def test_unknown_mode_is_a_client_error(client):
+    response = client.post("/v1/emails", json={"prompt": "Hi", "mode": "turbo"})
+    assert response.status_code == 400
+    assert "turbo" in response.json()["error"]
+    assert client.post("/v1/emails:batch", json={"items": [{"prompt": "Hi"}], "mode": "turbo"}).status_code == 400
+
+
+def test_workflow_value_error_is_a_server_error(store, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise ValueError("parser bug")
+
+    monkeypatch.setattr(server, "arun_email_workflow", broken)
+    fake = FakeEmailLLM(latency=0)
+    # The test client re-raises server errors by default; check the response instead
+    with TestClient(server.create_app(llm=fake, judge_llm=fake), raise_server_exceptions=False) as client:
+        response = client.post("/v1/emails", json={"prompt": "Hi"})
+    assert response.status_code == 500
+    assert response.json()["error"] == "ValueError: parser bug"
+
+
+def test_importing_the_module_builds_no_app():
+    assert not hasattr(server, "app")
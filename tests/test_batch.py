@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from src.workflow.batch import read_completed_ids
+
+
+def _write(path, records, tail=""):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records) + tail, encoding="utf-8")
+
+
+def test_completed_ids_skip_failed_records(tmp_path):
+    out = tmp_path / "out.jsonl"
+    _write(out, [{"id": "a", "error": None}, {"id": "b", "error": "TimeoutError: "}, {"id": 3}])
+    assert read_completed_ids(out) == {"a", "3"}
+
+
+def test_retried_id_counts_once_it_succeeds(tmp_path):
+    out = tmp_path / "out.jsonl"
+    _write(out, [{"id": "a", "error": "boom"}, {"id": "a", "error": None}])
+    assert read_completed_ids(out) == {"a"}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    out = tmp_path / "out.jsonl"
+    _write(out, [{"id": "a", "error": None}], tail='{"id": "b", "err')
+    assert read_completed_ids(out) == {"a"}
+
+
+def test_missing_file(tmp_path):
+    assert read_completed_ids(tmp_path / "nope.jsonl") == set()
+
+
+def test_closing_generate_batch_early_stops_the_helper_thread(monkeypatch):
+    import asyncio
+    import threading
+
+    from src.workflow import batch
+
+    cancelled = []
+
+    async def fake_workflow(prompt, llm=None, mode=None):
+        if prompt != "fast":
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(prompt)
+                raise
+        return {"draft": {"subject": prompt, "body": ""}}
+
+    monkeypatch.setattr(batch, "arun_email_workflow", fake_workflow)
+    records = batch.generate_batch(["fast", "slow"], max_concurrency=2, llm=object())
+    assert next(records)["subject"] == "fast"
+    records.close()
+
+    assert cancelled == ["slow"]
+    assert not any(t.name == "generate-batch" for t in threading.enumerate())
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import time
+
+from src.workflow.budget import (
+    CALLS_PER_CYCLE,
+    RequestBudget,
+    exhausted_reason,
+    merge_usage,
+    remaining_s,
+    usage_from_message,
+)
+
+
+def _state(budget=None, **overrides):
+    state = {"budget": (budget or RequestBudget()).start(), "usage": {}, "retry_count": 0, "traces": []}
+    state.update(overrides)
+    return state
+
+
+def test_no_budget_never_stops():
+    assert exhausted_reason({"usage": {"llm_calls": 1000}}) is None
+
+
+def test_fresh_run_fits():
+    assert exhausted_reason(_state()) is None
+
+
+def test_max_rewrites():
+    assert exhausted_reason(_state(RequestBudget(max_rewrites=2), retry_count=2)) == "max_rewrites"
+
+
+def test_stops_when_the_next_cycle_would_exceed_the_call_cap():
+    budget = RequestBudget(max_llm_calls=8)
+    assert exhausted_reason(_state(budget, usage={"llm_calls": 8 - CALLS_PER_CYCLE})) is None
+    assert exhausted_reason(_state(budget, usage={"llm_calls": 8 - CALLS_PER_CYCLE + 1})) == "max_llm_calls"
+
+
+def test_n_best_cycles_reserve_a_call_per_candidate():
+    budget = RequestBudget(max_llm_calls=8)
+    traces = [{"agent": "draft_writer", "duration_ms": 1, "rewrite_candidates": 3}]
+    # Intent + draft + review so far; a rewrite is 3 candidates + 1 review
+    assert exhausted_reason(_state(budget, traces=traces, usage={"llm_calls": 4})) is None
+    assert exhausted_reason(_state(budget, traces=traces, usage={"llm_calls": 5})) == "max_llm_calls"
+
+
+def test_max_tokens():
+    assert exhausted_reason(_state(RequestBudget(max_tokens=100), usage={"total_tokens": 100})) == "max_tokens"
+
+
+def test_deadline_accounts_for_the_last_cycle():
+    budget = RequestBudget(deadline_s=5)
+    traces = [
+        {"agent": "draft_writer", "duration_ms": 2000},
+        {"agent": "personalization", "duration_ms": 100},
+        {"agent": "review", "duration_ms": 1500},
+    ]
+    assert exhausted_reason(_state(budget, traces=traces)) is None
+
+    late = _state(budget, traces=traces)
+    late["budget"]["deadline"] = time.time() + 2
+    assert exhausted_reason(late) == "deadline"
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_S", "12.5")
+    monkeypatch.setenv("REQUEST_MAX_LLM_CALLS", "4")
+    budget = RequestBudget.from_env()
+    assert budget.deadline_s == 12.5
+    assert budget.max_llm_calls == 4
+    assert budget.max_rewrites == RequestBudget.max_rewrites
+
+
+def test_merge_usage_sums_counters():
+    merged = merge_usage({"llm_calls": 1, "input_tokens": 10}, {"llm_calls": 2, "output_tokens": 5})
+    assert merged == {"llm_calls": 3, "input_tokens": 10, "output_tokens": 5}
+    assert merge_usage(None, None) == {}
+
+
+def test_usage_from_message():
+    class Message:
+        usage_metadata = {
+            "input_tokens": 1200, "output_tokens": 80, "total_tokens": 1280,
+            "input_token_details": {"cache_read": 1024},
+        }
+
+    assert usage_from_message(Message()) == {
+        "llm_calls": 1, "input_tokens": 1200, "output_tokens": 80, "cached_tokens": 1024, "total_tokens": 1280,
+    }
+    assert usage_from_message(None)["llm_calls"] == 1
+
+
+def test_remaining_time_counts_down_to_the_deadline():
+    assert remaining_s({}) is None
+    state = _state(RequestBudget(deadline_s=10))
+    assert 9 < remaining_s(state) <= 10
+    state["budget"]["deadline"] = time.time() - 1
+    assert remaining_s(state) < 0
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from src.integrations.fake_llm import FakeEmailLLM
+from src.workflow.checkpointing import BoundedInMemorySaver, make_checkpointer
+from src.workflow.langgraph_flow import _initial_state, _run_config, build_workflow
+
+
+def _run(planner, thread_id):
+    config = _run_config(FakeEmailLLM(latency=0), thread_id=thread_id)
+    planner.invoke(_initial_state("Follow up with Emma about the contract"), config=config)
+    return config
+
+
+def _saved_threads(saver):
+    return {item.config["configurable"]["thread_id"] for item in saver.list(None)}
+
+
+def test_memory_saver_keeps_only_the_most_recent_runs(store):
+    saver = BoundedInMemorySaver(max_threads=2, ttl_s=0)
+    planner = build_workflow().compile(checkpointer=saver)
+
+    for thread_id in ("run-1", "run-2", "run-3", "run-4"):
+        _run(planner, thread_id)
+
+    assert _saved_threads(saver) == {"run-3", "run-4"}
+    assert saver.stats()["threads"] == 2 and saver.evicted == 2
+
+
+def test_memory_saver_drops_idle_runs(store):
+    saver = BoundedInMemorySaver(max_threads=100, ttl_s=0.2)
+    planner = build_workflow().compile(checkpointer=saver)
+    old = _run(planner, "idle-run")
+    time.sleep(0.3)
+
+    _run(planner, "new-run")
+
+    assert _saved_threads(saver) == {"new-run"}
+    assert planner.get_state(old).created_at is None
+
+
+def test_checkpointer_kinds():
+    assert make_checkpointer("none") is None
+    assert isinstance(make_checkpointer("memory"), BoundedInMemorySaver)
+    with pytest.raises(ValueError, match="redis"):
+        make_checkpointer("redis")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.workflow import budget as budget_module
+from src.workflow.budget import (
+    DeadlineExceeded,
+    RequestBudget,
+    acall_within_deadline,
+    call_within_deadline,
+    iter_within_deadline,
+)
+
+
+def _state(deadline_s):
+    return {"budget": RequestBudget(deadline_s=deadline_s).start()}
+
+
+def test_slow_call_is_cut_off_at_the_deadline():
+    release = threading.Event()
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        call_within_deadline(_state(0.2), release.wait, 5)
+    assert time.perf_counter() - start < 1
+    release.set()
+
+
+def test_fast_call_returns_its_result_and_errors():
+    assert call_within_deadline(_state(5), sum, [1, 2]) == 3
+    with pytest.raises(ZeroDivisionError):
+        call_within_deadline(_state(5), lambda: 1 / 0)
+
+
+def test_sync_calls_share_one_bounded_pool():
+    call_within_deadline(_state(5), sum, [1])
+    executor = budget_module._get_llm_executor()
+    call_within_deadline(_state(5), sum, [1])
+    assert budget_module._get_llm_executor() is executor
+    assert executor._max_workers == budget_module.LLM_CALL_WORKERS
+
+
+def test_stalled_stream_is_cut_off_before_its_first_chunk():
+    release = threading.Event()
+
+    def chunks():
+        release.wait(5)
+        yield "late"
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        list(iter_within_deadline(_state(0.2), chunks()))
+    assert time.perf_counter() - start < 1
+    release.set()
+
+
+def test_stream_within_deadline_yields_every_chunk():
+    assert list(iter_within_deadline(_state(5), iter("abc"))) == ["a", "b", "c"]
+
+
+def test_slow_async_call_is_cancelled_at_the_deadline():
+    async def slow():
+        await asyncio.sleep(5)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(acall_within_deadline(_state(0.2), slow))
+    assert time.perf_counter() - start < 1
+
+
+def test_rewrite_past_the_deadline_ends_with_the_best_draft():
+    pytest.importorskip("langgraph")
+    from src.workflow.langgraph_flow import END, _draft_past_deadline, draft_decision
+
+    best = {"subject": "s", "body": "b"}
+    update = _draft_past_deadline({"best_draft": best}, DeadlineExceeded())
+    assert update == {"personalized_draft": best, "route": "done", "reason": "deadline"}
+    assert draft_decision(update) == END
+    assert draft_decision({"route": "rewrite"}) == "personalization"
+    with pytest.raises(DeadlineExceeded):
+        _draft_past_deadline({}, DeadlineExceeded())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip("langsmith")
+
+from src.agents.draft_selection import WEIGHTS, score_draft, select_best
+from src.agents.personalization_agent import DEFAULT_SENDER_NAME, PersonalizationAgent
+
+BODY = (
+    "Hi Emma,\n\nI hope this message finds you well. Please find the revised proposal attached; "
+    "I would appreciate your feedback by Friday so we can finalise the plan together.\n\n"
+    "Thank you for your time.\n\nBest regards,\n{sender}"
+)
+
+
+def _state(**overrides):
+    state = {
+        "parsed": {"recipient_name": "Emma", "constraints": {"length": "short"}},
+        "tone": "formal",
+        # The shipped profile's name differs from the sign-off name
+        "user_profile": {"name": "PP", "company": "Testing"},
+    }
+    state.update(overrides)
+    return state
+
+
+def test_correctly_signed_draft_gets_the_signature_score():
+    draft = {"subject": "Revised proposal", "body": BODY.format(sender=DEFAULT_SENDER_NAME)}
+    _, checks = score_draft(draft, _state())
+    assert checks["signature"] == 1.0
+
+
+def test_personalized_draft_passes_the_signature_check():
+    draft = {"subject": "Revised proposal", "body": BODY.format(sender="").rstrip()}
+    personalized = PersonalizationAgent.run({**_state(), "draft": draft})["personalized_draft"]
+    _, checks = score_draft(personalized, _state())
+    assert checks["signature"] == 1.0
+
+
+def test_unsigned_draft_loses_the_signature_score():
+    draft = {"subject": "Revised proposal", "body": BODY.format(sender="").rstrip()}
+    _, checks = score_draft(draft, _state())
+    assert checks["signature"] == 0.0
+
+
+def test_clean_draft_scores_full_marks():
+    draft = {"subject": "Revised proposal", "body": BODY.format(sender=DEFAULT_SENDER_NAME)}
+    score, checks = score_draft(draft, _state())
+    assert all(value == 1.0 for value in checks.values()), checks
+    assert score == sum(WEIGHTS.values())
+
+
+def test_placeholders_and_missing_recipient_cost_points():
+    draft = {"subject": "Revised proposal", "body": BODY.format(sender=DEFAULT_SENDER_NAME).replace("Emma", "[Name]")}
+    _, checks = score_draft(draft, _state())
+    assert checks["no_placeholders"] == 0.0
+    assert checks["recipient"] == 0.0
+
+
+def test_length_constraint_falls_off_outside_the_range():
+    long_body = BODY.format(sender=DEFAULT_SENDER_NAME) + " more words" * 200
+    _, checks = score_draft({"subject": "s", "body": long_body}, _state(parsed={"constraints": {"length": "short"}}))
+    assert checks["length"] == 0.0
+
+
+def test_select_best_prefers_the_higher_score_and_first_on_ties():
+    good = {"subject": "Revised proposal", "body": BODY.format(sender=DEFAULT_SENDER_NAME)}
+    bad = {"subject": "", "body": "hey [Name] lol"}
+    best, summary = select_best([bad, good, dict(good)], _state())
+    assert best == 1
+    assert summary["candidates"] == 3
+    assert summary["chosen"] == 1
+    assert summary["scores"][1] == summary["scores"][2] > summary["scores"][0]
+
+
+def test_select_best_only_picks_eligible_candidates():
+    good = {"subject": "Revised proposal", "body": BODY.format(sender=DEFAULT_SENDER_NAME)}
+    bad = {"subject": "", "body": "hey"}
+    best, _ = select_best([good, bad], _state(), eligible=[1])
+    assert best == 1
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from src.eval.eval_runner import SCORE_KEYS, arun_eval, compare_to_baseline, summarize
+from src.integrations.fake_llm import FakeEmailLLM
+
+DATASET = [
+    {"id": i, "input": f"Follow up with Emma about invoice {i}", "tone": "formal", "expected_intent": "follow-up"}
+    for i in range(4)
+]
+
+
+def _run(out, dataset=DATASET):
+    llm = FakeEmailLLM(latency=0)
+    return asyncio.run(arun_eval(dataset, out, concurrency=3, workflow_llm=llm, judge_llm=llm))
+
+
+def _scores(value, **overrides):
+    return {**{key: value for key in SCORE_KEYS}, **overrides}
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_scores_every_example_and_summarizes(store, tmp_path):
+    summary = _run(tmp_path / "results.jsonl")
+
+    assert summary["examples"] == 4 and summary["errors"] == 0
+    assert summary["metrics"]["overall_score"]["mean"] == 8
+    assert summary["intent_match_rate"] == 1.0
+    assert summary["llm_calls"]["mean"] == 2
+
+
+def test_rerun_skips_scored_examples_and_retries_failures(store, tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(json.dumps({"id": 0, "error": None, "scores": _scores(8)}) + "\n"
+                   + json.dumps({"id": 1, "error": "TimeoutError: "}) + "\n", encoding="utf-8")
+
+    summary = _run(out)
+
+    assert sorted(r["id"] for r in _lines(out)[2:]) == [1, 2, 3]
+    assert summary["examples"] == 4
+
+
+def test_baseline_delta_flags_regressions():
+    baseline = summarize([{"scores": _scores(8, clarity=9)}])
+    current = summarize([{"scores": _scores(8, clarity=7)}])
+
+    deltas = compare_to_baseline(current, baseline)
+
+    assert deltas["clarity"] == {"baseline": 9, "current": 7, "delta": -2, "regressed": True}
+    assert not deltas["grammar"]["regressed"]
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+import pytest
+
+from tests.fakes import FakeContentFile, FakeGithub, FakeRepo
+from src.memory import github_sync
+from src.memory.github_sync import GitHubSyncWorker
+
+PATH = "src/memory/user_profiles.json"
+
+
+@pytest.fixture(autouse=True)
+def fake_github():
+    FakeGithub.reset()
+    yield
+    FakeGithub.reset()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff sleeps the worker asked for; nothing actually sleeps."""
+    calls = []
+    monkeypatch.setattr(github_sync.time, "sleep", calls.append)
+    return calls
+
+
+def _worker(**kwargs):
+    options = {"client_factory": FakeGithub, "debounce_seconds": 0.05, "backoff_seconds": 0.01}
+    options.update(kwargs)
+    return GitHubSyncWorker("token", "owner/repo", **options)
+
+
+def _repo():
+    if "owner/repo" not in FakeGithub.repos:
+        FakeGithub.repos["owner/repo"] = FakeRepo("owner/repo")
+    return FakeGithub.repos["owner/repo"]
+
+
+def _content(path=PATH):
+    return json.loads(_repo().files[path].decoded_content)
+
+
+def test_writes_in_one_window_become_one_commit():
+    worker = _worker(debounce_seconds=0.2)
+    state = {"version": 0}
+    for version in range(1, 11):
+        state["version"] = version
+        worker.enqueue(PATH, lambda: dict(state), f"write {version}")
+
+    assert worker.flush(timeout=5)
+    assert len(_repo().commits) == 1
+    assert _content() == {"version": 10}
+    metrics = worker.metrics()
+    assert metrics["enqueued"] == 10
+    assert metrics["merged"] == 9
+    assert metrics["commits"] == 1
+    assert metrics["queue_depth"] == 0
+    worker.stop()
+
+
+def test_commit_waits_for_the_debounce_window():
+    worker = _worker(debounce_seconds=0.3)
+    worker.enqueue(PATH, lambda: {"a": 1}, "write")
+    time.sleep(0.1)
+    assert _repo().commits == []
+    assert worker.metrics()["queue_depth"] == 1
+
+    deadline = time.monotonic() + 5
+    while not _repo().commits and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(_repo().commits) == 1
+    worker.stop()
+
+
+def test_each_path_gets_its_own_commit():
+    worker = _worker()
+    worker.enqueue(PATH, lambda: {"p": 1}, "profiles")
+    worker.enqueue("src/memory/eval_history.json", lambda: [1, 2], "evals")
+    assert worker.flush(timeout=5)
+    assert sorted(c["path"] for c in _repo().commits) == ["src/memory/eval_history.json", PATH]
+    worker.stop()
+
+
+def test_transient_failures_retry_with_exponential_backoff(sleeps):
+    worker = _worker(max_retries=4)
+    _repo().fail_next = 3
+    worker.enqueue(PATH, lambda: {"a": 1}, "write")
+
+    assert worker.flush(timeout=5)
+    assert _content() == {"a": 1}
+    metrics = worker.metrics()
+    assert metrics["commits"] == 1
+    assert metrics["retries"] == 3
+    assert metrics["failures"] == 0
+    assert sleeps == [0.01, 0.02, 0.04]
+    worker.stop()
+
+
+def test_gives_up_after_max_retries(sleeps):
+    worker = _worker(max_retries=2)
+    _repo().fail_next = 100
+    worker.enqueue(PATH, lambda: {"a": 1}, "write")
+
+    assert worker.flush(timeout=5)
+    metrics = worker.metrics()
+    assert metrics["commits"] == 0
+    assert metrics["retries"] == 2
+    assert metrics["failures"] == 1
+    assert PATH in metrics["last_error"]
+    assert PATH not in _repo().files
+    worker.stop()
+
+
+def test_stale_sha_is_refetched_after_a_conflict(sleeps):
+    worker = _worker()
+    worker.enqueue(PATH, lambda: {"v": 1}, "first")
+    assert worker.flush(timeout=5)
+    api_calls = _repo().api_calls
+
+    # Someone else commits the file; the worker's remembered SHA is now stale
+    _repo().files[PATH] = FakeContentFile(PATH, json.dumps({"v": "external"}))
+
+    worker.enqueue(PATH, lambda: {"v": 2}, "second")
+    assert worker.flush(timeout=5)
+    assert _content() == {"v": 2}
+    metrics = worker.metrics()
+    assert metrics["commits"] == 2
+    assert metrics["retries"] == 1
+    # failed update, get_contents for the fresh SHA, successful update
+    assert _repo().api_calls - api_calls == 3
+    worker.stop()
+
+
+def test_known_sha_skips_get_contents():
+    worker = _worker()
+    worker.enqueue(PATH, lambda: {"v": 1}, "first")
+    assert worker.flush(timeout=5)
+    api_calls = _repo().api_calls
+
+    worker.enqueue(PATH, lambda: {"v": 2}, "second")
+    assert worker.flush(timeout=5)
+    assert _repo().api_calls - api_calls == 1
+    assert FakeGithub.clients_created == 1
+    worker.stop()
+
+
+def test_flush_times_out_while_a_commit_is_slow():
+    FakeGithub.repos["owner/repo"] = FakeRepo("owner/repo", latency=0.5)
+    worker = _worker()
+    worker.enqueue(PATH, lambda: {"a": 1}, "write")
+    assert worker.flush(timeout=0.05) is False
+    assert worker.flush(timeout=5) is True
+    worker.stop()
+
+
+def test_stop_drains_pending_writes_and_ends_the_thread():
+    worker = _worker(debounce_seconds=60)
+    worker.enqueue(PATH, lambda: {"a": 1}, "write")
+    worker.stop(timeout=5)
+
+    assert _content() == {"a": 1}
+    assert not worker._thread.is_alive()
+
+
+def test_missing_file_is_created():
+    worker = _worker()
+    worker.enqueue(PATH, lambda: {"a": 1}, "write")
+    assert worker.flush(timeout=5)
+    assert _repo().commits[0]["message"] == f"Create {PATH}"
+    assert worker.metrics()["retries"] == 0
+    worker.stop()
+
+
+def test_snapshot_errors_are_recorded_not_raised():
+    worker = _worker()
+
+    def broken():
+        raise RuntimeError("db locked")
+
+    worker.enqueue(PATH, broken, "write")
+    assert worker.flush(timeout=5)
+    assert worker.metrics()["failures"] == 1
+    assert "db locked" in worker.metrics()["last_error"]
+    worker.stop()
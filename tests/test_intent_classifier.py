@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import pytest
+
+from src.agents import intent_classifier
+from src.agents.intent_classifier import classify_fast, rule_match
+
+_get_model = intent_classifier.get_model
+
+
+@pytest.fixture(autouse=True)
+def rules_only(monkeypatch):
+    monkeypatch.setattr(intent_classifier, "FAST_PATH_ENABLED", True)
+    monkeypatch.setattr(intent_classifier, "get_model", lambda: None)
+
+
+def test_explicit_prompts_are_answered_by_rules():
+    fast = classify_fast("Please follow up with Emma about the signed contract")
+    assert fast == ("follow-up", 1.0, "rules")
+    assert classify_fast("Schedule a meeting with the design team next week").label == "ask_for_meeting"
+
+
+def test_broad_rule_defers_below_the_threshold():
+    assert rule_match("Requesting a quick call about pricing") == ("ask_for_meeting", 0.7)
+    assert classify_fast("Requesting a quick call about pricing") is None
+
+
+def test_conflicting_rules_defer():
+    assert rule_match("Apologize for the delay and follow up on the invoice") is None
+    assert classify_fast("Apologize for the delay and follow up on the invoice") is None
+
+
+def test_failed_log_write_is_logged_not_printed(monkeypatch, caplog, capsys):
+    from src.memory import store
+
+    def broken(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "log_intent", broken)
+    with caplog.at_level(logging.WARNING, logger=intent_classifier.__name__):
+        intent_classifier._log("prompt", "follow-up", "rules", None)
+    assert "disk full" in caplog.text
+    assert capsys.readouterr().out == ""
+
+
+def test_holdout_is_a_seeded_shuffle(store, monkeypatch, tmp_path):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(intent_classifier, "MODEL_PATH", tmp_path / "intent_model.npz")
+    monkeypatch.setattr(intent_classifier, "get_model", _get_model)  # train() clears its cache
+    # Newest first, as the log returns them: an unshuffled split would hold out only "apology"
+    rows = [{"prompt": f"follow up on item {i}", "llm_label": "follow-up"} for i in range(20)]
+    rows += [{"prompt": f"apologize for mistake {i}", "llm_label": "apology"} for i in range(20)]
+    monkeypatch.setattr(intent_classifier, "_labelled_rows", lambda limit: [dict(r) for r in rows])
+
+    first = intent_classifier.train(holdout=0.25, seed=1)
+    second = intent_classifier.train(holdout=0.25, seed=1)
+    assert first == second
+    assert first["train"] == 30 and first["holdout"] == 10
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip("langchain_openai")
+httpx = pytest.importorskip("httpx")
+
+from src.integrations import llm_client
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Fresh registry and pooled clients whose requests never leave the process."""
+    options = llm_client._client_options
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(llm_client, "_registry", {})
+    monkeypatch.setattr(llm_client, "_http_client", None)
+    monkeypatch.setattr(llm_client, "_async_http_client", None)
+    monkeypatch.setattr(llm_client, "_client_options", lambda: {
+        **options(), "transport": httpx.MockTransport(lambda request: httpx.Response(204)),
+    })
+    return llm_client
+
+
+def test_same_settings_share_one_model(clients):
+    first = clients.get_llm(model="gpt-4o-mini", temperature=0.2, cache=False)
+
+    assert clients.get_llm(model="gpt-4o-mini", temperature=0.2, cache=False) is first
+    assert clients.get_llm(model="gpt-4o-mini", temperature=0.0, cache=False) is not first
+    assert clients.pool_stats()["registry_size"] == 2
+
+
+def test_models_share_the_pooled_http_clients(clients):
+    sync_client, async_client = clients.get_http_clients()
+
+    for temperature in (0.0, 0.2):
+        llm = clients.get_llm(model="gpt-4o", temperature=temperature, cache=False)
+        assert llm.http_client is sync_client and llm.http_async_client is async_client
+    assert clients.get_http_clients() == (sync_client, async_client)
+
+
+def test_requests_on_the_shared_client_are_counted(clients):
+    sync_client, _ = clients.get_http_clients()
+    before = clients.pool_stats()["requests"]["sync"]
+
+    sync_client.get("https://api.example.test/v1/models")
+    sync_client.get("https://api.example.test/v1/models")
+
+    assert clients.pool_stats()["requests"]["sync"] == before + 2
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+def _count(store, user_id):
+    return store._connect().execute(
+        "SELECT COUNT(*) FROM sent_examples WHERE user_id = ?", (user_id,)
+    ).fetchone()[0]
+
+
+def test_sent_history_is_capped_per_user(store, monkeypatch):
+    monkeypatch.setattr(store, "SENT_EXAMPLES_MAX", 5)
+    monkeypatch.setattr(store, "SENT_COMPACT_EVERY", 4)
+
+    # Interleaved users: global row ids never line up with one user's appends
+    for i in range(40):
+        for user_id in ("alice", "bob", "carol"):
+            store.append_sent_example(user_id, {"subject": f"s{i}", "body": "b"})
+
+    for user_id in ("alice", "bob", "carol"):
+        assert _count(store, user_id) < 5 + 4
+        assert store.get_profile(user_id)["sent_examples_total"] == 40
+        assert store.get_sent_examples(user_id, limit=1)[0]["subject"] == "s39"
+
+
+def test_profile_save_keeps_send_counters(store):
+    store.upsert_profile("default", {"name": "SP"})
+    stale = store.get_profile("default")
+    for _ in range(3):
+        store.append_sent_example("default", {"subject": "s", "body": "b"})
+
+    # e.g. the profile form saving {**cached_profile, "company": ...}
+    store.upsert_profile("default", {**stale, "company": "Acme", "sent_examples_total": 0})
+
+    profile = store.get_profile("default")
+    assert profile["company"] == "Acme"
+    assert profile["sent_examples_total"] == 3
+    assert "last_sent_at" in profile
+
+
+def test_profile_save_without_sends_adds_no_counters(store):
+    store.upsert_profile("default", {"name": "SP"})
+    store.upsert_profile("default", {"name": "PP"})
+    assert store.get_profile("default") == {"name": "PP"}
+
+
+def test_data_version_changes_on_write(store):
+    before = store.data_version("profiles")
+    store.upsert_profile("default", {"name": "SP"})
+    after = store.data_version("profiles")
+    assert after != before
+    store.append_sent_example("default", {"subject": "s", "body": "b"})
+    assert store.data_version("profiles") != after
+
+    assert store.data_version("evals") == 0
+    store.save_eval("prompt", {"subject": "s", "body": "b"}, {"overall_score": 8})
+    assert store.data_version("evals") != 0
+
+
+def test_migrates_legacy_json_once(store):
+    import json
+
+    store.PROFILE_PATH.write_text(json.dumps({
+        "default": {
+            "name": "SP",
+            "sent_examples": [{"subject": f"s{i}", "body": "b"} for i in range(3)],
+        },
+    }), encoding="utf-8")
+    store.EVAL_PATH.write_text(json.dumps([
+        {"eval_id": "e1", "timestamp": "2024-01-01T00:00:00", "prompt": "p1",
+         "subject": "s", "body": "b", "scores": {"overall_score": 7}},
+        {"timestamp": "2024-01-02T00:00:00", "prompt": "p2", "scores": {"overall_score": 9}},
+    ]), encoding="utf-8")
+
+    profile = store.get_profile("default")
+    assert profile["name"] == "SP"
+    assert "sent_examples" not in profile
+    assert profile["sent_examples_total"] == 3
+    assert [e["subject"] for e in store.get_sent_examples("default")] == ["s2", "s1", "s0"]
+
+    history = store.get_eval_history()
+    assert [r["prompt"] for r in history] == ["p2", "p1"]
+    assert history[1]["eval_id"] == "e1"
+    assert history[0]["scores"] == {"overall_score": 9}
+
+    # A second run (e.g. a new process) imports nothing again
+    assert store.migrate_from_json() is False
+    assert len(store.get_eval_history()) == 2
+    assert store.get_profile("default")["sent_examples_total"] == 3
+
+
+def test_corrupt_legacy_json_is_skipped(store):
+    store.PROFILE_PATH.write_text("{not json", encoding="utf-8")
+    store.EVAL_PATH.write_text("", encoding="utf-8")
+    assert store.get_profile("default") == {}
+    assert store.get_eval_history() == []
+
+
+def test_eval_history_pages_newest_first(store, monkeypatch):
+    store._connect()
+    stamps = iter(f"2024-01-{day:02d}T00:00:00" for day in range(1, 11))
+    monkeypatch.setattr(store, "_now", lambda: next(stamps))
+    for i in range(10):
+        store.save_eval(f"p{i}", {"subject": "s", "body": "b"}, {"overall_score": i})
+
+    assert [r["prompt"] for r in store.get_eval_history(limit=3)] == ["p9", "p8", "p7"]
+    assert [r["prompt"] for r in store.get_eval_history(limit=3, offset=3)] == ["p6", "p5", "p4"]
+    assert [r["prompt"] for r in store.get_eval_history(since="2024-01-09T00:00:00")] == ["p9", "p8"]
+
+
+def test_eval_sync_snapshots_only_that_day(store, monkeypatch):
+    store._connect()
+    stamps = iter(["2024-01-01T09:00:00", "2024-01-02T08:00:00", "2024-01-02T17:30:00"])
+    monkeypatch.setattr(store, "_now", lambda: next(stamps))
+    scheduled = []
+    monkeypatch.setattr(store, "_schedule_github_sync", lambda path, fn, message: scheduled.append((path, fn)))
+    for i in range(3):
+        store.save_eval(f"p{i}", {"subject": "s", "body": "b"}, {"overall_score": i})
+
+    assert [path for path, _ in scheduled] == [
+        "src/memory/evals/2024-01-01.json",
+        "src/memory/evals/2024-01-02.json",
+        "src/memory/evals/2024-01-02.json",
+    ]
+    assert [r["prompt"] for r in scheduled[0][1]()] == ["p0"]
+    assert [r["prompt"] for r in scheduled[-1][1]()] == ["p1", "p2"]
+
+
+def test_migrated_total_counts_examples_past_the_cap(store, monkeypatch):
+    import json
+
+    monkeypatch.setattr(store, "SENT_EXAMPLES_MAX", 2)
+    store.PROFILE_PATH.write_text(json.dumps({
+        "default": {"sent_examples": [{"subject": f"s{i}", "body": "b"} for i in range(5)]},
+    }), encoding="utf-8")
+
+    assert store.get_profile("default")["sent_examples_total"] == 5
+    assert [e["subject"] for e in store.get_sent_examples("default")] == ["s4", "s3"]
+
+
+def test_upsert_profile_is_timed_once(store):
+    from src.observability.metrics import STORE_DURATION
+
+    def count(operation):
+        return STORE_DURATION.snapshot().get(operation, {}).get("count", 0)
+
+    before = count("upsert_profile"), count("save_profiles")
+    store.upsert_profile("default", {"name": "SP"})
+
+    assert (count("upsert_profile"), count("save_profiles")) == (before[0] + 1, before[1])
+
+
+def test_data_version_changes_only_when_its_kind_is_written(store):
+    assert store.data_version("profiles") == store.data_version("evals") == 0
+
+    store.upsert_profile("default", {"name": "SP"})
+    profiles = store.data_version("profiles")
+    store.get_profile("default")
+    assert store.data_version("profiles") == profiles and store.data_version("evals") == 0
+
+    store.append_sent_example("default", {"subject": "s", "body": "b"})
+    assert store.data_version("profiles") > profiles
+
+    store.save_eval("prompt", {"subject": "s", "body": "b"}, {"overall_score": 8})
+    assert store.data_version("evals") > 0
+
+    with pytest.raises(ValueError):
+        store.data_version("drafts")
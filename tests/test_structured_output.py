@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from src.agents.router_agent import RouterAgent
+from src.agents.structured_output import IncrementalJSONParser, parse_json_tolerant, parse_stats, parsed_dict
+
+
+class Raw:
+    def __init__(self, content):
+        self.content = content
+
+
+def test_tolerant_parse_accepts_fences_and_prose():
+    assert parse_json_tolerant('{"ok": true}') == {"ok": True}
+    assert parse_json_tolerant('```json\n{"ok": false, "issues": ["x"]}\n```') == {"ok": False, "issues": ["x"]}
+    assert parse_json_tolerant('Here is the review: {"ok": true} Hope it helps.') == {"ok": True}
+
+
+def test_tolerant_parse_rejects_text_without_an_object():
+    with pytest.raises(ValueError):
+        parse_json_tolerant("Looks good to me!")
+    with pytest.raises(ValueError):
+        parse_json_tolerant('{"ok": tru')
+
+
+def test_parsed_dict_falls_back_to_the_raw_text_and_counts_failures():
+    before = parse_stats().get("test_agent", {"attempts": 0, "failures": 0})
+    assert parsed_dict("test_agent", {"parsed": None, "raw": Raw('```{"ok": true}```')}) == {"ok": True}
+    assert parsed_dict("test_agent", {"parsed": None, "raw": Raw("no json")}) is None
+    after = parse_stats()["test_agent"]
+    assert after["attempts"] == before["attempts"] + 2
+    assert after["failures"] == before["failures"] + 1
+
+
+def test_incremental_parser_snapshots_partial_objects():
+    parser = IncrementalJSONParser()
+    assert parser.feed("Sure! ```json\n") == {}
+    assert parser.feed('{"subject": "Quarterly upd') == {"subject": "Quarterly upd"}
+    assert parser.feed('ate", "body": "Hi Emma,\\n') == {"subject": "Quarterly update", "body": "Hi Emma,\n"}
+    assert parser.feed('Thanks"}') == {"subject": "Quarterly update", "body": "Hi Emma,\nThanks"}
+
+
+def test_incremental_parser_handles_escapes_split_across_chunks():
+    parser = IncrementalJSONParser()
+    parser.feed('{"body": "She said \\')
+    assert parser.value == {"body": "She said "}
+    parser.feed('"hi\\"", "tags": ["a", ')
+    assert parser.value == {"body": 'She said "hi"', "tags": ["a"]}
+    parser.feed('"b"]}')
+    assert parser.value == {"body": 'She said "hi"', "tags": ["a", "b"]}
+
+
+def test_incremental_parser_keeps_the_last_good_snapshot():
+    parser = IncrementalJSONParser()
+    parser.feed('{"subject": "Hi", "body":')
+    assert parser.value == {"subject": "Hi", "body": None}
+    parser.feed(" tr")  # an unfinished literal does not parse
+    assert parser.value == {"subject": "Hi", "body": None}
+
+
+def test_unreadable_review_is_not_an_approval():
+    pytest.importorskip("langchain_core")
+    from src.agents.review_agent import ReviewAgent
+
+    state = {"personalized_draft": {"subject": "s", "body": "b"}, "tone": "formal"}
+    review = ReviewAgent._result(state, {"parsed": None, "raw": Raw("I think it is fine.")})["review"]
+    assert review["ok"] is False and review["parse_failed"] is True
+    assert review["issues"]
+
+
+def test_router_rewrites_after_an_unreadable_review():
+    review = {"ok": False, "issues": ["The review could not be read"], "parse_failed": True}
+    update = RouterAgent.run({"review": review, "personalized_draft": {"subject": "s", "body": "b"}})
+    assert update["route"] == "rewrite"
+    assert update["retry_count"] == 1
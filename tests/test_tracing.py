@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import json
+
+from src.observability.tracing import JSONLExporter, Span, SpanBuffer, SpanExporter, Tracer, trace_id_for
+
+
+def _span(name="node", trace_id="0" * 32):
+    return Span(trace_id=trace_id, span_id="1" * 16, name=name, start_unix_ns=0, duration_ns=1_000_000)
+
+
+class FailingExporter(SpanExporter):
+    def export(self, spans):
+        raise ConnectionError("collector down")
+
+
+def test_sampling_is_decided_once_per_trace():
+    tracer = Tracer(sample_rate=0.5)
+    trace_ids = [trace_id_for(f"run-{i}") for i in range(200)]
+
+    decisions = [tracer.sampled(t) for t in trace_ids]
+
+    assert decisions == [tracer.sampled(t) for t in trace_ids]
+    assert 40 < sum(decisions) < 160
+    assert not Tracer(sample_rate=0.0).sampled(trace_ids[0])
+    assert Tracer(sample_rate=1.0).sampled(trace_ids[0])
+
+
+def test_full_buffer_drops_the_oldest_unexported_span():
+    buffer = SpanBuffer(capacity=2)
+    for name in ("a", "b", "c"):
+        buffer.append(_span(name))
+
+    assert [s.name for s in buffer.take_pending()] == ["b", "c"]
+    assert buffer.dropped == 1
+    buffer.append(_span("d"))  # evicts an exported span: not a drop
+    assert buffer.dropped == 1
+    assert [s.name for s in buffer.recent()] == ["c", "d"]
+
+
+def test_shutdown_exports_pending_spans_in_one_batch(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(sample_rate=1.0, exporters=[JSONLExporter(path)], export_interval_s=60)
+    for name in ("input_parser", "draft_writer"):
+        tracer.record(_span(name))
+
+    tracer.shutdown()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["name"] for line in lines] == ["input_parser", "draft_writer"]
+    assert tracer.stats()["exported"] == 2
+
+
+def test_export_errors_are_counted_not_raised():
+    tracer = Tracer(sample_rate=1.0, exporters=[FailingExporter()], export_interval_s=60)
+    tracer.record(_span())
+
+    tracer.shutdown()
+
+    assert tracer.stats()["export_errors"] == 1
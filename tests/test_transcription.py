@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import io
+import threading
+
+import pytest
+
+from src.integrations import transcription
+from src.integrations.transcription import TranscriptCache, TranscriptionBackend, TranscriptionError, transcribe_audio
+
+
+class RecordingBackend(TranscriptionBackend):
+    """Returns the file's name (or `fail`s) and records every call."""
+
+    name = "recording"
+
+    def __init__(self, fail=False):
+        super().__init__("test-model")
+        self.fail = fail
+        self.paths = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def transcribe(self, path, language):
+        with self._lock:
+            self.paths.append(path)
+            self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise ConnectionError("backend down")
+        return f" {path.stem} "
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TranscriptCache(str(tmp_path / "transcripts"))
+    monkeypatch.setattr(transcription, "_cache", cache)
+    monkeypatch.setattr(transcription, "ffmpeg_available", lambda: False)
+    return cache
+
+
+def test_same_audio_is_transcribed_once(cache):
+    backend = RecordingBackend()
+
+    first = transcribe_audio(io.BytesIO(b"RIFF-audio"), filename="note.wav", backend=backend)
+    second = transcribe_audio(b"RIFF-audio", filename="note.wav", backend=backend)
+
+    assert first.text == second.text == "input"
+    assert (first.cached, second.cached) == (False, True)
+    assert len(backend.paths) == 1
+    assert not backend.paths[0].exists()  # the spooled upload is cleaned up
+
+
+def test_disk_tier_survives_a_new_process(cache, monkeypatch):
+    transcribe_audio(b"RIFF-audio", backend=RecordingBackend())
+    monkeypatch.setattr(transcription, "_cache", TranscriptCache(str(cache.directory)))
+
+    backend = RecordingBackend()
+    assert transcribe_audio(b"RIFF-audio", backend=backend).cached
+    assert backend.paths == []
+
+
+def test_long_audio_is_chunked_and_joined_in_order(cache, monkeypatch):
+    def split(path, directory, chunk_s):
+        chunks = [directory / f"chunk_{i:04d}.mp3" for i in range(5)]
+        for chunk in chunks:
+            chunk.write_bytes(b"mp3")
+        return chunks
+
+    monkeypatch.setattr(transcription, "ffmpeg_available", lambda: True)
+    monkeypatch.setattr(transcription, "probe_duration", lambda path: 600.0)
+    monkeypatch.setattr(transcription, "split_audio", split)
+    backend = RecordingBackend()
+
+    transcript = transcribe_audio(b"long-audio", backend=backend, chunk_s=120, workers=4)
+
+    assert transcript.text == "chunk_0000 chunk_0001 chunk_0002 chunk_0003 chunk_0004"
+    assert transcript.chunks == 5 and transcript.duration_s == 600.0
+    assert all(name.startswith("transcribe") for name in backend.threads)
+
+
+def test_backend_failures_raise_transcription_error_and_are_not_cached(cache):
+    with pytest.raises(TranscriptionError, match="backend down"):
+        transcribe_audio(b"RIFF-audio", backend=RecordingBackend(fail=True))
+
+    assert not transcribe_audio(b"RIFF-audio", backend=RecordingBackend()).cached
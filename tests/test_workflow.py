@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from src.agents.intent_detection_agent import IntentDetectionAgent
+from src.agents.tone_stylist_agent import ToneStylistAgent
+from src.integrations.fake_llm import FakeEmailLLM
+from src.observability import tracing
+from src.workflow import langgraph_flow
+from src.workflow.langgraph_flow import (
+    arun_email_workflow,
+    astream_email_workflow,
+    run_email_workflow,
+    stream_email_workflow,
+)
+
+PROMPT = "Follow up with Emma about the signed contract"
+
+
+@pytest.fixture
+def llm():
+    return FakeEmailLLM(latency=0)
+
+
+def test_intent_and_tone_run_concurrently_before_drafting(store, llm, monkeypatch):
+    # Each stage waits for the other: run one after the other, the barrier breaks
+    barrier = threading.Barrier(2, timeout=5)
+    intent_run, tone_run = IntentDetectionAgent.run, ToneStylistAgent.run
+
+    def intent(state, llm):
+        barrier.wait()
+        return intent_run(state, llm)
+
+    def tone(state):
+        barrier.wait()
+        return tone_run(state)
+
+    monkeypatch.setattr(IntentDetectionAgent, "run", staticmethod(intent))
+    monkeypatch.setattr(ToneStylistAgent, "run", staticmethod(tone))
+
+    state = run_email_workflow(PROMPT, llm=llm)
+
+    agents = [t["agent"] for t in state["traces"]]
+    assert set(agents[1:3]) == set(langgraph_flow.PRE_DRAFT_STAGES)
+    assert agents.index("draft_writer") == 3
+    assert state["intent"] == "follow-up" and state["tone"] == "formal"
+    assert state["personalized_draft"]["body"]
+
+
+def test_async_runs_share_one_event_loop(store):
+    # Two LLM calls of 0.2 s per run: five runs one after another take 2 s
+    llm = FakeEmailLLM(latency=0.2)
+
+    async def main():
+        return await asyncio.gather(*(arun_email_workflow(f"{PROMPT} #{i}", llm=llm) for i in range(5)))
+
+    start = time.perf_counter()
+    states = asyncio.run(main())
+
+    assert time.perf_counter() - start < 1.2
+    assert all(s["personalized_draft"]["body"] and s["usage"]["llm_calls"] == 2 for s in states)
+
+
+def test_stream_yields_draft_tokens_then_the_final_state(store, llm):
+    events = list(stream_email_workflow(PROMPT, llm=llm))
+
+    types = [e["type"] for e in events]
+    assert types[-1] == "final" and types.count("final") == 1
+    assert types.index("draft_reset") < types.index("token")
+    tokens = [e["text"] for e in events if e["type"] == "token"]
+    assert len(tokens) > 1
+    final = events[-1]["state"]
+    assert json.loads("".join(tokens)) == final["draft"]
+    assert {"input_parser", "draft_writer", "review"} <= {e["node"] for e in events if e["type"] == "node"}
+
+
+def test_async_stream_matches_the_sync_events(store, llm):
+    async def collect():
+        return [event async for event in astream_email_workflow(PROMPT, llm=llm)]
+
+    events = asyncio.run(collect())
+
+    tokens = "".join(e["text"] for e in events if e["type"] == "token")
+    assert json.loads(tokens) == events[-1]["state"]["draft"]
+
+
+def test_fast_mode_drafts_in_one_llm_call(store, llm):
+    state = run_email_workflow(PROMPT, llm=llm, mode="fast")
+
+    agents = [t["agent"] for t in state["traces"]]
+    assert "fast_draft" in agents and "review" not in agents and "draft_writer" not in agents
+    assert state["usage"]["llm_calls"] == 1
+    assert state["intent"] == "follow-up"
+    assert state["personalized_draft"]["body"]
+
+
+def test_unknown_mode_is_rejected(store, llm):
+    with pytest.raises(ValueError, match="turbo"):
+        run_email_workflow(PROMPT, llm=llm, mode="turbo")
+
+
+def test_sampled_run_records_a_span_per_node(store, llm, monkeypatch):
+    tracer = tracing.Tracer(sample_rate=1.0)
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+
+    state = run_email_workflow(PROMPT, llm=llm, thread_id="traced-run")
+
+    spans = [s for s in tracer.recent() if s["trace_id"] == tracing.trace_id_for("traced-run")]
+    # Concurrent nodes finish in either order
+    assert sorted(s["name"] for s in spans) == sorted(t["agent"] for t in state["traces"])
+    draft_span = spans[[s["name"] for s in spans].index("draft_writer")]
+    assert draft_span["attributes"]["output_bytes"] > 0
+    assert draft_span["attributes"]["gen_ai.usage.llm_calls"] == 1